@@ -1,8 +1,7 @@
 import streamlit as st
 import utils
 
-# 引入所有視圖模組 (移除 maid)
-from views import home, finance, quest, diary, setting
+# [優化] 視圖模組改在路由到該頁時才匯入 (見 5. 頁面路由)，加快冷啟動
 
 # --- 1. 網頁基礎設定 ---
 st.set_page_config(
@@ -81,6 +80,11 @@ st.markdown(
 )
 
 # --- 3. 讀取設定 ---
+# 這次 rerun 的編號 (效能量測用，除錯面板據此列出本次的呼叫)
+RERUN = utils.begin_rerun()
+
+# [優化] 背景預熱：認證、開啟試算表與常用分頁都在背景先完成
+utils.start_cache_warmer()
 SETTINGS = utils.get_settings()
 CUR_CITY = SETTINGS.get("Location", "Taipei,TW")
 CUR_GOAL = SETTINGS.get("LifeGoal", "未設定")
@@ -120,6 +124,26 @@ with st.sidebar:
         st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # E. 延遲寫入狀態 (每 5 秒自動更新)
+    @st.fragment(run_every=5)
+    def show_sync_status():
+        pending = utils.pending_write_count()
+        status = utils.write_queue_status()
+        if pending:
+            st.caption(f"⏳ 尚有 {pending} 筆資料等待同步雲端")
+        else:
+            st.caption("☁️ 所有資料已同步")
+        if status["failed"]:
+            st.caption(f"❌ {status['failed']} 筆送出失敗 (見系統診斷)")
+        if status["missing_ids"]:
+            st.caption(f"🆔 {status['missing_ids']} 筆資料缺少 _id (見設定頁)")
+        if status["write_error"]:
+            st.caption(f"❌ 背景寫入失敗：{status['write_error']}")
+        elif pending and status["last_error"]:
+            st.caption(f"⚠️ 重試中：{status['last_error']}")
+
+    show_sync_status()
+
     st.caption("Life Adventure OS v3.1")
 
 # --- 5. 頁面路由 ---
@@ -129,25 +153,50 @@ if page != st.session_state.get("last_radio_selection", ""):
     st.session_state["current_page"] = page
     st.session_state["last_radio_selection"] = page
 
-if target_page == "我的小屋":
-    home.show_home_page(CUR_CITY, CUR_GOAL)
-elif target_page == "冒險日誌":
-    diary.show_diary_page()
-elif target_page == "商會":
-    finance.show_finance_page(
-        CUR_CITY,
-        CUR_GOAL,
-        TYPE1,
-        TYPE2,
-        INCOME_TYPES,
-        FIXED_TYPES,
-        PAY_METHODS,
-    )
-elif target_page == "任務看板":
-    quest.show_quest_board(QUEST_TYPES)
-elif target_page == "接取任務追蹤":
-    quest.show_tracking()
-elif target_page == "Setting":
-    setting.show_setting_page(
-        CUR_GOAL, CUR_CITY, utils.CITY_OPTIONS, TYPE1_STR, TYPE2_STR
-    )
+# [新增] 量測頁面執行時間，期間的 Sheets 請求都算在這個頁面
+with utils.page_timer(target_page):
+    if target_page == "我的小屋":
+        from views import home
+
+        home.show_home_page(CUR_CITY, CUR_GOAL)
+    elif target_page == "冒險日誌":
+        from views import diary
+
+        diary.show_diary_page()
+    elif target_page == "商會":
+        from views import finance
+
+        finance.show_finance_page(
+            CUR_CITY,
+            CUR_GOAL,
+            TYPE1,
+            TYPE2,
+            INCOME_TYPES,
+            FIXED_TYPES,
+            PAY_METHODS,
+        )
+    elif target_page == "任務看板":
+        from views import quest
+
+        quest.show_quest_board(QUEST_TYPES)
+    elif target_page == "接取任務追蹤":
+        from views import quest
+
+        quest.show_tracking()
+    elif target_page == "Setting":
+        from views import setting
+
+        setting.show_setting_page(
+            CUR_GOAL, CUR_CITY, utils.CITY_OPTIONS, TYPE1_STR, TYPE2_STR
+        )
+    elif target_page == "Diagnostics":
+        from views import diagnostics
+
+        diagnostics.show_diagnostics_page()
+
+# --- 6. 除錯面板 (選用，見 utils.debug_panel_enabled) ---
+if utils.debug_panel_enabled():
+    from views import diagnostics
+
+    with st.sidebar:
+        diagnostics.show_debug_panel(RERUN)
@@ -0,0 +1,108 @@
+"""
+比較兩種財務資料載入方式的耗時與 API 用量：
+  threaded : 舊版 6 執行緒，每頁 worksheet() + get_all_records()
+  batch    : 一次 metadata + 一次 values_batch_get
+
+用法：python bench/bench_batch_get.py [--repeat 5]
+(需要與 LifeAdventure.py 相同的 credentials.json)
+"""
+
+import argparse
+import concurrent.futures
+import os
+import statistics
+import sys
+import time
+
+import gspread
+import pandas as pd
+from oauth2client.service_account import ServiceAccountCredentials
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from services.storage import GSpreadBackend
+
+SHEET_NAMES = [
+    "Finance",
+    "FixedExpenses",
+    "Income",
+    "Budget",
+    "ReserveFund",
+    "QuestBoard",
+]
+
+
+def open_spreadsheet():
+    scope = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive",
+    ]
+    creds = ServiceAccountCredentials.from_json_keyfile_name(
+        "credentials.json", scope
+    )
+    return gspread.authorize(creds).open("LifeAdventure")
+
+
+def count_requests(http_client):
+    """把 HTTPClient.request 換成會記錄次數的版本，回傳紀錄用的 list。"""
+    calls = []
+    original = http_client.request
+
+    def request(method, endpoint, *args, **kwargs):
+        calls.append((method, endpoint))
+        return original(method, endpoint, *args, **kwargs)
+
+    http_client.request = request
+    return calls
+
+
+def load_threaded(sh, worksheets):
+    def fetch_one(name):
+        if name not in worksheets:
+            worksheets[name] = sh.worksheet(name)
+        return name, pd.DataFrame(worksheets[name].get_all_records())
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+        return dict(executor.map(fetch_one, SHEET_NAMES))
+
+
+def load_batch(backend):
+    return backend.read_frames(SHEET_NAMES)
+
+
+def measure(label, fn, calls, repeat):
+    times = []
+    counts = []
+    for _ in range(repeat):
+        before = len(calls)
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        counts.append(len(calls) - before)
+    print(
+        f"{label:<16} 中位數 {statistics.median(times) * 1000:8.1f} ms"
+        f"   最慢 {max(times) * 1000:8.1f} ms"
+        f"   API 呼叫 {counts[0]} (首次) / {counts[-1]} (之後)"
+    )
+    return times, counts
+
+
+def run(sh, calls, repeat):
+    # 每次重新建立快取，首輪包含分頁 metadata 查詢
+    worksheets = {}
+    backend = GSpreadBackend(lambda: sh)
+    measure(
+        "threaded", lambda: load_threaded(sh, worksheets), calls, repeat
+    )
+    measure("batch_get", lambda: load_batch(backend), calls, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sh = open_spreadsheet()
+    calls = count_requests(sh.client)
+    run(sh, calls, args.repeat)
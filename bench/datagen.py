@@ -0,0 +1,219 @@
+"""
+合成資料：產生與 get_all_values() 相同格式 (含表頭、全部是字串) 的分頁。
+
+Finance 的列數為 rows，其他分頁依一般使用比例縮放：
+  Income / QuestBoard : rows / 10     ReserveFund : rows / 20
+  Adventures          : rows / 50     FixedExpenses : rows / 1000 (10~200)
+  Budget / Setting    : 固定
+同一個 seed 產生的內容 (包含 _id) 完全相同，可以重現。
+
+用法：python bench/datagen.py [--rows 1000] [--out workbook.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from services.storage import DEFAULT_HEADERS
+
+ITEMS = ["早餐", "午餐", "晚餐", "咖啡", "捷運", "計程車", "超市", "電影"]
+TYPE1 = ["飲食", "交通", "娛樂", "固定開銷", "其他"]
+TYPE2 = ["早餐", "午餐", "晚餐", "捷運", "計程車", "房租", "訂閱"]
+INCOME_TYPES = ["薪資", "獎金", "投資", "兼職", "其他"]
+FIXED_TYPES = ["訂閱", "房租", "保險", "分期付款", "孝親費", "網路費"]
+CYCLES = ["每月", "每月", "每月", "每年", "每半年"]
+QUEST_TYPES = ["工作", "採購", "禪行", "其他"]
+QUEST_STATUS = ["待接取", "進行中", "已完成"]
+ADVENTURE_STATUS = ["進行中", "暫停", "完成"]
+
+SHEETS = [
+    "Finance",
+    "Income",
+    "FixedExpenses",
+    "Budget",
+    "ReserveFund",
+    "QuestBoard",
+    "Adventures",
+    "Setting",
+]
+
+
+def _row_id(rnd):
+    # 與 services.row_ids.new_id() 相同格式，但由 seed 決定
+    return f"r{rnd.getrandbits(48):012x}"
+
+
+def _date(rnd, today, days=3650):
+    return today - datetime.timedelta(days=rnd.randint(0, days))
+
+
+def _money(rnd, low, high):
+    # 試算表預設的數字格式會加上千分位
+    return f"{rnd.randint(low, high):,}"
+
+
+def ledger_values(rows, seed=1):
+    """Finance 分頁 (含表頭)。"""
+    rnd = random.Random(seed)
+    today = datetime.date.today()
+    items = ITEMS + [f"item{i}" for i in range(500)]
+    values = [DEFAULT_HEADERS["Finance"]]
+    for _ in range(rows):
+        d = _date(rnd, today)
+        values.append(
+            [
+                str(d),
+                str(d.isocalendar()[1]),
+                rnd.choice(items),
+                _money(rnd, 10, 20000),
+                rnd.choice(TYPE1),
+                rnd.choice(TYPE2),
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def income_values(rows, seed=2):
+    rnd = random.Random(seed)
+    today = datetime.date.today()
+    values = [DEFAULT_HEADERS["Income"]]
+    for _ in range(rows):
+        kind = rnd.choice(INCOME_TYPES)
+        values.append(
+            [
+                str(_date(rnd, today)),
+                kind,
+                _money(rnd, 500, 80000),
+                kind,
+                "",
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def fixed_values(rows, seed=3):
+    rnd = random.Random(seed)
+    values = [DEFAULT_HEADERS["FixedExpenses"]]
+    for i in range(rows):
+        cycle = rnd.choice(CYCLES)
+        values.append(
+            [
+                f"fixed{i}",
+                rnd.choice(FIXED_TYPES),
+                _money(rnd, 100, 30000),
+                rnd.choice(["現金", "信用卡"]),
+                cycle,
+                "年繳" if cycle == "每年" else f"{rnd.randint(1, 28)}號",
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def budget_values(seed=4):
+    rnd = random.Random(seed)
+    values = [DEFAULT_HEADERS["Budget"]]
+    for item in TYPE1 + ["預備金"]:
+        values.append([item, _money(rnd, 1000, 20000), _row_id(rnd)])
+    return values
+
+
+def reserve_values(rows, seed=5):
+    rnd = random.Random(seed)
+    today = datetime.date.today()
+    values = [DEFAULT_HEADERS["ReserveFund"]]
+    for _ in range(rows):
+        values.append(
+            [
+                str(_date(rnd, today)),
+                "取出" if rnd.random() < 0.2 else "存入",
+                _money(rnd, 100, 10000),
+                "",
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def quest_values(rows, seed=6):
+    rnd = random.Random(seed)
+    today = datetime.date.today()
+    values = [DEFAULT_HEADERS["QuestBoard"]]
+    for i in range(rows):
+        values.append(
+            [
+                f"任務{i}",
+                "內容" * rnd.randint(1, 20),
+                rnd.choice(QUEST_TYPES),
+                rnd.choice(QUEST_STATUS),
+                str(today + datetime.timedelta(days=rnd.randint(-30, 90))),
+                rnd.choice(["無", "100 金幣", "休假一天"]),
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def adventure_values(rows, seed=7):
+    rnd = random.Random(seed)
+    today = datetime.date.today()
+    values = [DEFAULT_HEADERS["Adventures"]]
+    for i in range(rows):
+        values.append(
+            [
+                f"冒險{i}",
+                "描述" * rnd.randint(1, 30),
+                rnd.choice(ADVENTURE_STATUS),
+                str(_date(rnd, today, 1000)),
+                "",
+                rnd.choice(["Continuous", "Instance"]),
+                _row_id(rnd),
+            ]
+        )
+    return values
+
+
+def setting_values():
+    return [
+        DEFAULT_HEADERS["Setting"],
+        ["LifeGoal", "自由"],
+        ["Location", "Taipei,TW"],
+    ]
+
+
+def workbook(rows, seed=1):
+    """{分頁名稱: values}，Finance 為 rows 列，其他分頁依比例縮放。"""
+    return {
+        "Finance": ledger_values(rows, seed),
+        "Income": income_values(max(1, rows // 10), seed + 1),
+        "FixedExpenses": fixed_values(
+            min(200, max(10, rows // 1000)), seed + 2
+        ),
+        "Budget": budget_values(seed + 3),
+        "ReserveFund": reserve_values(max(1, rows // 20), seed + 4),
+        "QuestBoard": quest_values(max(1, rows // 10), seed + 5),
+        "Adventures": adventure_values(max(1, rows // 50), seed + 6),
+        "Setting": setting_values(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="workbook.json")
+    args = parser.parse_args()
+
+    book = workbook(args.rows, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(book, f, ensure_ascii=False)
+    for name, values in book.items():
+        print(f"{name:<14} {len(values) - 1:>9} 列")
@@ -0,0 +1,316 @@
+"""
+記憶體裡的假 Google Sheets：介面與 gspread 的 Spreadsheet / Worksheet 相同
+(只實作本程式會用到的部分)，每個「API 請求」都會計數並等待 latency 秒。
+
+    sh = FakeSpreadsheet(datagen.workbook(1000), latency=0.05)
+    backend = GSpreadBackend(lambda: sh)
+
+讀取回傳與 Values API 相同的格式：全部是字串，列尾的空白儲存格省略。
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import numericise_all
+
+from services.storage import Cell, a1_to_rowcol
+
+_SHEET_RANGE = re.compile(r"^(?:'((?:[^']|'')*)'|([^!]*))!(.*)$")
+
+
+def split_range(text):
+    """ "'Finance'!A1:G" -> ("Finance", "A1:G")；沒有分頁名稱時整段當作名稱。"""
+    m = _SHEET_RANGE.match(text)
+    if not m:
+        # 只有分頁名稱 (append 時 gspread 送的是 'Finance')
+        if text.startswith("'") and text.endswith("'"):
+            return text[1:-1].replace("''", "'"), ""
+        return text, ""
+    return (m.group(1) or "").replace("''", "'") or m.group(2), m.group(3)
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def _trim(rows):
+    out = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        out.append(row)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+def _user_entered(cell):
+    value = cell.get("userEnteredValue", {})
+    for key in ("stringValue", "numberValue", "boolValue"):
+        if key in value:
+            return _cell_text(value[key])
+    return ""
+
+
+class FakeSpreadsheet:
+    def __init__(self, book, latency=0.0, title="LifeAdventure"):
+        """book: {分頁名稱: [header, row, ...]} (例如 datagen.workbook())"""
+        self.title = title
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._sheets = {}
+        for sheet_id, (name, values) in enumerate(book.items()):
+            self._sheets[name] = FakeWorksheet(self, sheet_id, name, values)
+
+    # --- API 計數 ---
+    def _request(self, kind, method):
+        with self._lock:
+            self.calls[kind] += 1
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def requests(self, kind=None):
+        with self._lock:
+            if kind:
+                return self.calls[kind]
+            return self.calls["read"] + self.calls["write"]
+
+    # --- gspread.Spreadsheet ---
+    def worksheets(self):
+        self._request("read", "fetch_sheet_metadata")
+        return list(self._sheets.values())
+
+    def worksheet(self, title):
+        self._request("read", "fetch_sheet_metadata")
+        if title not in self._sheets:
+            raise WorksheetNotFound(title)
+        return self._sheets[title]
+
+    def _by_id(self, sheet_id):
+        for ws in self._sheets.values():
+            if ws.id == sheet_id:
+                return ws
+        raise KeyError(sheet_id)
+
+    def values_batch_get(self, ranges, params=None):
+        self._request("read", "values_batch_get")
+        value_ranges = []
+        for text in ranges:
+            name, a1 = split_range(text)
+            ws = self._sheets.get(name)
+            entry = {"range": text, "majorDimension": "ROWS"}
+            values = ws._read(a1) if ws else []
+            if values:
+                entry["values"] = values
+            value_ranges.append(entry)
+        return {"valueRanges": value_ranges}
+
+    def batch_update(self, body):
+        self._request("write", "batch_update")
+        for request in body.get("requests", []):
+            if "updateCells" in request:
+                req = request["updateCells"]
+                start = req["start"]
+                ws = self._by_id(start["sheetId"])
+                for offset, row in enumerate(req["rows"]):
+                    ws._write_row(
+                        start["rowIndex"] + offset + 1,
+                        start.get("columnIndex", 0) + 1,
+                        [_user_entered(c) for c in row.get("values", [])],
+                    )
+            elif "deleteDimension" in request:
+                rng = request["deleteDimension"]["range"]
+                ws = self._by_id(rng["sheetId"])
+                ws._delete(rng["startIndex"] + 1, rng["endIndex"])
+            elif "updateSheetProperties" in request:
+                props = request["updateSheetProperties"]["properties"]
+                ws = self._by_id(props["sheetId"])
+                grid = props.get("gridProperties", {})
+                ws._cols = grid.get("columnCount", ws._cols)
+            else:
+                raise NotImplementedError(list(request))
+        return {"replies": []}
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title, values):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self._values = [[_cell_text(v) for v in row] for row in values]
+        self._cols = max((len(r) for r in self._values), default=0)
+        self._lock = threading.Lock()
+
+    @property
+    def row_count(self):
+        return len(self._values)
+
+    @property
+    def col_count(self):
+        return self._cols
+
+    # --- 內部操作 (不計數) ---
+    def _grid(self, a1):
+        """A1 範圍 -> (起列, 起欄, 迄列, 迄欄)，皆為 1 起算且包含。"""
+        if not a1:
+            return (1, 1, len(self._values), self._cols)
+        start, _, end = a1.partition(":")
+        r1, c1 = a1_to_rowcol(start)
+        r2, c2 = a1_to_rowcol(end) if end else (r1, c1)
+        return (r1 or 1, c1 or 1, r2 or len(self._values), c2 or self._cols)
+
+    def _read(self, a1):
+        r1, c1, r2, c2 = self._grid(a1)
+        with self._lock:
+            rows = [row[c1 - 1 : c2] for row in self._values[r1 - 1 : r2]]
+        return _trim(rows)
+
+    def _write_row(self, row, col, cells):
+        with self._lock:
+            while len(self._values) < row:
+                self._values.append([])
+            target = self._values[row - 1]
+            end = col - 1 + len(cells)
+            if len(target) < end:
+                target.extend([""] * (end - len(target)))
+            target[col - 1 : end] = cells
+            self._cols = max(self._cols, end)
+
+    def _delete(self, start, end):
+        with self._lock:
+            del self._values[start - 1 : end]
+
+    def _request(self, kind, method):
+        self.spreadsheet._request(kind, method)
+
+    # --- 讀取 ---
+    def get_all_values(self, **kwargs):
+        self._request("read", "get_all_values")
+        return self._read(None)
+
+    def get_all_records(self, **kwargs):
+        self._request("read", "get_all_records")
+        values = self._read(None)
+        if not values:
+            return []
+        header = values[0]
+        return [
+            dict(
+                zip(
+                    header,
+                    numericise_all(row + [""] * (len(header) - len(row))),
+                )
+            )
+            for row in values[1:]
+        ]
+
+    def get(self, range_name=None, **kwargs):
+        self._request("read", "get")
+        return self._read(range_name)
+
+    def row_values(self, row, **kwargs):
+        self._request("read", "row_values")
+        rows = self._read(f"A{row}:{row}")
+        return rows[0] if rows else []
+
+    def col_values(self, col, **kwargs):
+        self._request("read", "col_values")
+        with self._lock:
+            cells = [r[col - 1] if len(r) >= col else "" for r in self._values]
+        while cells and cells[-1] == "":
+            cells.pop()
+        return cells
+
+    def find(self, query, in_row=None, in_column=None, case_sensitive=True):
+        # gspread 的 find 也是先整張讀回再搜尋
+        self._request("read", "find")
+        with self._lock:
+            for r, row in enumerate(self._values, start=1):
+                if in_row and r != in_row:
+                    continue
+                for c, value in enumerate(row, start=1):
+                    if in_column and c != in_column:
+                        continue
+                    same = (
+                        value == query
+                        if case_sensitive
+                        else value.lower() == str(query).lower()
+                    )
+                    if same:
+                        return Cell(r, c, value)
+        return None
+
+    # --- 寫入 ---
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self._request("write", "append_rows")
+        self._append(values)
+
+    def _append(self, values):
+        # 接在最後一列有資料的列之後 (與 Values API 的 append 相同)
+        with self._lock:
+            last = len(_trim(self._values))
+            del self._values[last:]
+        for offset, row in enumerate(values):
+            self._write_row(last + offset + 1, 1, [_cell_text(v) for v in row])
+
+    def insert_row(self, values, index=1, **kwargs):
+        self.insert_rows([values], index)
+
+    def insert_rows(self, values, row=1, **kwargs):
+        self._request("write", "insert_rows")
+        with self._lock:
+            self._values[row - 1 : row - 1] = [
+                [_cell_text(v) for v in r] for r in values
+            ]
+
+    def update_cell(self, row, col, value):
+        self._request("write", "update_cell")
+        self._write_row(row, col, [_cell_text(value)])
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # 相容舊的 update(range_name, values) 參數順序
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values
+        self._request("write", "update")
+        self._update(range_name, values)
+
+    def batch_update(self, data, **kwargs):
+        self._request("write", "batch_update")
+        for entry in data:
+            self._update(entry["range"], entry["values"])
+
+    def _update(self, range_name, values):
+        r1, c1, _, _ = self._grid(range_name)
+        for offset, row in enumerate(values):
+            self._write_row(r1 + offset, c1, [_cell_text(v) for v in row])
+
+    def delete_rows(self, start_index, end_index=None):
+        self._request("write", "delete_rows")
+        self._delete(start_index, end_index or start_index)
+
+    def add_cols(self, cols):
+        self._request("write", "add_cols")
+        with self._lock:
+            self._cols += cols
+
+    def clear(self):
+        self._request("write", "clear")
+        with self._lock:
+            self._values = []
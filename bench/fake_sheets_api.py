@@ -0,0 +1,150 @@
+"""
+HTTP 層的假 Google Sheets：取代 gspread HTTPClient 底下的 requests session，
+把 Sheets / Drive REST 請求轉給 bench/fake_gspread.py 的 FakeSpreadsheet。
+用來在沒有憑證、不連網路的情況下錄製 cassette (見 bench/replay.py)：
+
+    sh = FakeSpreadsheet(datagen.workbook(200))
+    client = gspread.Client(None, session=FakeSheetsSession(sh))
+
+只實作本程式用到的端點；其他端點回傳 404。
+"""
+
+import json
+import re
+from urllib.parse import unquote
+
+from bench.fake_gspread import split_range
+
+SHEETS_URL = "https://sheets.googleapis.com/v4/spreadsheets/"
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+SPREADSHEET_ID = "fake-spreadsheet"
+
+_VALUES = re.compile(r"^([^/:]+)/values/([^:]+)(?::(\w+))?$")
+
+
+def _response(method, url, status, payload):
+    import requests
+
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "OK" if status < 400 else "Error"
+    response._content = json.dumps(payload, ensure_ascii=False).encode()
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json; charset=UTF-8"
+    response.request = requests.Request(method, url).prepare()
+    response.url = url
+    return response
+
+
+def _error(code, message):
+    return code, {"error": {"code": code, "message": message}}
+
+
+class FakeSheetsSession:
+    def __init__(self, spreadsheet):
+        self.sh = spreadsheet
+        self.headers = {}
+
+    def close(self):
+        pass
+
+    def request(
+        self, method, url, params=None, json=None, data=None, **kwargs
+    ):
+        status, payload = self._route(
+            method.upper(), url, params or {}, json or {}
+        )
+        return _response(method, url, status, payload)
+
+    # --- 路由 ---
+    def _route(self, method, url, params, body):
+        if url == DRIVE_FILES_URL and method == "GET":
+            self.sh._request("read", "list_spreadsheet_files")
+            return 200, {
+                "files": [
+                    {
+                        "id": SPREADSHEET_ID,
+                        "name": self.sh.title,
+                        "createdTime": "2024-01-01T00:00:00.000Z",
+                        "modifiedTime": "2024-01-01T00:00:00.000Z",
+                    }
+                ]
+            }
+        if not url.startswith(SHEETS_URL + SPREADSHEET_ID):
+            return _error(404, f"not found: {url}")
+        path = url[len(SHEETS_URL) :]
+
+        if path == SPREADSHEET_ID and method == "GET":
+            self.sh._request("read", "fetch_sheet_metadata")
+            return 200, self._metadata()
+        if path == f"{SPREADSHEET_ID}:batchUpdate" and method == "POST":
+            return 200, self.sh.batch_update(body)
+        if path == f"{SPREADSHEET_ID}/values:batchGet" and method == "GET":
+            ranges = params.get("ranges", [])
+            if isinstance(ranges, str):
+                ranges = [ranges]
+            return 200, self.sh.values_batch_get(ranges)
+        if path == f"{SPREADSHEET_ID}/values:batchUpdate" and method == "POST":
+            self.sh._request("write", "values_batch_update")
+            for entry in body.get("data", []):
+                ws, a1 = self._sheet(entry["range"])
+                if ws is None:
+                    return _error(400, f"Unable to parse range: {entry}")
+                ws._update(a1, entry["values"])
+            return 200, {"responses": []}
+
+        m = _VALUES.match(path)
+        if m:
+            ws, a1 = self._sheet(unquote(m.group(2)))
+            if ws is None:
+                return _error(400, f"Unable to parse range: {m.group(2)}")
+            action = m.group(3)
+            if action is None and method == "GET":
+                self.sh._request("read", "values_get")
+                values = ws._read(a1)
+                out = {"range": unquote(m.group(2)), "majorDimension": "ROWS"}
+                if values:
+                    out["values"] = values
+                return 200, out
+            if action is None and method == "PUT":
+                self.sh._request("write", "values_update")
+                ws._update(a1, body.get("values", []))
+                return 200, {"updatedRange": unquote(m.group(2))}
+            if action == "append" and method == "POST":
+                self.sh._request("write", "values_append")
+                ws._append(body.get("values", []))
+                return 200, {"updates": {"updatedRows": len(body["values"])}}
+            if action == "clear" and method == "POST":
+                self.sh._request("write", "values_clear")
+                ws._update(a1, [])
+                return 200, {}
+        return _error(404, f"not implemented: {method} {path}")
+
+    def _sheet(self, text):
+        name, a1 = split_range(text)
+        return self.sh._sheets.get(name), a1
+
+    def _metadata(self):
+        return {
+            "spreadsheetId": SPREADSHEET_ID,
+            "properties": {
+                "title": self.sh.title,
+                "locale": "zh_TW",
+                "timeZone": "Asia/Taipei",
+            },
+            "sheets": [
+                {
+                    "properties": {
+                        "sheetId": ws.id,
+                        "title": ws.title,
+                        "index": index,
+                        "sheetType": "GRID",
+                        "gridProperties": {
+                            "rowCount": max(ws.row_count, 1000),
+                            "columnCount": ws.col_count,
+                        },
+                    }
+                }
+                for index, ws in enumerate(self.sh._sheets.values())
+            ],
+        }
@@ -0,0 +1,53 @@
+"""
+比較大帳本在快取中的記憶體用量：
+  object : get_all_records() 直接轉 DataFrame (每欄都是 Python 物件)
+  str    : 同上，但使用目前 pandas 預設的字串型別
+  typed  : services.schema.apply_schema 之後 (快取實際存的格式)
+
+typed 比 object 省不到 --target 倍 (預設 5) 就以 exit code 1 結束。
+
+用法：python bench/memory.py [--rows 200000] [--target 5]
+"""
+
+import argparse
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from bench.datagen import ledger_values
+from services.memory import format_bytes, frame_bytes
+from services.schema import apply_schema
+from services.storage import values_to_frame
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--target", type=float, default=5.0)
+    args = parser.parse_args()
+
+    values = ledger_values(args.rows)
+    raw = values_to_frame(values)
+    results = {
+        "object": frame_bytes(raw.astype(object)),
+        "str": frame_bytes(raw),
+        "typed": frame_bytes(apply_schema("Finance", raw)),
+    }
+    for name, size in results.items():
+        ratio = results["object"] / size
+        print(
+            f"{name:>7}: {format_bytes(size):>10}"
+            f"  ({size / args.rows:6.1f} B/列, object 的 1/{ratio:.1f})"
+        )
+
+    ratio = results["object"] / results["typed"]
+    if ratio < args.target:
+        print(f"FAIL: 只省了 {ratio:.1f} 倍 (目標 {args.target:.0f} 倍)")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
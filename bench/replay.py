@@ -0,0 +1,245 @@
+"""
+錄製/重播 Google Sheets 請求，檢查每個使用者動作花了幾個 API 請求。
+
+  (預設)         重播 cassette：不連網路、不需要憑證，各動作的請求數
+                 超過錄製時的數字 (或遇到沒錄到的請求) 就以 exit code 1 結束
+  --record       連到真的試算表 (需要 credentials.json) 錄製新的 cassette
+                 注意：會真的寫入 (固定開銷入帳、修改/刪除一筆支出、接取任務)，
+                 請用測試用的試算表
+  --record-fake  用 bench/fake_sheets_api.py 的假 Sheets API 錄製 (合成資料)
+
+動作 (AppTest 對 app.py 依序操作)：
+  open_home     第一次開啟「我的小屋」(含背景預熱)
+  open_finance  切到「商會」
+  bulk_fixed    「🏛️ 固定」頁按「⚡ 全部寫入支出記帳」，並送出延遲寫入佇列
+  editor_save   支出編輯器「💾 確認修改」的寫入 (改一筆、刪一筆)；
+                AppTest 無法操作 data_editor，這裡直接呼叫同一個 apply_sheet_edits
+  take_quest    「任務看板」按「🖐️ 接取」
+
+錄製時各動作的請求數寫進 <cassette>.counts.json，重播以它為預算。
+
+用法：python bench/replay.py [--cassette bench/cassettes/actions.jsonl]
+                             [--record | --record-fake [--rows 200]]
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_CASSETTE = os.path.join(ROOT, "bench", "cassettes", "actions.jsonl")
+
+
+def counts_path(cassette):
+    return os.path.splitext(cassette)[0] + ".counts.json"
+
+
+def app_step(step):
+    """在 AppTest 的腳本執行緒裡執行 (才讀得到 secrets)。"""
+    import utils
+    from services.row_ids import ID_COLUMN
+
+    if step == "flush":
+        utils.get_write_queue().flush()
+    elif step == "editor_save":
+        # 與 handle_data_editor 存檔相同：第一筆改金額、第二筆刪除
+        # (剛入帳的列每次 _id 不同，重播時對不上，所以用合成資料原有的列)
+        df = utils.load_sheet_data("Finance")
+        row = df.iloc[0]
+        utils.apply_sheet_edits(
+            "Finance",
+            {row[ID_COLUMN]: {"Price": int(row["Price"]) + 1}},
+            [df[ID_COLUMN].iloc[1]],
+        )
+
+
+class Session:
+    """依序執行各動作，記下每個動作之間多了幾個請求。"""
+
+    def __init__(self, storage, counter):
+        from streamlit.testing.v1 import AppTest
+
+        self.storage = storage
+        self.counter = counter
+        self.at = AppTest.from_file(
+            os.path.join(ROOT, "app.py"), default_timeout=120
+        )
+        self.at.secrets["storage"] = storage
+        self.counts = {}
+        self.errors = {}
+
+    def step(self, name):
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_function(app_step, args=(name,), default_timeout=120)
+        at.secrets["storage"] = self.storage
+        at.run()
+        self._check(at, name)
+
+    def _check(self, at, action):
+        errors = [e.value for e in at.exception]
+        errors += [e.value for e in at.error]
+        if errors:
+            self.errors.setdefault(action, []).extend(errors)
+
+    def action(self, name, fn):
+        # 第一個動作之前 client 還沒建立 (建立時才讀得到 secrets)
+        before = self.counter() if self.counts else 0
+        fn()
+        self._check(self.at, name)
+        self.counts[name] = self.counter() - before
+        return self.counts[name]
+
+    def run_all(self):
+        import utils
+
+        at = self.at
+
+        def open_home():
+            at.run()
+            utils.start_cache_warmer().ready.wait(60)
+
+        def bulk_fixed():
+            at.radio(key="fin_nav").set_value("🏛️ 固定").run()
+            buttons = [b for b in at.button if "全部寫入支出記帳" in b.label]
+            if not buttons:
+                self.errors["bulk_fixed"] = ["本月固定開銷都已入帳，沒有按鈕"]
+                return
+            buttons[0].click().run()
+            self.step("flush")
+
+        def take_quest():
+            at.sidebar.radio[0].set_value("任務看板").run()
+            take = [b for b in at.button if (b.key or "").startswith("take_")]
+            take[0].click().run()
+
+        self.action("open_home", open_home)
+        self.action(
+            "open_finance", lambda: at.sidebar.radio[0].set_value("商會").run()
+        )
+        self.action("bulk_fixed", bulk_fixed)
+        self.action("editor_save", lambda: self.step("editor_save"))
+        self.action("take_quest", take_quest)
+        return self.counts
+
+
+def storage_config(workdir, cassette=None, mode=None):
+    # 背景核對關閉、預熱只跑一次、延遲寫入只在 flush 時送出，數字才穩定
+    conf = {
+        "journal": os.path.join(workdir, "writebehind.db"),
+        "verify_every": 0,
+        "warm_every": 3600,
+        "flush_interval": 3600,
+        "flush_threshold": 100000,
+        "write_wait": 60,
+    }
+    if cassette:
+        conf["cassette"] = cassette
+        conf["cassette_mode"] = mode
+    return conf
+
+
+def client_session():
+    import utils
+
+    return utils.get_client().http_client.session
+
+
+def record_fake(cassette, rows, workdir):
+    import gspread
+
+    import utils
+    from bench.datagen import workbook
+    from bench.fake_gspread import FakeSpreadsheet
+    from bench.fake_sheets_api import FakeSheetsSession
+    from services.cassette import RecordingSession
+    from services.instrument import recorder
+
+    sh = FakeSpreadsheet(workbook(rows))
+
+    # 與 utils.get_client 相同，只是 session 換成假的 Sheets API
+    @functools.cache
+    def fake_client():
+        session = RecordingSession(FakeSheetsSession(sh), cassette)
+        client = gspread.Client(None, session=session)
+        recorder.trace_http(client.http_client)
+        utils.get_scheduler().wrap(client.http_client)
+        return client
+
+    utils.get_client = fake_client
+    session = Session(storage_config(workdir), lambda: client_session().count)
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true")
+    mode.add_argument("--record-fake", action="store_true")
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args()
+
+    cassette = os.path.abspath(args.cassette)
+    workdir = tempfile.mkdtemp(prefix="la-replay-")
+    recording = args.record or args.record_fake
+    if recording:
+        os.makedirs(os.path.dirname(cassette), exist_ok=True)
+    elif not os.path.exists(cassette):
+        print(f"找不到 {cassette}，請先用 --record 或 --record-fake 錄製")
+        sys.exit(2)
+
+    if args.record_fake:
+        session = record_fake(cassette, args.rows, workdir)
+    else:
+        conf = storage_config(
+            workdir, cassette, "record" if args.record else "replay"
+        )
+        session = Session(conf, lambda: client_session().count)
+    counts = session.run_all()
+
+    budget = {}
+    if recording:
+        with open(counts_path(cassette), "w", encoding="utf-8") as f:
+            json.dump(counts, f, ensure_ascii=False, indent=1)
+    else:
+        with open(counts_path(cassette), encoding="utf-8") as f:
+            budget = json.load(f)
+
+    failed = False
+    print(f"{'動作':<14} {'請求數':>6} {'預算':>6}  狀態")
+    for action, n in counts.items():
+        limit = budget.get(action)
+        status = "錄製" if recording else "OK"
+        if limit is not None and n > limit:
+            status = "變多"
+            failed = True
+        if action in session.errors:
+            status = f"錯誤 {session.errors[action]}"
+            failed = failed or not recording
+        print(
+            f"{action:<16} {n:>8} {limit if limit is not None else '-':>8}  {status}"
+        )
+
+    misses = getattr(client_session(), "misses", [])
+    if misses:
+        print(f"沒有錄到的請求 {len(misses)} 個：")
+        for key in misses[:10]:
+            print("  ", key)
+        failed = True
+    if recording:
+        print(f"已寫入 {cassette} 與 {counts_path(cassette)}")
+    elif failed:
+        print("FAIL")
+        sys.exit(1)
+    else:
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
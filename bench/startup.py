@@ -0,0 +1,154 @@
+"""
+冷啟動計時：超過預算就以 exit code 1 結束 (可放進 CI)。
+
+  import : python -X importtime -c "import utils"，解析每個模組的匯入耗時，
+           並檢查慢的套件 (gspread、oauth2client、requests…) 沒有在啟動時被匯入
+  render : 全新的 Python 行程裡用 AppTest 跑第一次 app.py (含匯入 app/views)，
+           後端使用暫存的 SQLite，不需要憑證也不連外網
+
+用法：python bench/startup.py [--repeat 3] [--import-budget 2000]
+                              [--render-budget 4000] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 這些套件只應在真的連線時才匯入
+LAZY_MODULES = [
+    "gspread",
+    "oauth2client",
+    "requests",
+    "google.generativeai",
+]
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=60)
+at.secrets["storage"] = {"backend": "sqlite", "path": sys.argv[1]}
+at.run()
+done = time.perf_counter()
+at.run()
+print(json.dumps({
+    "harness_ms": (ready - start) * 1000,
+    "first_ms": (done - ready) * 1000,
+    "rerun_ms": (time.perf_counter() - done) * 1000,
+    "exceptions": [e.value for e in at.exception],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """回傳 [(模組, self_us, cumulative_us, 深度)]，順序與 importtime 輸出相同。"""
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m:
+            depth = len(m.group(3)) // 2
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), depth))
+    return rows
+
+
+def children(rows, module):
+    """module 直接匯入的模組 (importtime 先印子模組、再印父模組)。"""
+    end = next(i for i, r in enumerate(rows) if r[0] == module and r[3] == 0)
+    out = []
+    for row in reversed(rows[:end]):
+        if row[3] == 0:
+            break
+        if row[3] == 1:
+            out.append(row)
+    return out
+
+
+def import_profile(module="utils"):
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr[-2000:])
+    rows = parse_importtime(res.stderr)
+    total = next(cum for name, _, cum, _ in rows if name == module)
+    loaded = {name for name, _, _, _ in rows}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    return {
+        "total_ms": total / 1000,
+        "children": children(rows, module),
+        "eager": eager,
+    }
+
+
+def first_render():
+    with tempfile.TemporaryDirectory() as tmp:
+        res = subprocess.run(
+            [sys.executable, "-c", RENDER_SCRIPT, os.path.join(tmp, "la.db")],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr[-2000:])
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=2000.0)
+    parser.add_argument("--render-budget", type=float, default=4000.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    imports = [import_profile() for _ in range(args.repeat)]
+    import_ms = statistics.median(p["total_ms"] for p in imports)
+    print(f"import utils : {import_ms:8.1f} ms (median of {args.repeat})")
+    print("  utils 直接匯入的模組 (最慢的在前)：")
+    top = sorted(imports[-1]["children"], key=lambda r: r[2], reverse=True)
+    for name, _, cum, _ in top[: args.top]:
+        print(f"    {cum / 1000:8.1f} ms  {name}")
+
+    renders = [first_render() for _ in range(args.repeat)]
+    render_ms = statistics.median(r["first_ms"] for r in renders)
+    rerun_ms = statistics.median(r["rerun_ms"] for r in renders)
+    print(f"first render : {render_ms:8.1f} ms (median of {args.repeat})")
+    print(f"second rerun : {rerun_ms:8.1f} ms")
+
+    failures = []
+    eager = imports[-1]["eager"]
+    if eager:
+        failures.append(f"啟動時匯入了應延後的套件：{', '.join(eager)}")
+    if import_ms > args.import_budget:
+        failures.append(
+            f"import utils {import_ms:.0f} ms > 預算 {args.import_budget:.0f} ms"
+        )
+    if render_ms > args.render_budget:
+        failures.append(
+            f"first render {render_ms:.0f} ms > 預算 {args.render_budget:.0f} ms"
+        )
+    errors = [e for r in renders for e in r["exceptions"]]
+    if errors:
+        failures.append(f"第一次畫面有例外：{errors[0]}")
+    for msg in failures:
+        print(f"FAIL: {msg}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
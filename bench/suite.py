@@ -0,0 +1,270 @@
+"""
+合成資料效能測試：每個資料量在全新的 Python 行程裡跑下列情境，
+Google Sheets 換成 bench/fake_gspread.py (每個 API 請求等待 --latency 秒)，
+回報耗時、最大 RSS 成長與模擬的 API 請求數，並與 bench/baseline.json 比較。
+
+  load     : load_all_finance_data() 冷啟動 (空快取 → 六個財務分頁)
+  metrics  : 商會總覽的彙總 (services.metrics.month_metrics 第一次計算)
+  home     : AppTest 渲染「我的小屋」
+  finance  : 切到「商會」總覽
+  expense  : 「📝 支出」分頁勾選「檢視全部」(搜尋/排序/分頁 + handle_data_editor)
+  search   : 同上，輸入搜尋關鍵字
+  quest    : 切到「任務看板」
+
+耗時超過基準 × --tolerance (再加 --slack-ms)、或 API 請求數比基準多，
+就列為退步並以 exit code 1 結束。
+
+用法：python bench/suite.py [--rows 1000 10000 100000] [--latency 0.02]
+                            [--tolerance 1.5] [--slack-ms 50]
+                            [--save-baseline] [--baseline bench/baseline.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_ROWS = [1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+RESULT_PREFIX = "RESULT "
+
+# 子行程用的設定：不做背景核對、預熱只跑第一次，寫入日誌放暫存目錄
+SECRETS = """
+[storage]
+journal = "{journal}"
+verify_every = 0
+warm_every = 3600
+write_wait = 30
+"""
+
+
+def max_rss_mb():
+    # Linux 的 ru_maxrss 單位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Runner:
+    """子行程：依序執行各情境並記下結果。"""
+
+    def __init__(self, rows, spreadsheet):
+        self.rows = rows
+        self.sh = spreadsheet
+        self.results = []
+
+    def measure(self, scenario, fn):
+        before = self.sh.snapshot()
+        rss = max_rss_mb()
+        start = time.perf_counter()
+        extra = fn() or {}
+        ms = (time.perf_counter() - start) * 1000
+        after = self.sh.snapshot()
+        result = {
+            "scenario": scenario,
+            "rows": self.rows,
+            "ms": round(ms, 1),
+            "rss_mb": round(max_rss_mb() - rss, 1),
+            "reads": after.get("read", 0) - before.get("read", 0),
+            "writes": after.get("write", 0) - before.get("write", 0),
+            **extra,
+        }
+        self.results.append(result)
+        return result
+
+
+def run_child(rows, latency):
+    workdir = tempfile.mkdtemp(prefix="la-bench-")
+    os.chdir(workdir)
+    os.makedirs(".streamlit")
+    with open(os.path.join(".streamlit", "secrets.toml"), "w") as f:
+        f.write(SECRETS.format(journal=os.path.join(workdir, "wb.db")))
+
+    from bench.datagen import workbook
+    from bench.fake_gspread import FakeSpreadsheet
+
+    sh = FakeSpreadsheet(workbook(rows), latency=latency)
+
+    import utils
+
+    # 試算表換成假的 (其餘 utils 的程式路徑與正式環境相同)
+    def open_fake():
+        return sh
+
+    open_fake.clear = lambda: None
+    utils.get_spreadsheet = open_fake
+
+    from datetime import datetime
+
+    from services.memory import frame_bytes
+    from services.metrics import month_metrics
+    from streamlit.testing.v1 import AppTest
+
+    # 第一次讀 secrets 會裝檔案監看 (約 0.4 秒)，不算進 load
+    utils.get_storage()
+    utils.get_data_store()
+
+    runner = Runner(rows, sh)
+    frames = {}
+
+    def load():
+        frames.update(utils.load_all_finance_data())
+        size = sum(frame_bytes(df) for df in frames.values())
+        return {"frames_mb": round(size / 1024 / 1024, 2)}
+
+    runner.measure("load", load)
+
+    def metrics():
+        month_metrics(frames, datetime.now().strftime("%Y-%m"))
+
+    runner.measure("metrics", metrics)
+
+    # 預熱 (Adventures、Setting) 先完成，頁面情境的 API 數才穩定
+    utils.start_cache_warmer().ready.wait(120)
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    at.secrets["storage"] = {
+        "journal": os.path.join(workdir, "wb.db"),
+        "verify_every": 0,
+        "warm_every": 3600,
+        "write_wait": 30,
+    }
+
+    def page(step):
+        def run():
+            step()
+            errors = [e.value for e in at.exception]
+            if errors:
+                raise RuntimeError(errors)
+
+        return run
+
+    runner.measure("home", page(lambda: at.run()))
+    runner.measure(
+        "finance", page(lambda: at.sidebar.radio[0].set_value("商會").run())
+    )
+    at.radio(key="fin_nav").set_value("📝 支出").run()
+    runner.measure(
+        "expense",
+        page(lambda: at.checkbox(key="show_all_exp").check().run()),
+    )
+    runner.measure(
+        "search",
+        page(lambda: at.text_input(key="expense_search").input("item1").run()),
+    )
+    runner.measure(
+        "quest",
+        page(lambda: at.sidebar.radio[0].set_value("任務看板").run()),
+    )
+    print(RESULT_PREFIX + json.dumps(runner.results))
+
+
+def spawn(rows, latency):
+    """在全新的行程跑一個資料量，回傳結果 list。"""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--child",
+            str(rows),
+            "--latency",
+            str(latency),
+        ],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    sys.stderr.write(proc.stderr[-3000:])
+    raise RuntimeError(f"{rows} 列的子行程失敗 (exit {proc.returncode})")
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """印出結果表，回傳退步的項目。"""
+    base = {(r["scenario"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print(
+        f"{'情境':<8} {'列數':>8} {'耗時 ms':>10} {'(基準)':>10}"
+        f" {'API 讀/寫':>10} {'(基準)':>8} {'RSS MB':>8}  狀態"
+    )
+    for r in results:
+        b = base.get((r["scenario"], r["rows"]))
+        status = "新" if b is None else "OK"
+        if b is not None:
+            slower = r["ms"] > b["ms"] * tolerance + slack_ms
+            more_api = r["reads"] + r["writes"] > b["reads"] + b["writes"]
+            status = "/".join(
+                label
+                for label, bad in (("變慢", slower), ("API 變多", more_api))
+                if bad
+            )
+            if status:
+                regressions.append((r, b, status))
+            status = status or "OK"
+        base_ms = f"{b['ms']:.1f}" if b else "-"
+        base_api = f"{b['reads']}/{b['writes']}" if b else "-"
+        api = f"{r['reads']}/{r['writes']}"
+        print(
+            f"{r['scenario']:<10} {r['rows']:>10} {r['ms']:>12.1f}"
+            f" {base_ms:>12} {api:>13} {base_api:>10}"
+            f" {r['rss_mb']:>10.1f}  {status}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--slack-ms", type=float, default=50.0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.latency)
+        return
+
+    results = []
+    for rows in args.rows:
+        print(f"... {rows} 列", flush=True)
+        results.extend(spawn(rows, args.latency))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("latency") != args.latency:
+            print(
+                f"注意：基準的 latency 是 {baseline.get('latency')}，"
+                f"這次是 {args.latency}"
+            )
+    regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {"latency": args.latency, "results": results},
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        print(f"已寫入基準 {args.baseline}")
+    elif regressions:
+        print(f"FAIL: {len(regressions)} 項退步")
+        sys.exit(1)
+    else:
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+本機的 OpenWeatherMap 替身，測試天氣快取時不必連外網、也不耗 API 額度。
+
+用法：python bench/weather_stub.py [--port 8765] [--delay 0] [--fail]
+  --delay : 每個請求延遲幾秒回應 (模擬 API 很慢)
+  --fail  : 一律回傳 503 (模擬 API 掛掉)
+再把 .streamlit/secrets.toml 的 [weather] base_url 指向
+http://127.0.0.1:8765/data/2.5/weather
+
+程式內也可以直接使用：
+    server = start_stub(delay=2)   # 背景執行，回傳 server
+    server.url                     # 可當作 base_url
+    server.hits                    # 收到的請求數
+    server.shutdown()
+"""
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PATH = "/data/2.5/weather"
+
+
+def fake_temp(city):
+    # 同一個城市固定回傳同一個溫度，方便比對
+    return 10 + zlib.crc32(city.encode("utf-8")) % 200 / 10
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        url = urlparse(self.path)
+        if server.delay:
+            time.sleep(server.delay)
+        if url.path != PATH:
+            self._reply(404, {"cod": "404", "message": "not found"})
+            return
+        if server.fail:
+            self._reply(503, {"cod": "503", "message": "stub failure"})
+            return
+        city = parse_qs(url.query).get("q", ["Taipei,TW"])[0]
+        self._reply(
+            200,
+            {
+                "name": city.split(",")[0],
+                "main": {"temp": fake_temp(city)},
+                "weather": [{"description": "晴"}],
+            },
+        )
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=0, delay=0.0, fail=False):
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.hits = 0
+    server.delay = delay
+    server.fail = fail
+    server.url = f"http://127.0.0.1:{server.server_address[1]}{PATH}"
+    return server
+
+
+def start_stub(port=0, delay=0.0, fail=False):
+    server = make_server(port, delay, fail)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--fail", action="store_true")
+    args = parser.parse_args()
+    server = make_server(args.port, args.delay, args.fail)
+    print(f"weather stub: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
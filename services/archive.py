@@ -0,0 +1,287 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from services.ledger_index import get_month_index
+from services.row_ids import ID_COLUMN, MIGRATE_HINT
+from services.schema import apply_schema
+from services.storage import DEFAULT_HEADERS, to_cell_value, values_to_frame
+
+# --- 舊年度封存 (冷資料) ---
+# Finance / Income 只會一直變長，但畫面大多只看本月。已結束的年度搬到
+# 年度封存 (同一份試算表的 Finance_2023 分頁，或本機的
+# archive/Finance/2023.parquet)，原分頁只留近期資料，每次同步的成本固定。
+# ArchiveSummary 分頁留下每月、每個分類的筆數與金額，同時也是封存目錄
+# (有哪些年度)；查詢的日期範圍涵蓋到封存年度時才去讀封存。
+# 搬移順序：先寫封存 (以 _id 去重)、重算摘要、最後才從原分頁刪除，
+# 中途失敗重跑也不會少資料或重複。
+
+SUMMARY_SHEET = "ArchiveSummary"
+# 可封存的分頁: (金額欄, 分類欄)
+ARCHIVE_SHEETS = {
+    "Finance": ("Price", "Type1"),
+    "Income": ("Amount", "Type"),
+}
+
+
+def _years(dates):
+    """日期字串/值 -> 年 (無法解析為 NA)。"""
+    return pd.to_datetime(pd.Series(dates), errors="coerce").dt.year
+
+
+class SheetArchive:
+    """封存到同一份試算表的年度分頁 (Finance_2023)。"""
+
+    name = "sheet"
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def title(sheet, year):
+        return f"{sheet}_{year}"
+
+    def read_frame(self, sheet, year):
+        return values_to_frame(self.backend.read_all(self.title(sheet, year)))
+
+    def write(self, sheet, year, header, rows):
+        """加入還不在封存裡的列 (以 _id 比對)，回傳實際加入的筆數。"""
+        title = self.title(sheet, year)
+        existing = self.backend.read_all(title)
+        if not existing:
+            self.backend.create_sheet(title, header)
+        rows = _not_archived(existing, header, rows)
+        if rows:
+            self.backend.ensure_width(title, len(header))
+            self.backend.append_rows(title, rows)
+        return len(rows)
+
+
+class ParquetArchive:
+    """封存到本機 Parquet 檔 (需要 pyarrow)：<目錄>/<分頁>/<年>.parquet"""
+
+    name = "parquet"
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, sheet, year):
+        return os.path.join(self.directory, sheet, f"{year}.parquet")
+
+    def read_frame(self, sheet, year):
+        path = self.path(sheet, year)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path)
+
+    def write(self, sheet, year, header, rows):
+        path = self.path(sheet, year)
+        old = self.read_frame(sheet, year)
+        existing = (
+            [list(old.columns)] + old.values.tolist() if len(old) else []
+        )
+        rows = _not_archived(existing, header, rows)
+        if not rows:
+            return 0
+        width = len(header)
+        new = pd.DataFrame(
+            [
+                [
+                    str(to_cell_value(v))
+                    for v in (list(r) + [""] * width)[:width]
+                ]
+                for r in rows
+            ],
+            columns=header,
+        )
+        df = pd.concat([old, new], ignore_index=True) if len(old) else new
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先寫暫存檔再換名，中途中斷不會留下壞掉的檔案
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        return len(rows)
+
+
+def _not_archived(existing, header, rows):
+    if not existing or ID_COLUMN not in existing[0]:
+        return rows
+    col = list(existing[0]).index(ID_COLUMN)
+    seen = {str(r[col]) for r in existing[1:] if len(r) > col}
+    pos = list(header).index(ID_COLUMN)
+    return [r for r in rows if len(r) <= pos or str(r[pos]) not in seen]
+
+
+def _number(value):
+    # 金額有小數時照原值，不截成整數
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def summarize(sheet, df):
+    """已轉型的資料 -> 摘要列 [Sheet, Month, Category, Rows, Total]。"""
+    amount_col, cat_col = ARCHIVE_SHEETS[sheet]
+    if df.empty or "Date" not in df.columns:
+        return []
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    keep = dates.notna()
+    grouped = (
+        pd.DataFrame(
+            {
+                "Month": dates[keep].dt.strftime("%Y-%m"),
+                "Category": df.loc[keep, cat_col].astype(str),
+                "Amount": pd.to_numeric(
+                    df.loc[keep, amount_col], errors="coerce"
+                ).fillna(0),
+            }
+        )
+        .groupby(["Month", "Category"], sort=True)["Amount"]
+        .agg(["size", "sum"])
+    )
+    return [
+        [sheet, month, cat, int(n), _number(total)]
+        for (month, cat), n, total in zip(
+            grouped.index, grouped["size"], grouped["sum"]
+        )
+    ]
+
+
+def archive_sheet(backend, archive, sheet, before_year):
+    """
+    把 sheet 裡 before_year 以前 (不含) 的資料搬到 archive，
+    回傳 {年: 搬走的筆數}。沒有日期的列留在原分頁。
+    """
+    values = backend.read_all(sheet)
+    if len(values) < 2 or "Date" not in values[0]:
+        return {}
+    header = [str(h) for h in values[0]]
+    if ID_COLUMN not in header:
+        raise ValueError(f"{sheet} 還沒有 {ID_COLUMN} 欄，{MIGRATE_HINT}")
+    date_col = header.index("Date")
+    id_col = header.index(ID_COLUMN)
+    rows = values[1:]
+    years = _years([r[date_col] if len(r) > date_col else "" for r in rows])
+    by_year = {}
+    for row, year in zip(rows, years):
+        if pd.notna(year) and year < before_year:
+            by_year.setdefault(int(year), []).append(row)
+    if not by_year:
+        return {}
+    # 刪除以 _id 比對，缺 _id 的列會誤刪其他列
+    if any(
+        len(r) <= id_col or not r[id_col]
+        for rs in by_year.values()
+        for r in rs
+    ):
+        raise ValueError(f"{sheet} 有列缺少 {ID_COLUMN}，{MIGRATE_HINT}")
+
+    # 1. 寫進封存 (已存在的 _id 略過)
+    for year, year_rows in sorted(by_year.items()):
+        archive.write(sheet, year, header, year_rows)
+
+    # 2. 摘要以封存的完整內容重算 (重跑也不會重複計算)
+    update_summary(backend, archive, sheet, by_year)
+
+    # 3. 從原分頁刪除：刪除前重讀一次取得目前的列號
+    moved = {
+        str(r[id_col])
+        for rs in by_year.values()
+        for r in rs
+        if len(r) > id_col
+    }
+    current = backend.read_all(sheet)
+    row_numbers = [
+        i
+        for i, r in enumerate(current[1:], start=2)
+        if len(r) > id_col and str(r[id_col]) in moved
+    ]
+    backend.apply_edits(sheet, {}, row_numbers)
+    return {year: len(rs) for year, rs in sorted(by_year.items())}
+
+
+def update_summary(backend, archive, sheet, years):
+    header = DEFAULT_HEADERS[SUMMARY_SHEET]
+    current = backend.read_all(SUMMARY_SHEET)[1:]
+    replaced = {str(y) for y in years}
+    keep = [
+        r
+        for r in current
+        if not (len(r) > 1 and r[0] == sheet and str(r[1])[:4] in replaced)
+    ]
+    new = []
+    for year in sorted(years):
+        frame = apply_schema(sheet, archive.read_frame(sheet, year))
+        new.extend(summarize(sheet, frame))
+    rows = sorted(keep + new, key=lambda r: (str(r[0]), str(r[1])))
+    backend.replace_all(SUMMARY_SHEET, [header] + rows)
+
+
+# --- 查詢 ---
+def archived_years(summary, sheet):
+    """摘要分頁裡 sheet 有封存的年度 (由新到舊)。"""
+    if summary.empty or "Sheet" not in summary.columns:
+        return []
+    months = summary.loc[summary["Sheet"].astype(str) == sheet, "Month"]
+    years = {int(m[:4]) for m in months.astype(str) if m[:4].isdigit()}
+    return sorted(years, reverse=True)
+
+
+class ArchiveReader:
+    """
+    封存年度的讀取快取：封存寫入後就不再變動，依 (分頁, 年) 保留最近幾年
+    已轉型的資料；重新封存時呼叫 clear()。
+    """
+
+    def __init__(self, archive, size=4):
+        self.archive = archive
+        self.size = size
+        self.loads = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def frame(self, sheet, year):
+        key = (sheet, year)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+        df = apply_schema(sheet, self.archive.read_frame(sheet, year))
+        with self._lock:
+            self.loads += 1
+            self._frames[key] = df
+            while len(self._frames) > self.size:
+                self._frames.popitem(last=False)
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def query(self, sheet, hot, years, start=None, end=None):
+        """
+        start <= Date < end 的資料 (None 代表不限)：熱資料加上範圍內的
+        封存年度 (years 是有封存的年度)，範圍沒碰到封存時完全不讀封存。
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        needed = [
+            y
+            for y in sorted(years)
+            if (start is None or start.year <= y)
+            and (end is None or pd.Timestamp(year=y, month=1, day=1) < end)
+        ]
+        frames = [self.frame(sheet, y) for y in needed]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            df = hot
+        else:
+            columns = list(hot.columns) if len(hot.columns) else None
+            if columns:
+                frames = [f.reindex(columns=columns) for f in frames]
+            df = pd.concat(frames + [hot], ignore_index=True)
+            # 分類欄位 concat 後變回字串，再轉一次型別
+            df = apply_schema(sheet, df)
+        if start is None and end is None:
+            return df
+        return get_month_index(df).between(start, end)
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlencode
+
+# --- 錄製/重播 Google Sheets 請求 (cassette) ---
+# 錄製：包住 gspread HTTPClient 底下的 requests session，每個請求的方法、
+# 網址、參數、送出的內容，以及回應 (狀態碼、內容) 與耗時，各寫成一行 JSON。
+# 不記錄 headers，Authorization token 不會進檔案。
+# 重播：依 (方法, 網址, 參數) 找出錄到的回應，同一個 key 依錄製順序逐一
+# 回傳，用完後重複最後一筆 (多讀一次同樣的範圍)。沒錄到的請求直接丟
+# CassetteMiss。不需要憑證也不連網路，每次結果都一樣。
+# 寫入的內容 (新的 _id、今天的日期) 每次不同，所以不列入比對。
+
+
+class CassetteMiss(Exception):
+    """重播時遇到沒有錄到的請求。"""
+
+
+def request_key(method, url, params=None):
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return f"{method.upper()} {url}" + (f"?{query}" if query else "")
+
+
+def _body(json_body, data):
+    if json_body is not None:
+        return json_body
+    if isinstance(data, bytes):
+        return data.decode("utf-8", "replace")
+    return data
+
+
+def _append(path, entry):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def load_cassette(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class RecordingSession:
+    """把請求轉給原本的 session，同時寫進 cassette (會覆寫舊檔)。"""
+
+    def __init__(self, session, path):
+        self._session = session
+        self.path = path
+        self.count = 0
+        self.log = []
+        self._lock = threading.Lock()
+        open(path, "w").close()
+
+    def __getattr__(self, attr):
+        # headers、close() 等其他屬性照舊
+        return getattr(self._session, attr)
+
+    def request(
+        self, method, url, params=None, json=None, data=None, **kwargs
+    ):
+        start = time.perf_counter()
+        response = self._session.request(
+            method, url, params=params, json=json, data=data, **kwargs
+        )
+        entry = {
+            "key": request_key(method, url, params),
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "body": _body(json, data),
+            "status": response.status_code,
+            "reason": response.reason,
+            "content_type": response.headers.get("Content-Type", ""),
+            "content": response.text,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        with self._lock:
+            self.count += 1
+            entry["seq"] = self.count
+            self.log.append(entry["key"])
+            _append(self.path, entry)
+        return response
+
+
+class ReplaySession:
+    """
+    用 cassette 的內容回應請求 (取代 requests session)。
+    realtime=True 時照錄製的耗時等待，預設立即回應。
+    """
+
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self.headers = {}
+        self.count = 0
+        self.log = []
+        self.misses = []
+        self._queues = defaultdict(deque)
+        self._lock = threading.Lock()
+        for entry in load_cassette(path):
+            self._queues[entry["key"]].append(entry)
+
+    def close(self):
+        pass
+
+    def request(
+        self, method, url, params=None, json=None, data=None, **kwargs
+    ):
+        key = request_key(method, url, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                self.misses.append(key)
+                raise CassetteMiss(key)
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self.count += 1
+            self.log.append(key)
+        if self.realtime:
+            time.sleep(entry["ms"] / 1000)
+        return _response(entry, method, url, params, json, data)
+
+
+def _response(entry, method, url, params, json_body, data):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = entry.get("reason", "")
+    response._content = entry["content"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict(
+        {"Content-Type": entry.get("content_type", "application/json")}
+    )
+    response.request = requests.Request(
+        method, url, params=params, json=json_body, data=data
+    ).prepare()
+    response.url = response.request.url
+    return response
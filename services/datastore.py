@@ -0,0 +1,210 @@
+import itertools
+import threading
+import time
+
+from services import schema
+from services.row_ids import ID_COLUMN
+from services.scheduler import BACKGROUND, lane
+
+# --- 共用資料快取 (寫入後直接修補) ---
+# 所有 session 共用同一份已轉型的 DataFrame。遠端寫入成功後，
+# 把同樣的新增/修改/刪除套用到快取上 (產生新的 DataFrame，不改動舊的)，
+# 不再 clear() 之後整批重抓。背景執行緒每隔 verify_every 秒重新讀取
+# 來源比對指紋，接住在試算表上直接做的修改。
+# 交出去的每一份 DataFrame 都標上 (分頁, 版本) 當作指紋，
+# 下游的快取 (月份索引、指標、明細查詢) 不必再雜湊整份資料。
+# 呼叫端要改欄位請用 assign 產生新表，不要就地替換欄位的內容。
+
+_store_ids = itertools.count(1)
+
+
+class DataStore:
+    def __init__(self, loader, verify_every=60.0):
+        """
+        loader(names, fresh=False) -> {分頁: 已轉型的 DataFrame}
+        fresh=True 時 loader 需略過後端自己的讀取快取，直接讀來源。
+        """
+        self._loader = loader
+        self.verify_every = verify_every
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "patches": 0,
+            "verifies": 0,
+            "verify_changed": 0,
+        }
+        self.last_error = None
+        self._frames = {}
+        self._versions = {}
+        # 核對用的內容指紋 {分頁: (版本, 指紋)}，需要時才計算
+        self._hashes = {}
+        self._id = next(_store_ids)
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.verify_every and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="datastore-verify", daemon=True
+            )
+            self._thread.start()
+
+    # --- 讀取 ---
+    def get_many(self, names, count=True):
+        """count=False：背景工作 (預熱等) 讀取，不計入命中/未命中。"""
+        missing = self.missing(names)
+        if count:
+            self.stats["hits"] += len(names) - len(missing)
+            self.stats["misses"] += len(missing)
+        if missing:
+            self._load_missing(missing)
+        with self._lock:
+            # 淺複製：呼叫端新增/替換欄位不會影響共用的快取
+            return {n: self._copy(n) for n in names}
+
+    def _copy(self, name):
+        df = self._frames[name].copy(deep=False)
+        schema.tag_fingerprint(df, self.token(name))
+        return df
+
+    def token(self, name):
+        """(分頁, 版本) 指紋：同一個 token 一定是同一份內容。"""
+        return f"{name}@{self._id}.{self.version(name)}"
+
+    def missing(self, names):
+        """還沒載入 (或已被丟棄) 的分頁。"""
+        return [n for n in names if n not in self._frames]
+
+    def warm(self, names):
+        """背景預先載入 (不計入命中/未命中)，回傳這次載入的分頁。"""
+        missing = self.missing(names)
+        return self._load_missing(missing) if missing else []
+
+    def _load_missing(self, names):
+        # 同時只讓一個執行緒去抓，其他人等它抓完直接用
+        with self._load_lock:
+            names = self.missing(names)
+            if names:
+                loaded = self._loader(names)
+                self.stats["loads"] += 1
+                with self._lock:
+                    for name in names:
+                        self._store(name, loaded[name])
+        return names
+
+    def get(self, name, count=True):
+        return self.get_many([name], count)[name]
+
+    def cached(self):
+        """目前快取中的分頁 (不計入命中/未命中，給診斷頁用)。"""
+        with self._lock:
+            return dict(self._frames)
+
+    def version(self, name):
+        return self._versions.get(name, 0)
+
+    def _store(self, name, df, content=None):
+        self._frames[name] = df
+        self._versions[name] = self._versions.get(name, 0) + 1
+        if content is not None:
+            self._hashes[name] = (self._versions[name], content)
+
+    def _content(self, name):
+        version, content = self._hashes.get(name, (None, None))
+        if version != self._versions.get(name, 0):
+            content = schema.content_fingerprint(self._frames[name])
+            self._hashes[name] = (self._versions[name], content)
+        return content
+
+    # --- 寫入成功後修補 ---
+    def append(self, name, rows):
+        """rows: 原始值 (欄位順序與快取相同)。"""
+        with self._lock:
+            df = self._frames.get(name)
+            if df is None or not rows:
+                return
+            columns = list(df.columns)
+            width = len(columns)
+            rows = [(list(r) + [""] * width)[:width] for r in rows]
+            self._store(name, schema.append_rows(name, df, rows, columns))
+            self.stats["patches"] += 1
+
+    def update(self, name, changes_by_id):
+        """changes_by_id: {_id: {欄名: 原始值}}"""
+        with self._lock:
+            df = self._frames.get(name)
+            if df is None or ID_COLUMN not in df.columns:
+                return
+            ids = df[ID_COLUMN].astype(str).to_numpy()
+            for row_id, changes in changes_by_id.items():
+                positions = (ids == str(row_id)).nonzero()[0]
+                if len(positions):
+                    df = schema.set_cells(name, df, positions, changes)
+            self._store(name, df)
+            self.stats["patches"] += 1
+
+    def update_at(self, name, changes_by_position):
+        """沒有 _id 的分頁 (例如 Setting)：{列位置: {欄名: 原始值}}"""
+        with self._lock:
+            df = self._frames.get(name)
+            if df is None or not changes_by_position:
+                return
+            for position, changes in changes_by_position.items():
+                if 0 <= position < len(df):
+                    df = schema.set_cells(name, df, [position], changes)
+            self._store(name, df)
+            self.stats["patches"] += 1
+
+    def delete(self, name, row_ids):
+        with self._lock:
+            df = self._frames.get(name)
+            if df is None or ID_COLUMN not in df.columns or not row_ids:
+                return
+            gone = df[ID_COLUMN].astype(str).isin([str(i) for i in row_ids])
+            self._store(name, df[~gone].reset_index(drop=True))
+            self.stats["patches"] += 1
+
+    def invalidate(self, name=None):
+        """丟棄快取 (None 代表全部)，下次讀取時重新載入。"""
+        with self._lock:
+            names = list(self._frames) if name is None else [name]
+            for n in names:
+                self._frames.pop(n, None)
+                self._versions[n] = self._versions.get(n, 0) + 1
+
+    # --- 背景核對 ---
+    def verify(self, names=None):
+        """重新讀取來源，內容不同才替換；回傳有變動的分頁。"""
+        with self._lock:
+            names = list(self._frames) if names is None else list(names)
+            versions = {n: self._versions.get(n, 0) for n in names}
+        if not names:
+            return []
+        loaded = self._loader(names, fresh=True)
+        self.stats["verifies"] += 1
+        changed = []
+        with self._lock:
+            for name in names:
+                # 讀取途中本程式又修補過：以修補後的為準，下一輪再核對
+                if self._versions.get(name, 0) != versions[name]:
+                    continue
+                fresh = loaded[name]
+                content = schema.content_fingerprint(fresh)
+                if name in self._frames and content == self._content(name):
+                    continue
+                self._store(name, fresh, content)
+                changed.append(name)
+        self.stats["verify_changed"] += len(changed)
+        return changed
+
+    def _run(self):
+        with lane(BACKGROUND):
+            while True:
+                time.sleep(self.verify_every)
+                try:
+                    self.verify()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = repr(e)
@@ -0,0 +1,287 @@
+import contextlib
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from services.scheduler import current_lane
+
+# --- 效能量測 (熱路徑計數與延遲) ---
+# 每次呼叫記一筆事件：哪一次 rerun、哪個頁面、什麼呼叫、花了幾毫秒、
+# 傳輸多少位元組、是否命中快取。另外依 (頁面, 種類, 名稱) 累計次數、
+# 錯誤、總延遲、最大延遲、p95、位元組與命中率。
+# 事件只保留最近 max_events 筆 (可匯出成 JSON lines 離線分析)，
+# 累計值則一直保留到 reset()。
+# 頁面與 rerun 編號記在執行緒區域變數；交給寫入工作執行緒的函式
+# 用 bind() 帶過去，背景執行緒則記成 (background)。
+
+_SAMPLES = 256
+
+
+def _new_total():
+    return {
+        "calls": 0,
+        "errors": 0,
+        "ms": 0.0,
+        "max_ms": 0.0,
+        "bytes_out": 0,
+        "bytes_in": 0,
+        "hits": 0,
+        "misses": 0,
+        "samples": deque(maxlen=_SAMPLES),
+    }
+
+
+def _p95(samples):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _endpoint_name(endpoint):
+    """
+    .../spreadsheets/{id}                 -> metadata
+    .../spreadsheets/{id}:batchUpdate     -> batchUpdate
+    .../spreadsheets/{id}/values:batchGet -> values:batchGet
+    .../spreadsheets/{id}/values/{範圍}    -> values
+    .../spreadsheets/{id}/values/{範圍}:append -> values:append
+    (範圍已經 URL 編碼，裡面的冒號不會混淆)
+    """
+    path = str(endpoint).split("?", 1)[0]
+    if "/spreadsheets/" not in path:
+        return path.rstrip("/").rsplit("/", 1)[-1]
+    parts = path.split("/spreadsheets/", 1)[1].split("/")
+    if len(parts) == 1:
+        return parts[0].split(":", 1)[1] if ":" in parts[0] else "metadata"
+    if parts[1] == "values" and len(parts) > 2:
+        tail = parts[-1]
+        return "values:" + tail.rsplit(":", 1)[1] if ":" in tail else "values"
+    return "/".join(parts[1:])
+
+
+class Recorder:
+    def __init__(self, max_events=5000):
+        self.events = deque(maxlen=max_events)
+        self._totals = defaultdict(_new_total)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reruns = itertools.count(1)
+
+    # --- 範圍 (哪一次 rerun / 哪個頁面) ---
+    def begin_rerun(self):
+        """Streamlit 每次重新執行開始時呼叫，回傳這次的編號。"""
+        self._local.rerun = next(self._reruns)
+        self._local.page = None
+        return self._local.rerun
+
+    def set_page(self, page):
+        self._local.page = page
+
+    def context(self):
+        return (
+            getattr(self._local, "rerun", None),
+            getattr(self._local, "page", None),
+        )
+
+    def bind(self, fn):
+        """讓 fn 在別的執行緒執行時，事件仍算在目前的 rerun 與頁面。"""
+        rerun, page = self.context()
+
+        def bound(*args, **kwargs):
+            previous = self.context()
+            self._local.rerun, self._local.page = rerun, page
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.rerun, self._local.page = previous
+
+        return bound
+
+    # --- 記錄 ---
+    def record(
+        self,
+        kind,
+        name,
+        ms,
+        ok=True,
+        bytes_out=0,
+        bytes_in=0,
+        hits=0,
+        misses=0,
+    ):
+        rerun, page = self.context()
+        page = page or f"({current_lane()})"
+        event = {
+            "ts": round(time.time(), 3),
+            "rerun": rerun,
+            "page": page,
+            "kind": kind,
+            "name": name,
+            "ms": round(ms, 2),
+            "ok": ok,
+            "bytes_out": bytes_out,
+            "bytes_in": bytes_in,
+            "hits": hits,
+            "misses": misses,
+        }
+        with self._lock:
+            self.events.append(event)
+            total = self._totals[(page, kind, name)]
+            total["calls"] += 1
+            total["errors"] += 0 if ok else 1
+            total["ms"] += ms
+            total["max_ms"] = max(total["max_ms"], ms)
+            total["bytes_out"] += bytes_out
+            total["bytes_in"] += bytes_in
+            total["hits"] += hits
+            total["misses"] += misses
+            total["samples"].append(ms)
+        return event
+
+    @contextlib.contextmanager
+    def timed(self, kind, name):
+        """
+        量測 with 區塊的時間；區塊內可在回傳的 dict 填 bytes_out、
+        bytes_in、hits、misses。例外照常往外丟，記成錯誤。
+        """
+        info = {}
+        ok = True
+        start = time.perf_counter()
+        try:
+            yield info
+        except Exception:
+            ok = False
+            raise
+        finally:
+            # st.rerun()/st.stop() 不是 Exception，會記成正常結束
+            ms = (time.perf_counter() - start) * 1000
+            self.record(kind, name, ms, ok=ok, **info)
+
+    def wrap(self, fn, kind="call", name=None):
+        name = name or fn.__name__
+
+        def timed_fn(*args, **kwargs):
+            with self.timed(kind, name):
+                return fn(*args, **kwargs)
+
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__doc__ = fn.__doc__
+        return timed_fn
+
+    def traced(self, obj, kind, methods, target=None):
+        """
+        包住 obj，methods 裡的方法呼叫都記一筆 (其他屬性原樣轉交)。
+        名稱記成 方法:target；沒給 target 時用第一個字串參數 (分頁名稱)。
+        """
+        return _Traced(self, obj, kind, methods, target)
+
+    def trace_http(self, http_client):
+        """
+        記錄 gspread 的每個 HTTP 請求 (真正送出的那一次，不含排隊)：
+        端點、延遲、送出與收到的位元組。
+        """
+        if getattr(http_client, "_traced", False):
+            return http_client
+        original = http_client.request
+
+        def request(method, endpoint, *args, **kwargs):
+            name = f"{method.upper()} {_endpoint_name(endpoint)}"
+            with self.timed("sheets_api", name) as info:
+                response = original(method, endpoint, *args, **kwargs)
+                body = getattr(
+                    getattr(response, "request", None), "body", None
+                )
+                info["bytes_out"] = len(body or b"")
+                info["bytes_in"] = len(
+                    getattr(response, "content", b"") or b""
+                )
+                return response
+
+        http_client.request = request
+        http_client._traced = True
+        return http_client
+
+    # --- 查詢與匯出 ---
+    def summary(self):
+        """依 (頁面, 種類, 名稱) 的累計值，總延遲由大到小。"""
+        with self._lock:
+            items = [
+                (key, dict(t, samples=list(t["samples"])))
+                for key, t in self._totals.items()
+            ]
+        rows = []
+        for (page, kind, name), t in items:
+            lookups = t["hits"] + t["misses"]
+            rows.append(
+                {
+                    "page": page,
+                    "kind": kind,
+                    "name": name,
+                    "calls": t["calls"],
+                    "errors": t["errors"],
+                    "total_ms": round(t["ms"], 1),
+                    "mean_ms": round(t["ms"] / t["calls"], 2),
+                    "p95_ms": round(_p95(t["samples"]), 2),
+                    "max_ms": round(t["max_ms"], 2),
+                    "bytes_out": t["bytes_out"],
+                    "bytes_in": t["bytes_in"],
+                    "hit_ratio": (
+                        round(t["hits"] / lookups, 3) if lookups else None
+                    ),
+                }
+            )
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def rerun_events(self, rerun):
+        with self._lock:
+            return [e for e in self.events if e["rerun"] == rerun]
+
+    def to_jsonl(self, events=None):
+        with self._lock:
+            events = list(self.events if events is None else events)
+        return "".join(
+            json.dumps(e, ensure_ascii=False) + "\n" for e in events
+        )
+
+    def export(self, path):
+        """把目前保留的事件附加到 path (JSON lines)，回傳筆數。"""
+        with self._lock:
+            events = list(self.events)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_jsonl(events))
+        return len(events)
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self._totals.clear()
+
+
+class _Traced:
+    def __init__(self, recorder, obj, kind, methods, target):
+        self._recorder = recorder
+        self._obj = obj
+        self._kind = kind
+        self._methods = methods
+        self._target = target
+
+    def __getattr__(self, attr):
+        value = getattr(self._obj, attr)
+        if attr not in self._methods:
+            return value
+
+        def traced(*args, **kwargs):
+            target = self._target
+            if target is None and args and isinstance(args[0], str):
+                target = args[0]
+            name = attr if target is None else f"{attr}:{target}"
+            with self._recorder.timed(self._kind, name):
+                return value(*args, **kwargs)
+
+        return traced
+
+
+# 整個程式共用一個 (與 ledger_view 等模組層級快取相同)
+recorder = Recorder()
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from services.schema import fingerprint
+
+# --- 依月份切分的帳本索引 ---
+# 帳本依 Date 穩定排序一次，之後「本月」、「近 N 個月」、任意日期區間
+# 都用二分搜尋 (searchsorted) 找出起訖位置，直接切片，不再掃描整段歷史。
+# 索引依資料指紋快取，同一份資料只排序一次。
+# [優化] 索引只存排序後的列位置與日期，不另外複製一份排好序的帳本。
+
+_INDEXES = OrderedDict()
+_INDEX_SIZE = 8
+_index_lock = threading.Lock()
+
+
+def month_start(month):
+    """'YYYY-MM' -> 該月 1 日的 Timestamp。"""
+    return pd.Timestamp(f"{month}-01")
+
+
+class MonthIndex:
+    def __init__(self, df, date_col="Date"):
+        self.frame = df
+        if df.empty or date_col not in df.columns:
+            self._order = np.array([], dtype=np.intp)
+            self._dates = np.array([], dtype="datetime64[ns]")
+            return
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        dates = dates.to_numpy(dtype="datetime64[ns]")
+        # NaT 會排在最後，搜尋時只看有效日期的部分
+        order = np.argsort(dates, kind="stable")
+        sorted_dates = dates[order]
+        valid = ~np.isnat(sorted_dates)
+        self._order = order[valid]
+        self._dates = sorted_dates[valid]
+
+    def _bounds(self, start, end):
+        lo = 0
+        hi = len(self._dates)
+        if start is not None:
+            lo = np.searchsorted(self._dates, np.datetime64(start, "ns"))
+        if end is not None:
+            hi = np.searchsorted(self._dates, np.datetime64(end, "ns"))
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None):
+        """start <= Date < end 的資料 (None 代表不限)。"""
+        lo, hi = self._bounds(start, end)
+        return self.frame.iloc[self._order[lo:hi]]
+
+    def month(self, month):
+        start = month_start(month)
+        return self.between(start, start + pd.offsets.MonthBegin(1))
+
+    def last_months(self, n, month):
+        """包含 month 在內往前 n 個月。"""
+        end = month_start(month) + pd.offsets.MonthBegin(1)
+        return self.between(end - pd.offsets.MonthBegin(n), end)
+
+    def count(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    @property
+    def nbytes(self):
+        # frame 是共用快取的同一份資料，不算在索引裡
+        return self._order.nbytes + self._dates.nbytes
+
+
+def get_month_index(df, date_col="Date"):
+    key = (fingerprint(df), date_col)
+    with _index_lock:
+        if key in _INDEXES:
+            _INDEXES.move_to_end(key)
+            return _INDEXES[key]
+    index = MonthIndex(df, date_col)
+    with _index_lock:
+        _INDEXES[key] = index
+        while len(_INDEXES) > _INDEX_SIZE:
+            _INDEXES.popitem(last=False)
+    return index
+
+
+def cache_info():
+    """診斷頁用：快取的索引數與佔用位元組。"""
+    with _index_lock:
+        return {
+            "entries": len(_INDEXES),
+            "bytes": sum(i.nbytes for i in _INDEXES.values()),
+        }
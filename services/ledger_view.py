@@ -0,0 +1,106 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from services.schema import fingerprint
+
+# --- 明細分頁瀏覽 ---
+# 搜尋、篩選、排序都在伺服器端完成，結果只記「列位置」(依資料指紋快取)，
+# 換頁時直接 iloc 切出那一頁，瀏覽器一次只收到一頁的資料。
+
+_VIEWS = OrderedDict()
+_VIEW_SIZE = 16
+_view_lock = threading.Lock()
+
+
+def _positions(df, sort_by, ascending, search, search_cols, filters):
+    mask = np.ones(len(df), dtype=bool)
+    if search:
+        hit = np.zeros(len(df), dtype=bool)
+        for col in search_cols:
+            if col in df.columns:
+                text = df[col].astype(str)
+                hit |= text.str.contains(
+                    search, case=False, regex=False
+                ).to_numpy()
+        mask &= hit
+    for col, values in filters:
+        if values and col in df.columns:
+            mask &= df[col].astype(str).isin(values).to_numpy()
+    positions = mask.nonzero()[0]
+    if sort_by in df.columns and len(positions):
+        key = df[sort_by].iloc[positions].reset_index(drop=True)
+        # 穩定排序：同一天的資料維持寫入順序，空值一律排最後
+        order = key.sort_values(
+            ascending=ascending, kind="stable", na_position="last"
+        ).index.to_numpy()
+        positions = positions[order]
+    return positions
+
+
+def query(
+    df,
+    sort_by="Date",
+    ascending=False,
+    search="",
+    search_cols=("Item",),
+    filters=None,
+):
+    """回傳符合條件、排序好的列位置 (np.ndarray)，同樣條件第二次起直接取快取。"""
+    search = (search or "").strip()
+    filters = tuple(
+        (col, tuple(sorted(map(str, values))))
+        for col, values in sorted((filters or {}).items())
+    )
+    key = (
+        fingerprint(df),
+        sort_by,
+        ascending,
+        search,
+        tuple(search_cols),
+        filters,
+    )
+    with _view_lock:
+        if key in _VIEWS:
+            _VIEWS.move_to_end(key)
+            return _VIEWS[key]
+    positions = _positions(
+        df, sort_by, ascending, search, search_cols, filters
+    )
+    with _view_lock:
+        _VIEWS[key] = positions
+        while len(_VIEWS) > _VIEW_SIZE:
+            _VIEWS.popitem(last=False)
+    return positions
+
+
+def page_count(total, page_size):
+    return max(1, math.ceil(total / page_size))
+
+
+def page_of(df, positions, page, page_size):
+    """第 page 頁 (1 起算) 的資料；頁數超出範圍時自動夾到有效頁。"""
+    page = min(max(1, int(page)), page_count(len(positions), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[positions[start : start + page_size]]
+
+
+def categories(series):
+    """篩選選單用的分類清單。"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    else:
+        values = series.dropna().unique()
+    return sorted(str(v) for v in values if str(v) != "")
+
+
+def cache_info():
+    """診斷頁用：快取的查詢數與佔用位元組。"""
+    with _view_lock:
+        return {
+            "entries": len(_VIEWS),
+            "bytes": sum(p.nbytes for p in _VIEWS.values()),
+        }
@@ -0,0 +1,60 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --- 記憶體用量 ---
+# 診斷頁用：估算各分頁、各快取與目前 session 佔用的位元組數。
+# DataFrame 用 memory_usage(deep=True)，其他物件遞迴加總 (估計值)。
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def deep_bytes(obj, _seen=None):
+    """物件大約佔用的位元組數 (共用的物件只算一次)。"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return frame_bytes(obj)
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            deep_bytes(k, seen) + deep_bytes(v, seen) for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_bytes(v, seen) for v in obj)
+    return size
+
+
+def sheet_report(frames):
+    """每個分頁一列：列數、總位元組、每列位元組、各欄型別。"""
+    rows = []
+    for name, df in frames.items():
+        total = frame_bytes(df)
+        rows.append(
+            {
+                "分頁": name,
+                "列數": len(df),
+                "bytes": total,
+                "bytes/列": round(total / len(df), 1) if len(df) else 0,
+                "欄位型別": ", ".join(
+                    f"{col}:{dtype}" for col, dtype in df.dtypes.items()
+                ),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
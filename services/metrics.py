@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from services.ledger_index import get_month_index
+from services.memory import deep_bytes
+from services.schema import fingerprint
+
+# --- 財務指標 (首頁與商會共用) ---
+# 全部使用向量化的 pandas 運算；結果依「資料指紋 + 月份」記憶，
+# 資料沒變時 (例如只是切換分頁、點選元件) 直接回傳上次的結果。
+
+# 週期攤提到每月的倍率，未列出的 (每月) 為 1
+CYCLE_FACTORS = {"每年": 1 / 12, "每半年": 1 / 6}
+
+_MEMO = OrderedDict()
+_MEMO_SIZE = 32
+_memo_lock = threading.Lock()
+
+
+def _numeric(series):
+    return pd.to_numeric(series, errors="coerce").fillna(0)
+
+
+def fixed_monthly_plan(df_fixed):
+    """固定開銷攤提後的每月計畫總額 (每年 / 12，每半年 / 6)。"""
+    if df_fixed.empty or "Amount" not in df_fixed.columns:
+        return 0
+    amount = _numeric(df_fixed["Amount"])
+    if "Cycle" in df_fixed.columns:
+        cycle = df_fixed["Cycle"].astype(str)
+        factor = cycle.map(CYCLE_FACTORS).fillna(1.0)
+    else:
+        factor = 1.0
+    return int((amount * factor).sum())
+
+
+def _compute(df_fin, df_fixed, df_income, df_budget, month):
+    m = {}
+
+    # A. 收入
+    m["total_income"] = 0
+    if not df_income.empty and "Date" in df_income.columns:
+        inc = get_month_index(df_income).month(month)["Amount"]
+        m["total_income"] = int(_numeric(inc).sum())
+
+    # B. 固定開銷 (計畫總額)
+    m["total_fixed_plan"] = fixed_monthly_plan(df_fixed)
+
+    # C. 實際支出 (含已入帳的固定開銷)
+    m["total_actual_spent"] = 0
+    m["spent_by_category"] = {}
+    if not df_fin.empty and "Date" in df_fin.columns:
+        fin_month = get_month_index(df_fin).month(month)
+        price = _numeric(fin_month["Price"])
+        m["total_actual_spent"] = int(price.sum())
+        if "Type1" in fin_month.columns:
+            m["spent_by_category"] = (
+                price.groupby(fin_month["Type1"].astype(str)).sum().to_dict()
+            )
+    m["actual_fixed_spent"] = m["spent_by_category"].get("固定開銷", 0)
+
+    # D. 預算
+    m["budget_dict"] = {}
+    m["reserve_goal"] = 0
+    if not df_budget.empty and "Item" in df_budget.columns:
+        items = df_budget["Item"].astype(str)
+        amounts = _numeric(df_budget["Budget"]).astype(int)
+        m["budget_dict"] = dict(zip(items, amounts.tolist()))
+        reserve = amounts[items.str.contains("預備金")]
+        if not reserve.empty:
+            m["reserve_goal"] = int(reserve.iloc[-1])
+    m["existing_items"] = list(m["budget_dict"])
+
+    # E. 自由現金流
+    m["remaining_unpaid_fixed"] = max(
+        0, m["total_fixed_plan"] - m["actual_fixed_spent"]
+    )
+    m["free_cash"] = (
+        m["total_income"]
+        - m["total_actual_spent"]
+        - m["remaining_unpaid_fixed"]
+        - m["reserve_goal"]
+    )
+    return m
+
+
+def month_metrics(data, month):
+    """
+    data: load_all_finance_data() 的結果 (或相同 key 的 dict)
+    回傳當月各項指標的 dict，呼叫端請勿修改。
+    (預備金餘額改由 services.reserve 的月結餘檢查點提供)
+    """
+    frames = [
+        data.get(name, pd.DataFrame())
+        for name in [
+            "Finance",
+            "FixedExpenses",
+            "Income",
+            "Budget",
+        ]
+    ]
+    key = (month,) + tuple(fingerprint(df) for df in frames)
+    with _memo_lock:
+        if key in _MEMO:
+            _MEMO.move_to_end(key)
+            return _MEMO[key]
+    result = _compute(*frames, month)
+    with _memo_lock:
+        _MEMO[key] = result
+        while len(_MEMO) > _MEMO_SIZE:
+            _MEMO.popitem(last=False)
+    return result
+
+
+def quest_counts(df_qb):
+    """任務看板各狀態的數量。"""
+    if df_qb.empty or "Status" not in df_qb.columns:
+        return {}
+    return df_qb["Status"].astype(str).value_counts().to_dict()
+
+
+def cache_info():
+    """診斷頁用：記憶的結果數與佔用位元組。"""
+    with _memo_lock:
+        return {
+            "entries": len(_MEMO),
+            "bytes": deep_bytes(list(_MEMO.values())),
+        }
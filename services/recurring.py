@@ -0,0 +1,134 @@
+import hashlib
+import re
+from calendar import monthrange
+from datetime import date
+
+import pandas as pd
+
+from services.ledger_index import get_month_index
+from services.row_ids import ID_COLUMN
+
+# --- 固定開銷入帳 (週期性支出) ---
+# 依 Cycle 決定入帳期間：每月 → 當月、每半年 → 上/下半年、每年 → 當年，
+# 每個期間入帳一次。每月的 Detail 若是「N號」，到了扣款日才算到期
+# (超過月底以月底計)，入帳日期就是扣款日。
+# 每筆入帳的 _id 由 (固定開銷 _id, 期間) 雜湊而成：同一期間重送 (連點、
+# 寫入重試、兩個 session 同時按) 都是同一個 ID，寫入前比對即可略過。
+# 舊版入帳的列 _id 是隨機的，所以同期間內有同名稱的支出也視為已入帳。
+
+FIXED_TYPE1 = "固定開銷"
+_DAY = re.compile(r"(\d{1,2})\s*號")
+
+
+def due_day(detail):
+    """'5號' -> 5，沒有指定扣款日時回傳 None。"""
+    m = _DAY.search(str(detail or ""))
+    if not m:
+        return None
+    day = int(m.group(1))
+    return day if 1 <= day <= 31 else None
+
+
+def period_of(cycle, today):
+    """回傳 (期間名稱, 起日, 迄日 (不含))，例如 ('2024-H2', 7/1, 隔年 1/1)。"""
+    if cycle == "每年":
+        return (
+            str(today.year),
+            date(today.year, 1, 1),
+            date(today.year + 1, 1, 1),
+        )
+    if cycle == "每半年":
+        half = 1 if today.month <= 6 else 2
+        start = date(today.year, 1 if half == 1 else 7, 1)
+        end = (
+            date(today.year, 7, 1) if half == 1 else date(today.year + 1, 1, 1)
+        )
+        return f"{today.year}-H{half}", start, end
+    # 每月 (以及未知的週期)
+    start = today.replace(day=1)
+    end = (pd.Timestamp(start) + pd.offsets.MonthBegin(1)).date()
+    return today.strftime("%Y-%m"), start, end
+
+
+def posting_id(fixed_key, period):
+    """同一個固定開銷、同一期間永遠得到同一個 _id (格式與 new_id 相同)。"""
+    digest = hashlib.sha1(f"{fixed_key}|{period}".encode("utf-8"))
+    return "r" + digest.hexdigest()[:12]
+
+
+def _posted(df_fin, start, end):
+    """期間內已入帳的 (_id 集合, 項目名稱集合)。"""
+    if df_fin.empty or "Date" not in df_fin.columns:
+        return set(), set()
+    rows = get_month_index(df_fin).between(
+        pd.Timestamp(start), pd.Timestamp(end)
+    )
+    ids = set()
+    if ID_COLUMN in rows.columns:
+        ids = set(rows[ID_COLUMN].astype(str))
+    items = set(rows["Item"].astype(str)) if "Item" in rows.columns else set()
+    return ids, items
+
+
+def unpaid_fixed(df_fixed, df_fin, today=None):
+    """
+    本期還沒入帳的固定開銷 (依扣款日排序)，每筆是 dict：
+    Item, Type, Amount, PaidBy, Cycle, period, date, due, _id
+    due=False 代表本月稍後才到扣款日。
+    """
+    today = today or date.today()
+    if df_fixed.empty or "Item" not in df_fixed.columns:
+        return []
+    posted = {}
+    out = []
+    for fixed in df_fixed.to_dict("records"):
+        cycle = str(fixed.get("Cycle") or "每月")
+        period, start, end = period_of(cycle, today)
+        if period not in posted:
+            posted[period] = _posted(df_fin, start, end)
+        ids, items = posted[period]
+
+        key = str(fixed.get(ID_COLUMN) or "") or str(fixed["Item"])
+        rid = posting_id(key, period)
+        if rid in ids or str(fixed["Item"]) in items:
+            continue
+
+        day = due_day(fixed.get("Detail")) if cycle == "每月" else None
+        when = today
+        if day:
+            when = today.replace(
+                day=min(day, monthrange(today.year, today.month)[1])
+            )
+        out.append(
+            {
+                "Item": fixed["Item"],
+                "Type": fixed.get("Type", ""),
+                # 金額空白 (NA) 時入帳 0，有小數的金額照原值
+                "Amount": (
+                    0 if pd.isna(fixed.get("Amount")) else fixed["Amount"]
+                ),
+                "PaidBy": fixed.get("PaidBy", ""),
+                "Cycle": cycle,
+                "period": period,
+                "date": when,
+                "due": when <= today,
+                ID_COLUMN: rid,
+            }
+        )
+    out.sort(key=lambda p: (p["date"], p["Item"]))
+    return out
+
+
+def posting_rows(postings):
+    """Finance 的列 (不含 _id)：Date, Week, Item, Price, Type1, Type2。"""
+    return [
+        [
+            str(p["date"]),
+            p["date"].isocalendar()[1],
+            p["Item"],
+            p["Amount"],
+            FIXED_TYPE1,
+            str(p["Type"]),
+        ]
+        for p in postings
+    ]
@@ -0,0 +1,172 @@
+import threading
+from bisect import bisect_right, insort
+
+import pandas as pd
+
+# --- 預備金帳本 (月結餘檢查點) ---
+# 每個月記下存入、取出與月底結餘，餘額與本月數字都是查表 (O(1))，
+# 不必每次 rerun 把整段歷史重新加總；餘額走勢圖直接用這些檢查點。
+# 新的存入/取出只更新該月 (以及之後各月) 的檢查點。
+# 帳本跟著共用快取 ReserveFund 的版本：版本對不上 (修改、刪除、重新載入)
+# 時才整段重建一次 (向量化)。
+
+DEPOSIT = "存入"
+WITHDRAW = "取出"
+
+
+def _amount(value):
+    if isinstance(value, (int, float)):
+        return 0 if pd.isna(value) else value
+    try:
+        return float(str(value).replace(",", "").strip() or 0)
+    except ValueError:
+        return 0
+
+
+def _month(value):
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else ts.strftime("%Y-%m")
+
+
+class ReserveLedger:
+    def __init__(self):
+        self.version = None
+        self._months = {}
+        self._order = []
+        self._undated = 0
+        self._balance = 0
+        self._lock = threading.Lock()
+
+    # --- 建立與增量更新 ---
+    def rebuild(self, df, version=None):
+        """由整張 ReserveFund 重建 (日期/金額已由 apply_schema 轉型)。"""
+        months = {}
+        undated = 0
+        if not df.empty and {"Date", "Type", "Amount"} <= set(df.columns):
+            amount = pd.to_numeric(df["Amount"], errors="coerce").fillna(0)
+            # Type 是 category，直接比對，不轉字串
+            kind = df["Type"]
+            dates = df["Date"]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce")
+            # 以 YYYYMM 整數分組 (比逐列 strftime 快得多)
+            month = dates.dt.year * 100 + dates.dt.month
+            deposit = amount.where(kind == DEPOSIT, 0)
+            withdraw = amount.where(kind == WITHDRAW, 0)
+            dated = month.notna()
+            # 沒有日期的列只算進餘額，不屬於任何月份
+            undated = float((deposit - withdraw)[~dated].sum())
+            grouped = (
+                pd.DataFrame({"deposit": deposit, "withdraw": withdraw})[dated]
+                .groupby(month[dated].astype(int))
+                .sum()
+            )
+            for key, dep, wd in zip(
+                grouped.index, grouped["deposit"], grouped["withdraw"]
+            ):
+                months[f"{key // 100:04d}-{key % 100:02d}"] = {
+                    "deposit": dep,
+                    "withdraw": wd,
+                }
+        with self._lock:
+            self._months = months
+            self._order = sorted(months)
+            self._undated = undated
+            self._recompute(0)
+            self.version = version
+
+    def extend(self, rows, columns, before, after):
+        """
+        新增的列 (原始值，欄位順序為 columns) 直接加進檢查點。
+        只有帳本原本就是 before 版本、且快取只前進一版時才套用，
+        否則留給下次讀取時重建。
+        """
+        with self._lock:
+            if self.version is None or self.version != before:
+                return False
+            if after != before + 1:
+                return False
+            pos = {c: i for i, c in enumerate(columns)}
+            if not {"Date", "Type", "Amount"} <= set(pos):
+                return False
+            first = None
+            for row in rows:
+                row = list(row) + [""] * (len(columns) - len(row))
+                kind = str(row[pos["Type"]])
+                amount = _amount(row[pos["Amount"]])
+                if kind not in (DEPOSIT, WITHDRAW) or not amount:
+                    continue
+                m = _month(row[pos["Date"]])
+                if m is None:
+                    self._undated += amount if kind == DEPOSIT else -amount
+                    first = 0
+                    continue
+                if m not in self._months:
+                    self._months[m] = {"deposit": 0, "withdraw": 0}
+                    insort(self._order, m)
+                key = "deposit" if kind == DEPOSIT else "withdraw"
+                self._months[m][key] += amount
+                i = self._order.index(m)
+                first = i if first is None else min(first, i)
+            if first is not None:
+                # 通常是最後一個月，只需要更新一個檢查點
+                self._recompute(first)
+            self.version = after
+            return True
+
+    def _recompute(self, start):
+        """從第 start 個月起重算月底結餘。"""
+        closing = self._undated
+        if start > 0:
+            closing = self._months[self._order[start - 1]]["closing"]
+        for m in self._order[start:]:
+            entry = self._months[m]
+            closing += entry["deposit"] - entry["withdraw"]
+            entry["closing"] = closing
+        self._balance = (
+            self._months[self._order[-1]]["closing"]
+            if self._order
+            else self._undated
+        )
+
+    # --- 查詢 ---
+    def balance(self):
+        with self._lock:
+            return int(self._balance)
+
+    def month(self, month):
+        """'YYYY-MM' 的存入、取出、淨額與月底結餘 (沒有進出的月份為 0)。"""
+        with self._lock:
+            entry = self._months.get(month)
+            if entry is None:
+                closing = self._closing_before(month)
+                return {
+                    "deposit": 0,
+                    "withdraw": 0,
+                    "net": 0,
+                    "closing": int(closing),
+                }
+            return {
+                "deposit": int(entry["deposit"]),
+                "withdraw": int(entry["withdraw"]),
+                "net": int(entry["deposit"] - entry["withdraw"]),
+                "closing": int(entry["closing"]),
+            }
+
+    def _closing_before(self, month):
+        i = bisect_right(self._order, month)
+        if i == 0:
+            return self._undated
+        return self._months[self._order[i - 1]]["closing"]
+
+    def series(self):
+        """每月的存入/取出/月底結餘 (畫餘額走勢圖用)。"""
+        with self._lock:
+            return pd.DataFrame(
+                {
+                    "存入": [self._months[m]["deposit"] for m in self._order],
+                    "取出": [self._months[m]["withdraw"] for m in self._order],
+                    "餘額": [self._months[m]["closing"] for m in self._order],
+                },
+                index=pd.Index(self._order, name="Month"),
+            ).astype(int)
@@ -0,0 +1,90 @@
+import threading
+import uuid
+
+# --- 穩定列 ID ---
+# 每個資料分頁最後一欄是隱藏的 _id，寫入時用 ID 找到目前的列號，
+# 不再依賴 DataFrame 的 index + 2 (其他 session 插入/刪除列後就會錯位)。
+# 列號索引由程式內所有寫入動作即時維護，每次重新載入資料時重建。
+
+ID_COLUMN = "_id"
+
+# 舊資料還沒有 _id 時的提示 (補上 ID 是設定頁的手動步驟)
+MIGRATE_HINT = "請先到設定頁補上列 ID"
+NO_ID_INFO = (
+    f"這裡的資料還沒有 {ID_COLUMN}，暫時無法修改或刪除；{MIGRATE_HINT}。"
+)
+
+# 需要 _id 的分頁 (Setting 以 Item 為鍵，不需要)
+ID_SHEETS = {
+    "Finance",
+    "Income",
+    "FixedExpenses",
+    "Budget",
+    "ReserveFund",
+    "QuestBoard",
+    "Adventures",
+    "Sheet1",
+}
+
+
+def new_id():
+    # 加上字母前綴，避免試算表把全數字的 ID 當成數值
+    return "r" + uuid.uuid4().hex[:12]
+
+
+class RowIdIndex:
+    def __init__(self):
+        self._sheets = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, header, ids):
+        """用剛載入的資料重建該分頁的索引 (ids 依列順序)。"""
+        ids = [str(i) for i in ids]
+        with self._lock:
+            self._sheets[name] = {
+                "header": list(header),
+                "ids": ids,
+                # 還沒補上 _id 的列 (空白) 不能被指定，否則會寫到別列
+                "pos": {rid: i for i, rid in enumerate(ids) if rid.strip()},
+            }
+
+    def header(self, name):
+        sheet = self._sheets.get(name)
+        return sheet["header"] if sheet else None
+
+    def row_of(self, name, row_id):
+        """ID -> 試算表列號 (資料第 1 筆在第 2 列)，找不到回傳 None。"""
+        sheet = self._sheets.get(name)
+        if not sheet:
+            return None
+        pos = sheet["pos"].get(str(row_id))
+        return None if pos is None else pos + 2
+
+    def appended(self, name, ids):
+        with self._lock:
+            sheet = self._sheets.get(name)
+            if not sheet:
+                return
+            for rid in ids:
+                sheet["pos"][str(rid)] = len(sheet["ids"])
+                sheet["ids"].append(str(rid))
+
+    def deleted(self, name, ids):
+        with self._lock:
+            sheet = self._sheets.get(name)
+            if not sheet:
+                return
+            gone = {str(rid) for rid in ids}
+            first = min(
+                (sheet["pos"][r] for r in gone if r in sheet["pos"]),
+                default=None,
+            )
+            if first is None:
+                return
+            # 只有被刪除列之後的位置需要往前移
+            tail = [r for r in sheet["ids"][first:] if r not in gone]
+            for r in gone:
+                sheet["pos"].pop(r, None)
+            sheet["ids"][first:] = tail
+            for i, rid in enumerate(tail, start=first):
+                sheet["pos"][rid] = i
@@ -0,0 +1,227 @@
+import contextlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Google Sheets 請求排程 (配額令牌桶) ---
+# 所有 Sheets API 請求 (包住 gspread 的 http_client.request) 先向令牌桶
+# 取得額度，讀、寫各一個桶，補充速度等於每分鐘配額。
+# 請求分兩個優先順序：
+#   interactive : 使用者操作 (畫面上的讀取、表單寫入)
+#   background  : 預熱、背景核對、延遲寫入佇列
+# 有使用者請求在排隊時背景請求一律讓路，並保留 reserve 個額度給使用者。
+# 遇到 429 (或讀取時的 5xx) 以隨機抖動的指數退避重試，但只在背景執行緒
+# 與寫入工作執行緒 (submit) 裡重試，Streamlit 的畫面執行緒永遠不會 sleep。
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def lane(name, retry=True):
+    """這個執行緒接下來的請求屬於哪個優先順序、失敗時可否 sleep 重試。"""
+    previous = (getattr(_local, "lane", None), getattr(_local, "retry", None))
+    _local.lane, _local.retry = name, retry
+    try:
+        yield
+    finally:
+        _local.lane, _local.retry = previous
+
+
+def current_lane():
+    return getattr(_local, "lane", None) or INTERACTIVE
+
+
+def may_retry():
+    # 沒有指定的執行緒 (Streamlit 畫面執行緒) 不重試
+    return bool(getattr(_local, "retry", False))
+
+
+def status_code(e):
+    response = getattr(e, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_rate_limited(e):
+    """判斷是否為 Google API 的 429 (超過每分鐘配額)。"""
+    return status_code(e) == 429
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        per_minute=60.0,
+        burst=20,
+        reserve=5,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=60.0,
+        workers=1,
+    ):
+        """
+        per_minute : 每分鐘配額 (Sheets API 每位使用者讀、寫各 60 次)
+        burst      : 桶的容量 (閒置後可連續送出的請求數)
+        reserve    : 背景請求不能動用的最後幾個額度
+        workers    : 寫入工作執行緒數；預設 1，依序寫入才不會互相移動列號
+        """
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {
+            "interactive_requests": 0,
+            "background_requests": 0,
+            "interactive_wait_ms": 0.0,
+            "background_wait_ms": 0.0,
+            "max_depth": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "backoff_ms": 0.0,
+            "submitted": 0,
+        }
+        self.last_error = None
+        # 最近一次背景寫入 (submit) 的錯誤，下一次寫入成功後清除
+        self.write_error = None
+        self._tokens = {"read": float(burst), "write": float(burst)}
+        self._stamp = {"read": time.monotonic(), "write": time.monotonic()}
+        self._waiting = {name: 0 for name in LANES}
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="sheets-write",
+            initializer=self._init_worker,
+        )
+
+    @staticmethod
+    def _init_worker():
+        # 寫入工作執行緒：使用者的請求，但可以在這裡退避重試
+        _local.lane, _local.retry = INTERACTIVE, True
+
+    # --- 令牌桶 ---
+    def _refill(self, kind):
+        now = time.monotonic()
+        elapsed = now - self._stamp[kind]
+        self._stamp[kind] = now
+        self._tokens[kind] = min(
+            self.burst, self._tokens[kind] + elapsed * self.rate
+        )
+        return self._tokens[kind]
+
+    def acquire(self, kind="write"):
+        """取得一個額度，回傳等待的秒數。"""
+        name = current_lane()
+        floor = 1 if name == INTERACTIVE else 1 + self.reserve
+        start = time.monotonic()
+        with self._cond:
+            self._waiting[name] += 1
+            depth = sum(self._waiting.values())
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+            try:
+                while True:
+                    tokens = self._refill(kind)
+                    yielding = (
+                        name == BACKGROUND and self._waiting[INTERACTIVE] > 0
+                    )
+                    if tokens >= floor and not yielding:
+                        self._tokens[kind] -= 1
+                        break
+                    wait = max(floor - tokens, 0) / self.rate
+                    self._cond.wait(min(max(wait, 0.01), 1.0))
+            finally:
+                self._waiting[name] -= 1
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.stats[f"{name}_requests"] += 1
+            self.stats[f"{name}_wait_ms"] += waited * 1000
+        return waited
+
+    def _drain(self, kind):
+        # 被 429 擋下：桶子歸零，其他請求也跟著放慢
+        with self._cond:
+            self._refill(kind)
+            self._tokens[kind] = min(self._tokens[kind], 0.0)
+
+    # --- 執行 ---
+    def should_retry(self, e, kind):
+        code = status_code(e)
+        if code == 429:
+            return True
+        # 5xx 只重試讀取，寫入可能已經生效 (例如 append 重送會重複)
+        return kind == "read" and code in (500, 502, 503, 504)
+
+    def backoff(self, attempt):
+        """第 attempt 次重試前等待的秒數 (指數上限內隨機抖動)。"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt + 1))
+        return random.uniform(self.base_delay, ceiling)
+
+    def call(self, fn, *args, kind="write", **kwargs):
+        attempt = 0
+        while True:
+            self.acquire(kind)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if is_rate_limited(e):
+                    self.stats["rate_limited"] += 1
+                    self._drain(kind)
+                if (
+                    not self.should_retry(e, kind)
+                    or not may_retry()
+                    or attempt >= self.max_retries
+                ):
+                    self.last_error = repr(e)
+                    raise
+                delay = self.backoff(attempt)
+                self.stats["retries"] += 1
+                self.stats["backoff_ms"] += delay * 1000
+                time.sleep(delay)
+                attempt += 1
+
+    def wrap(self, http_client):
+        """讓 gspread 的每個 HTTP 請求都經過排程 (GET 算讀取，其餘算寫入)。"""
+        if getattr(http_client, "_scheduled", False):
+            return http_client
+        original = http_client.request
+
+        def request(method, endpoint, *args, **kwargs):
+            kind = "read" if method.upper() == "GET" else "write"
+            return self.call(
+                original, method, endpoint, *args, kind=kind, **kwargs
+            )
+
+        http_client.request = request
+        http_client._scheduled = True
+        return http_client
+
+    def submit(self, fn, *args, **kwargs):
+        """在寫入工作執行緒執行 fn (可退避重試)，回傳 Future。"""
+        with self._cond:
+            self._inflight += 1
+            self.stats["submitted"] += 1
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._cond:
+            self._inflight -= 1
+        error = future.exception()
+        if error is not None:
+            self.last_error = repr(error)
+        self.write_error = str(error) if error is not None else None
+
+    def snapshot(self):
+        """目前排隊中的請求數 (依優先順序) 與累計統計。"""
+        with self._cond:
+            out = dict(self.stats)
+            for name in LANES:
+                out[f"{name}_depth"] = self._waiting[name]
+            out["inflight_writes"] = self._inflight
+            return out
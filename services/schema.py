@@ -0,0 +1,256 @@
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from services.row_ids import ID_COLUMN
+
+# --- 分頁欄位型別 ---
+# 載入時統一轉型一次：日期 -> datetime64、金額 -> 數字、分類 -> category。
+# views 拿到的就是轉好型別的資料，不必每次 rerun 再 to_datetime / to_numeric。
+# [優化] 同時也是最省記憶體的表示法 (大帳本約為 object 欄位的 1/8)。
+#   date     : datetime64，無法解析的變成 NaT
+#   amount   : Int32 (去除千分位逗號與 $；空白/無法解析的保留為 NA，不當成 0；
+#              超出範圍才用 Int64；有小數的欄位維持 float64，不四捨五入)
+#   category : pandas category (重複的分類名稱只存一份)
+#   str      : 字串 (空值轉成 "")
+SCHEMAS = {
+    "Finance": {
+        "Date": "date",
+        "Week": "amount",
+        "Item": "str",
+        "Price": "amount",
+        "Type1": "category",
+        "Type2": "category",
+    },
+    "Income": {
+        "Date": "date",
+        "Item": "str",
+        "Amount": "amount",
+        "Type": "category",
+        "Note": "str",
+    },
+    "FixedExpenses": {
+        "Item": "str",
+        "Type": "category",
+        "Amount": "amount",
+        "PaidBy": "category",
+        "Cycle": "category",
+        "Detail": "str",
+    },
+    "Budget": {"Item": "str", "Budget": "amount"},
+    "ReserveFund": {
+        "Date": "date",
+        "Type": "category",
+        "Amount": "amount",
+        "Note": "str",
+    },
+    "QuestBoard": {
+        "Name": "str",
+        "Content": "str",
+        "Type": "category",
+        "Status": "category",
+        "Deadline": "str",
+        "Reward": "str",
+    },
+    "Adventures": {
+        "Name": "str",
+        "Description": "str",
+        "Status": "category",
+        "StartDate": "date",
+        "NotionLink": "str",
+        "Type": "category",
+    },
+    "ArchiveSummary": {
+        "Sheet": "category",
+        "Month": "str",
+        "Category": "category",
+        "Rows": "amount",
+        "Total": "amount",
+    },
+}
+
+# 隱藏的 _id 一律是字串
+for _schema in SCHEMAS.values():
+    _schema[ID_COLUMN] = "str"
+
+# pandas 2.x 需手動開啟 Copy-on-Write (3.x 起為預設)：
+# 快取中的 DataFrame 被多個畫面共用，任何修改都只會作用在自己的副本上
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _to_str(s):
+    return s.fillna("").astype(str)
+
+
+INT32_MIN, INT32_MAX = -(2**31), 2**31 - 1
+
+
+def _to_amount(s):
+    if s.dtype == object or pd.api.types.is_string_dtype(s):
+        s = s.astype(str).str.replace(r"[,$\s]", "", regex=True)
+    values = pd.to_numeric(s, errors="coerce").astype("float64")
+    present = values.dropna()
+    if (present % 1 != 0).any():
+        return values
+    if len(present) and (
+        present.min() < INT32_MIN or present.max() > INT32_MAX
+    ):
+        return values.astype("Int64")
+    return values.astype("Int32")
+
+
+def _to_date(s):
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    # 絕大多數是 YYYY-MM-DD，先用固定格式快速解析，其餘再逐筆判斷
+    parsed = pd.to_datetime(s, errors="coerce", format="%Y-%m-%d")
+    rest = parsed.isna() & _to_str(s).str.strip().ne("")
+    if rest.any():
+        parsed[rest] = pd.to_datetime(s[rest], errors="coerce", format="mixed")
+    return parsed
+
+
+def _to_category(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return _to_str(s).astype("category")
+
+
+_CONVERTERS = {
+    "date": _to_date,
+    "amount": _to_amount,
+    "category": _to_category,
+    "str": _to_str,
+}
+
+
+def apply_schema(name, df):
+    """依 SCHEMAS 轉型，回傳新的 DataFrame；未宣告的分頁/欄位維持原樣。"""
+    schema = SCHEMAS.get(name)
+    if not schema or df.empty:
+        return df
+    typed = {
+        col: _CONVERTERS[kind](df[col])
+        for col, kind in schema.items()
+        if col in df.columns
+    }
+    return df.assign(**typed)
+
+
+def append_rows(name, df, rows, columns):
+    """樂觀更新：把剛寫入的列 (原始值) 轉型後接到已轉型的資料後面。"""
+    new = apply_schema(name, pd.DataFrame(rows, columns=columns))
+    if df.empty:
+        return new
+    # 分類欄位先對齊類別，concat 後才會維持 category 型別
+    for col, kind in SCHEMAS.get(name, {}).items():
+        if kind != "category" or col not in df.columns or col not in new:
+            continue
+        cats = df[col].cat.categories.union(new[col].cat.categories)
+        df = df.assign(**{col: df[col].cat.set_categories(cats)})
+        new[col] = new[col].cat.set_categories(cats)
+    return pd.concat([df, new], ignore_index=True)
+
+
+def _widen_for(series, value):
+    """整數欄放不下 value 時先升級型別 (賦值時溢位會默默繞回，不會報錯)。"""
+    if isinstance(value, (float, np.floating)) and not pd.isna(value):
+        # 有小數的金額：整欄改成 float64，不四捨五入
+        return series.astype("float64")
+    if isinstance(value, (int, np.integer)):
+        info = np.iinfo(getattr(series.dtype, "numpy_dtype", series.dtype))
+        if not info.min <= value <= info.max:
+            # Int32 放不下的金額：整欄升成 Int64
+            return series.astype("Int64")
+    return series
+
+
+def set_cells(name, df, positions, changes):
+    """
+    把 changes {欄名: 原始值} 轉型後寫進 positions 這幾列 (位置索引)，
+    回傳新的 DataFrame，原本的不受影響 (Copy-on-Write)。
+    """
+    out = df.copy(deep=False)
+    schema = SCHEMAS.get(name, {})
+    for col, value in changes.items():
+        if col not in out.columns:
+            continue
+        raw = pd.Series([value])
+        typed = _CONVERTERS[schema[col]](raw) if col in schema else raw
+        series = out[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            new_value = str(typed.iloc[0])
+            if new_value not in series.cat.categories:
+                series = series.cat.add_categories([new_value])
+        else:
+            new_value = typed.iloc[0]
+            series = series.copy()
+            if pd.api.types.is_integer_dtype(series):
+                series = _widen_for(series, new_value)
+        try:
+            series.iloc[positions] = new_value
+        except (TypeError, ValueError):
+            # 未宣告型別的欄位 (例如整欄數字卻填入文字)：改成 object
+            series = series.astype(object)
+            series.iloc[positions] = new_value
+        out[col] = series
+    return out
+
+
+# --- 資料指紋 ---
+# 指紋綁在「這一個 DataFrame 物件」上 (id 對應，weakref 確認仍是同一個)，
+# 不放在 df.attrs：attrs 會被篩選、切片、assign 出來的新表繼承，
+# 內容已經不同卻沿用父表的指紋。共用快取交出去的表直接標上
+# 「分頁@版本」，其餘的表第一次用到時才雜湊內容。
+_FINGERPRINTS = {}
+_fingerprint_lock = threading.RLock()
+
+
+def _forget(key, ref):
+    with _fingerprint_lock:
+        if _FINGERPRINTS.get(key, (None,))[0] is ref:
+            del _FINGERPRINTS[key]
+
+
+def tag_fingerprint(df, token):
+    """指定 df 的指紋 (呼叫端保證同一個 token 代表同一份內容)。"""
+    key = id(df)
+    with _fingerprint_lock:
+        _FINGERPRINTS[key] = (
+            weakref.ref(df, lambda ref: _forget(key, ref)),
+            token,
+        )
+    return token
+
+
+def content_fingerprint(df):
+    """依內容算出的指紋 (大帳本要數十毫秒，只在必要時使用)。"""
+    if df is None or df.empty:
+        return "empty"
+    hashed = pd.util.hash_pandas_object(df, index=False).values
+    digest = hashlib.sha1(hashed.tobytes()).hexdigest()
+    return f"{digest}:{len(df)}:{','.join(map(str, df.columns))}"
+
+
+def fingerprint(df):
+    """快取用的資料指紋：標過的直接回傳，否則雜湊內容並記在這個物件上。"""
+    if df is None or df.empty:
+        return "empty"
+    with _fingerprint_lock:
+        ref, token = _FINGERPRINTS.get(id(df), (None, None))
+    if ref is not None and ref() is df:
+        return token
+    return tag_fingerprint(df, content_fingerprint(df))
+
+
+def in_month(dates, month):
+    """dates 落在 'YYYY-MM' 這個月份的布林遮罩 (datetime64 或字串皆可)。"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        start = pd.Timestamp(month + "-01")
+        end = start + pd.offsets.MonthBegin(1)
+        return (dates >= start) & (dates < end)
+    return dates.astype(str).str.startswith(month)
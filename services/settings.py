@@ -0,0 +1,103 @@
+import threading
+
+from services.storage import col_letter, to_cell_value
+
+# --- 設定 (Item → 列號索引) ---
+# Setting 分頁的內容放在 DataStore，這裡另外維護 {Item: Value} 與
+# {Item: 列號}。寫入時不再 find() 整張搜尋，數個 key 合併成一次
+# batch_update (新的 key 一次 append_rows)，成功後直接修改快取的 dict
+# 與 DataStore 裡的那幾格，不必丟棄重讀。
+# DataStore 的版本號變了 (背景核對發現外部修改、或被丟棄) 才重建索引。
+
+
+class SettingsStore:
+    def __init__(self, store, storage, name="Setting"):
+        self.store = store
+        self.storage = storage
+        self.name = name
+        self.values = {}
+        self._rows = {}
+        self._header = ["Item", "Value"]
+        self._size = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        # 呼叫端需持有 self._lock
+        if self._version == self.store.version(self.name):
+            return
+        df = self.store.get(self.name)
+        self._version = self.store.version(self.name)
+        self.values.clear()
+        self._rows.clear()
+        self._size = len(df)
+        if "Item" not in df.columns or "Value" not in df.columns:
+            return
+        self._header = [str(c) for c in df.columns]
+        for position, (item, value) in enumerate(zip(df["Item"], df["Value"])):
+            if item == "" or item in self._rows:
+                continue  # 重複的 Item 以第一列為準 (與舊版 find() 相同)
+            self._rows[item] = position + 2
+            self.values[item] = value
+
+    def get(self):
+        """回傳共用的 {Item: Value} (請勿直接修改)。"""
+        with self._lock:
+            self._sync()
+            return self.values
+
+    def update(self, changes):
+        """
+        changes: {Item: 新值}，只寫入真的有變的 key。
+        回傳實際寫入的 key；找不到 Setting 分頁時回傳 None。
+        """
+        with self._lock:
+            self._sync()
+            if not self.storage.worksheet(self.name):
+                return None
+            changed = {
+                k: v
+                for k, v in changes.items()
+                if k not in self.values or str(self.values[k]) != str(v)
+            }
+            if not changed:
+                return []
+            item_col = self._header.index("Item")
+            value_col = self._header.index("Value")
+            width = len(self._header)
+
+            existing = {k: v for k, v in changed.items() if k in self._rows}
+            added = {k: v for k, v in changed.items() if k not in self._rows}
+            value_letter = col_letter(value_col + 1)
+            if existing:
+                self.storage.batch_update(
+                    self.name,
+                    [
+                        {
+                            "range": f"{value_letter}{self._rows[k]}",
+                            "values": [[to_cell_value(v)]],
+                        }
+                        for k, v in existing.items()
+                    ],
+                )
+            new_rows = []
+            for k, v in added.items():
+                row = [""] * width
+                row[item_col] = k
+                row[value_col] = to_cell_value(v)
+                new_rows.append(row)
+            if new_rows:
+                self.storage.append_rows(self.name, new_rows)
+
+            # 寫入成功：修補 DataStore 與本地索引，版本號跟著前進
+            self.store.update_at(
+                self.name,
+                {self._rows[k] - 2: {"Value": v} for k, v in existing.items()},
+            )
+            self.store.append(self.name, new_rows)
+            for offset, k in enumerate(added):
+                self._rows[k] = self._size + 2 + offset
+            self._size += len(new_rows)
+            self.values.update(changed)
+            self._version = self.store.version(self.name)
+            return list(changed)
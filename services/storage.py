@@ -0,0 +1,798 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+from services.row_ids import ID_COLUMN
+
+# [優化] gspread (連帶 google-auth / requests) 匯入很慢，改在用到時才匯入
+
+# --- 各分頁的預設欄位 (SQLite 新建分頁時使用，順序需與 views 寫入的 row 一致) ---
+# 資料分頁最後一欄是隱藏的 _id (由 utils 寫入時自動補上)
+DEFAULT_HEADERS = {
+    "Finance": ["Date", "Week", "Item", "Price", "Type1", "Type2", ID_COLUMN],
+    "Income": ["Date", "Item", "Amount", "Type", "Note", ID_COLUMN],
+    "FixedExpenses": [
+        "Item",
+        "Type",
+        "Amount",
+        "PaidBy",
+        "Cycle",
+        "Detail",
+        ID_COLUMN,
+    ],
+    "Budget": ["Item", "Budget", ID_COLUMN],
+    "ReserveFund": ["Date", "Type", "Amount", "Note", ID_COLUMN],
+    "QuestBoard": [
+        "Name",
+        "Content",
+        "Type",
+        "Status",
+        "Deadline",
+        "Reward",
+        ID_COLUMN,
+    ],
+    "Adventures": [
+        "Name",
+        "Description",
+        "Status",
+        "StartDate",
+        "NotionLink",
+        "Type",
+        ID_COLUMN,
+    ],
+    "Setting": ["Item", "Value"],
+    # 舊年度封存後留下的每月摘要 (見 services/archive.py)
+    "ArchiveSummary": ["Sheet", "Month", "Category", "Rows", "Total"],
+}
+
+
+class SheetNotFound(LookupError):
+    """要寫入的分頁不存在 (寫入不能默默略過，否則資料會遺失)。"""
+
+
+_A1_RE = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+# --- A1 表示法工具 ---
+def a1_to_rowcol(label):
+    """'B5' -> (5, 2)；缺少欄或列時回傳 None 代表不限。"""
+    m = _A1_RE.match(label.strip())
+    if not m:
+        raise ValueError(f"無法解析範圍：{label}")
+    letters, digits = m.groups()
+    col = None
+    if letters:
+        col = 0
+        for ch in letters.upper():
+            col = col * 26 + (ord(ch) - 64)
+    row = int(digits) if digits else None
+    return row, col
+
+
+def col_letter(col):
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def parse_range(range_name):
+    """'A2:F9' -> (2, 1, 9, 6)，單一儲存格則終點等於起點。"""
+    if "!" in range_name:
+        range_name = range_name.split("!", 1)[1]
+    start, _, end = range_name.partition(":")
+    r1, c1 = a1_to_rowcol(start)
+    r2, c2 = a1_to_rowcol(end) if end else (r1, c1)
+    return r1 or 1, c1 or 1, r2, c2
+
+
+def to_cell_value(value):
+    """numpy / pandas 的純量轉成 Python 原生型別 (JSON 與 SQLite 才收得下)。"""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if pd.isna(value):
+        return ""
+    if isinstance(value, float):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def merge_row_blocks(rows):
+    """[5, 3, 4, 9] -> [(3, 5), (9, 9)]：把列號合併成連續區塊。"""
+    blocks = []
+    for row in sorted(set(rows)):
+        if blocks and row == blocks[-1][1] + 1:
+            blocks[-1] = (blocks[-1][0], row)
+        else:
+            blocks.append((row, row))
+    return blocks
+
+
+def cell_runs(cells):
+    """{欄號: 值} -> [(起始欄號, [值, ...]), ...]：相鄰的欄合併成一段。"""
+    runs = []
+    for col, value in sorted(cells.items()):
+        if runs and runs[-1][0] + len(runs[-1][1]) == col:
+            runs[-1][1].append(value)
+        else:
+            runs.append((col, [value]))
+    return runs
+
+
+def _cell_data(value):
+    # batchUpdate 的 updateCells 需要明確的型別 (效果等同 RAW 寫入)
+    value = to_cell_value(value)
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def values_to_frame(values):
+    """把 [header, row, ...] 轉成與 get_all_records() 相同格式的 DataFrame。"""
+    if not values:
+        return pd.DataFrame()
+    from gspread.utils import numericise_all
+
+    header = [str(h) for h in values[0]]
+    width = len(header)
+    rows = []
+    for raw in values[1:]:
+        row = list(raw[:width]) + [""] * (width - len(raw))
+        rows.append(numericise_all(row))
+    return pd.DataFrame(rows, columns=header)
+
+
+class Cell:
+    """與 gspread.Cell 相同的最小介面 (row / col / value)。"""
+
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+# --- 後端介面 ---
+class StorageBackend:
+    """
+    所有分頁讀寫的共同介面。
+    列號 (row) 一律沿用試算表慣例：第 1 列是標題，資料從第 2 列開始。
+    """
+
+    name = "base"
+
+    def worksheet(self, name):
+        """回傳具有 gspread Worksheet 介面的物件，找不到則回傳 None。"""
+        raise NotImplementedError
+
+    def append_rows(self, name, rows):
+        raise NotImplementedError
+
+    def create_sheet(self, name, header):
+        """建立分頁並寫入標題列 (已存在則不動)。"""
+        raise NotImplementedError
+
+    def replace_all(self, name, values):
+        """整張分頁覆寫，values 第一列為標題 (只用在小分頁)。"""
+        raise NotImplementedError
+
+    def batch_update(self, name, data):
+        """data: [{"range": "A2", "values": [[...]]}, ...]"""
+        raise NotImplementedError
+
+    def delete_rows(self, name, start, end=None):
+        raise NotImplementedError
+
+    def read_all(self, name):
+        """回傳 [header, row, ...]，分頁不存在時回傳 []。"""
+        raise NotImplementedError
+
+    def read_range(self, name, start_row, end_row=None):
+        """回傳 start_row 到 end_row (含) 的原始列，end_row=None 代表讀到底。"""
+        raise NotImplementedError
+
+    def read_frame(self, name):
+        return values_to_frame(self.read_all(name))
+
+    def read_column(self, name, col):
+        """第 col 欄 (1 起算) 由標題列往下的值。"""
+        return [
+            r[col - 1] if len(r) >= col else "" for r in self.read_all(name)
+        ]
+
+    def read_many(self, requests):
+        """requests: [(分頁, 起始列), ...]，各自讀到底；回傳 {分頁: 原始列}。"""
+        return {name: self.read_range(name, row) for name, row in requests}
+
+    def read_frames(self, names):
+        return {name: self.read_frame(name) for name in names}
+
+    def read_cells(self, name, cells):
+        """cells: [(列號, 欄號), ...]，回傳對應的值 (空白為 "")。"""
+        out = []
+        for row, col in cells:
+            values = self.read_range(name, row, row)
+            cells_in_row = values[0] if values else []
+            out.append(
+                cells_in_row[col - 1] if col <= len(cells_in_row) else ""
+            )
+        return out
+
+    def ensure_width(self, name, width):
+        """確保分頁至少有 width 欄 (試算表超出格線的範圍無法寫入)。"""
+
+    def discard_cache(self, name):
+        """資料可能被其他程式改過：丟棄後端自己的讀取快取。"""
+
+    def prime(self):
+        """啟動時的預備工作 (認證、開啟檔案)；預設不需要。"""
+
+    def apply_edits(self, name, updates, deletes):
+        """
+        一次套用多筆修改與刪除。
+        updates: {列號: {欄號 (1 起算): 值}} (只寫有改動的儲存格)，
+        deletes: [列號, ...]；回傳實際花掉的 API 呼叫次數。
+        """
+        if updates:
+            self.batch_update(
+                name,
+                [
+                    {"range": f"{col_letter(col)}{row}", "values": [values]}
+                    for row, cells in sorted(updates.items())
+                    for col, values in cell_runs(cells)
+                ],
+            )
+        # 由下往上刪，前面的列號才不會位移
+        for start, end in reversed(merge_row_blocks(deletes)):
+            self.delete_rows(name, start, end)
+        return 0
+
+
+# --- Google Sheets 後端 ---
+class GSpreadBackend(StorageBackend):
+    name = "gspread"
+
+    def __init__(self, open_spreadsheet, reset=None):
+        self._open = open_spreadsheet
+        self._reset = reset
+        self._sheets = {}
+        self._primed = False
+        self._lock = threading.Lock()
+
+    def prime(self):
+        """一次 metadata 請求取得所有分頁，取代逐一 sh.worksheet(name)。"""
+        sh = self._open()
+        if not sh:
+            return
+        sheets = sh.worksheets()
+        with self._lock:
+            for ws in sheets:
+                self._sheets.setdefault(ws.title, ws)
+            self._primed = True
+
+    def worksheet(self, name):
+        with self._lock:
+            if name in self._sheets:
+                return self._sheets[name]
+        sh = self._open()
+        if not sh:
+            return None
+        import gspread
+
+        try:
+            ws = sh.worksheet(name)
+        except gspread.WorksheetNotFound:
+            return None
+        except Exception as e:
+            # 如果發生錯誤 (例如連線逾時)，清除 spreadsheet 快取再試一次
+            if self._reset:
+                self._reset()
+            try:
+                ws = self._open().worksheet(name)
+            except:
+                print(f"Error fetching {name}: {e}")
+                return None
+        with self._lock:
+            self._sheets[name] = ws
+        return ws
+
+    def append_rows(self, name, rows):
+        ws = self.worksheet(name)
+        if not ws:
+            raise SheetNotFound(f"找不到分頁 {name}")
+        ws.append_rows(rows)
+
+    def create_sheet(self, name, header):
+        if self.worksheet(name):
+            return
+        ws = self._open().add_worksheet(
+            title=name, rows=1, cols=max(1, len(header))
+        )
+        ws.update([list(header)], "A1")
+        with self._lock:
+            self._sheets[name] = ws
+
+    def replace_all(self, name, values):
+        if not values:
+            return
+        if not self.worksheet(name):
+            self.create_sheet(name, values[0])
+        ws = self.worksheet(name)
+        width = max(len(r) for r in values)
+        rows = [
+            [to_cell_value(v) for v in r] + [""] * (width - len(r))
+            for r in values
+        ]
+        # 調整格線後整片覆寫 (多出來的舊列隨 resize 一起刪掉)
+        ws.resize(rows=len(rows), cols=width)
+        ws.update(rows, "A1")
+
+    def batch_update(self, name, data):
+        ws = self.worksheet(name)
+        if ws:
+            ws.batch_update(data)
+
+    def delete_rows(self, name, start, end=None):
+        ws = self.worksheet(name)
+        if ws:
+            ws.delete_rows(start, end)
+
+    def read_all(self, name):
+        ws = self.worksheet(name)
+        return ws.get_all_values() if ws else []
+
+    def read_range(self, name, start_row, end_row=None):
+        ws = self.worksheet(name)
+        if not ws:
+            return []
+        end = end_row if end_row else ""
+        return ws.get(f"A{start_row}:{col_letter(ws.col_count)}{end}")
+
+    def read_frame(self, name):
+        ws = self.worksheet(name)
+        if ws:
+            return pd.DataFrame(ws.get_all_records())
+        return pd.DataFrame()
+
+    def read_column(self, name, col):
+        # 只取一欄 (values.get A:A)，不下載整張分頁
+        ws = self.worksheet(name)
+        return [str(v) for v in ws.col_values(col)] if ws else []
+
+    def read_many(self, requests):
+        # 所有範圍放進同一個 values:batchGet，一次往返取回
+        if not self._primed:
+            self.prime()
+        out = {name: [] for name, _ in requests}
+        found = [(n, row) for n, row in requests if n in self._sheets]
+        if not found:
+            return out
+        from gspread.utils import absolute_range_name
+
+        ranges = [
+            absolute_range_name(
+                name, f"A{row}:{col_letter(self._sheets[name].col_count)}"
+            )
+            for name, row in found
+        ]
+        res = self._open().values_batch_get(ranges)
+        for (name, _), value_range in zip(found, res.get("valueRanges", [])):
+            out[name] = value_range.get("values", [])
+        return out
+
+    def read_frames(self, names):
+        values = self.read_many([(name, 1) for name in names])
+        return {name: values_to_frame(values[name]) for name in names}
+
+    def read_cells(self, name, cells):
+        # 多個儲存格同樣合併成一次 values:batchGet
+        if not cells or not self.worksheet(name):
+            return []
+        from gspread.utils import absolute_range_name
+
+        ranges = [
+            absolute_range_name(name, f"{col_letter(c)}{r}") for r, c in cells
+        ]
+        res = self._open().values_batch_get(ranges)
+        out = []
+        for value_range in res.get("valueRanges", []):
+            values = value_range.get("values", [])
+            out.append(values[0][0] if values and values[0] else "")
+        return out
+
+    def ensure_width(self, name, width):
+        ws = self.worksheet(name)
+        if ws and ws.col_count < width:
+            ws.add_cols(width - ws.col_count)
+
+    def apply_edits(self, name, updates, deletes):
+        # 修改與刪除全部塞進同一個 spreadsheets.batchUpdate：
+        # 先 updateCells (列號仍是原本的)，再由下往上 deleteDimension
+        ws = self.worksheet(name)
+        if not ws:
+            return 0
+        requests = []
+        for row, cells in sorted(updates.items()):
+            for col, values in cell_runs(cells):
+                requests.append(
+                    {
+                        "updateCells": {
+                            "rows": [
+                                {"values": [_cell_data(v) for v in values]}
+                            ],
+                            "fields": "userEnteredValue",
+                            "start": {
+                                "sheetId": ws.id,
+                                "rowIndex": row - 1,
+                                "columnIndex": col - 1,
+                            },
+                        }
+                    }
+                )
+        for start, end in reversed(merge_row_blocks(deletes)):
+            requests.append(
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": ws.id,
+                            "dimension": "ROWS",
+                            "startIndex": start - 1,
+                            "endIndex": end,
+                        }
+                    }
+                }
+            )
+        if not requests:
+            return 0
+        ws.spreadsheet.batch_update({"requests": requests})
+        return 1
+
+
+# --- SQLite 後端 ---
+class SQLiteBackend(StorageBackend):
+    """
+    本機 SQLite 後端：每個分頁一張表 (id 遞增維持列順序)，欄位 c0..cN 使用
+    SQLite 動態型別，數字寫進去就是數字，讀取時不需要再轉型。
+    讀出的 DataFrame 會留在記憶體，新增資料時直接接在尾端，
+    修改/刪除才丟棄重讀，所以大帳本的重複讀取只需幾毫秒。
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._frames = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheets "
+            "(name TEXT PRIMARY KEY, header TEXT, width INTEGER)"
+        )
+        self._conn.commit()
+        self._meta = {
+            name: (json.loads(header), width)
+            for name, header, width in self._conn.execute(
+                "SELECT name, header, width FROM sheets"
+            )
+        }
+
+    # 內部工具
+    @staticmethod
+    def _table(name):
+        return '"ws_' + name.replace('"', '""') + '"'
+
+    def _cols(self, width):
+        return ", ".join(f"c{i}" for i in range(width))
+
+    def _ensure(self, name):
+        """分頁不存在時依 DEFAULT_HEADERS 建立，未知分頁回傳 False。"""
+        if name in self._meta:
+            return True
+        if name not in DEFAULT_HEADERS:
+            return False
+        self.create_sheet(name, DEFAULT_HEADERS[name])
+        return True
+
+    def _widen(self, name, width):
+        header, cur = self._meta[name]
+        if width <= cur:
+            return
+        for i in range(cur, width):
+            self._conn.execute(
+                f"ALTER TABLE {self._table(name)} ADD COLUMN c{i}"
+            )
+        self._set_meta(name, header, width)
+
+    def _set_meta(self, name, header, width):
+        self._meta[name] = (header, width)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sheets (name, header, width) "
+            "VALUES (?, ?, ?)",
+            (name, json.dumps(header, ensure_ascii=False), width),
+        )
+
+    def _row_ids(self, name, start_row, count):
+        # 第 2 列是第一筆資料 -> OFFSET 0
+        cur = self._conn.execute(
+            f"SELECT id FROM {self._table(name)} ORDER BY id "
+            "LIMIT ? OFFSET ?",
+            (count, start_row - 2),
+        )
+        return [r[0] for r in cur]
+
+    def _count(self, name):
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM {self._table(name)}"
+        ).fetchone()[0]
+
+    def _insert(self, name, rows):
+        width = max([len(r) for r in rows] + [self._meta[name][1]])
+        self._widen(name, width)
+        padded = [
+            [to_cell_value(v) for v in r] + [""] * (width - len(r))
+            for r in rows
+        ]
+        marks = ", ".join("?" for _ in range(width))
+        self._conn.executemany(
+            f"INSERT INTO {self._table(name)} ({self._cols(width)}) "
+            f"VALUES ({marks})",
+            padded,
+        )
+
+    # 管理
+    def create_sheet(self, name, header):
+        with self._lock:
+            width = len(header)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table(name)} "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT"
+                + "".join(f", c{i}" for i in range(width))
+                + ")"
+            )
+            self._set_meta(name, list(header), width)
+            self._conn.commit()
+
+    def replace_all(self, name, values):
+        """整張分頁覆寫 (匯入/搬遷用)，values 第一列為標題。"""
+        if not values:
+            return
+        with self._lock:
+            self._conn.execute(f"DROP TABLE IF EXISTS {self._table(name)}")
+            self._meta.pop(name, None)
+            self._frames.pop(name, None)
+            self.create_sheet(name, [str(h) for h in values[0]])
+            if len(values) > 1:
+                self._insert(name, values[1:])
+            self._conn.commit()
+
+    def discard_cache(self, name):
+        with self._lock:
+            self._frames.pop(name, None)
+
+    # 介面實作
+    def worksheet(self, name):
+        with self._lock:
+            if not self._ensure(name):
+                return None
+        return SQLiteWorksheet(self, name)
+
+    def append_rows(self, name, rows):
+        if not rows:
+            return
+        with self._lock:
+            if not self._ensure(name):
+                raise SheetNotFound(f"找不到分頁 {name}")
+            self._insert(name, rows)
+            self._conn.commit()
+            frame = self._frames.get(name)
+            if frame is not None:
+                header = list(frame.columns)
+                new = pd.DataFrame(
+                    [
+                        (list(r) + [""] * len(header))[: len(header)]
+                        for r in rows
+                    ],
+                    columns=header,
+                )
+                self._frames[name] = pd.concat([frame, new], ignore_index=True)
+
+    def batch_update(self, name, data):
+        with self._lock:
+            if not self._ensure(name):
+                return
+            for item in data:
+                r1, c1, _, _ = parse_range(item["range"])
+                for offset, values in enumerate(item["values"]):
+                    self._write_row(name, r1 + offset, c1, list(values))
+            self._conn.commit()
+            self._frames.pop(name, None)
+
+    def _write_row(self, name, row, col, values):
+        header, width = self._meta[name]
+        if row == 1:
+            new_header = list(header) + [""] * (
+                col - 1 + len(values) - len(header)
+            )
+            new_header[col - 1 : col - 1 + len(values)] = [
+                str(v) for v in values
+            ]
+            self._widen(name, len(new_header))
+            self._set_meta(name, new_header, self._meta[name][1])
+            return
+        # 寫到最後一列之後：與試算表相同，中間補空白列
+        missing = row - 1 - self._count(name)
+        if missing > 0:
+            self._insert(name, [[] for _ in range(missing)])
+        self._widen(name, col - 1 + len(values))
+        row_id = self._row_ids(name, row, 1)[0]
+        sets = ", ".join(f"c{col - 1 + i} = ?" for i in range(len(values)))
+        self._conn.execute(
+            f"UPDATE {self._table(name)} SET {sets} WHERE id = ?",
+            [to_cell_value(v) for v in values] + [row_id],
+        )
+
+    def delete_rows(self, name, start, end=None):
+        end = end or start
+        if start < 2:
+            raise ValueError("不可刪除標題列")
+        with self._lock:
+            if not self._ensure(name):
+                return
+            ids = self._row_ids(name, start, end - start + 1)
+            self._conn.executemany(
+                f"DELETE FROM {self._table(name)} WHERE id = ?",
+                [(i,) for i in ids],
+            )
+            self._conn.commit()
+            self._frames.pop(name, None)
+
+    def read_all(self, name):
+        with self._lock:
+            if not self._ensure(name):
+                return []
+            header, width = self._meta[name]
+            rows = self._conn.execute(
+                f"SELECT {self._cols(width)} FROM {self._table(name)} "
+                "ORDER BY id"
+            ).fetchall()
+        return [list(header)] + [
+            ["" if v is None else v for v in r] for r in rows
+        ]
+
+    def read_range(self, name, start_row, end_row=None):
+        with self._lock:
+            if not self._ensure(name):
+                return []
+            header, width = self._meta[name]
+            out = []
+            if start_row <= 1:
+                out.append(list(header))
+                start_row = 2
+            limit = -1 if end_row is None else max(0, end_row - start_row + 1)
+            rows = self._conn.execute(
+                f"SELECT {self._cols(width)} FROM {self._table(name)} "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (limit, start_row - 2),
+            ).fetchall()
+        return out + [["" if v is None else v for v in r] for r in rows]
+
+    def read_frame(self, name):
+        with self._lock:
+            if not self._ensure(name):
+                return pd.DataFrame()
+            if name not in self._frames:
+                header, width = self._meta[name]
+                rows = self._conn.execute(
+                    f"SELECT {self._cols(len(header))} "
+                    f"FROM {self._table(name)} ORDER BY id"
+                ).fetchall()
+                df = pd.DataFrame.from_records(rows, columns=header)
+                self._frames[name] = df.fillna("") if rows else df
+            # 淺複製：呼叫端替換欄位不會影響快取
+            return self._frames[name].copy(deep=False)
+
+
+class SQLiteWorksheet:
+    """讓 views 不必修改：提供 views 用到的 gspread Worksheet 方法。"""
+
+    def __init__(self, backend, name):
+        self._backend = backend
+        self.title = name
+
+    @property
+    def row_count(self):
+        with self._backend._lock:
+            return self._backend._count(self.title) + 1
+
+    @property
+    def col_count(self):
+        return self._backend._meta[self.title][1]
+
+    def append_row(self, values, **kwargs):
+        self._backend.append_rows(self.title, [values])
+
+    def append_rows(self, values, **kwargs):
+        self._backend.append_rows(self.title, values)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # 相容舊版 gspread 的 update(range_name, values) 參數順序
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values
+        self._backend.batch_update(
+            self.title, [{"range": range_name or "A1", "values": values}]
+        )
+
+    def batch_update(self, data, **kwargs):
+        self._backend.batch_update(self.title, data)
+
+    def update_cell(self, row, col, value):
+        self.update(values=[[value]], range_name=f"{col_letter(col)}{row}")
+
+    def delete_rows(self, start_index, end_index=None):
+        self._backend.delete_rows(self.title, start_index, end_index)
+
+    def get_all_values(self, **kwargs):
+        return self._backend.read_all(self.title)
+
+    def get_all_records(self, **kwargs):
+        return self._backend.read_frame(self.title).to_dict("records")
+
+    def get(self, range_name=None, **kwargs):
+        if not range_name:
+            return self.get_all_values()
+        r1, c1, r2, c2 = parse_range(range_name)
+        rows = self._backend.read_range(self.title, r1, r2)
+        return [r[c1 - 1 : c2] if c2 else r[c1 - 1 :] for r in rows]
+
+    def find(self, query, in_row=None, in_column=None, case_sensitive=True):
+        for r, row in enumerate(self.get_all_values(), start=1):
+            if in_row and r != in_row:
+                continue
+            for c, value in enumerate(row, start=1):
+                if in_column and c != in_column:
+                    continue
+                if str(value) == str(query):
+                    return Cell(r, c, value)
+        return None
+
+
+# --- 搬遷工具：把 Google Sheet 內容複製到本機 SQLite ---
+def migrate(src, dst, names=None):
+    for name in names or DEFAULT_HEADERS:
+        values = src.read_all(name)
+        if values:
+            dst.replace_all(name, values)
+            print(f"已搬遷 {name}：{len(values) - 1} 列")
+
+
+if __name__ == "__main__":
+    # 用法：python -m services.storage [目標 db 路徑]
+    import sys
+
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    scope = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive",
+    ]
+    creds = ServiceAccountCredentials.from_json_keyfile_name(
+        "credentials.json", scope
+    )
+    sh = gspread.authorize(creds).open("LifeAdventure")
+    target = sys.argv[1] if len(sys.argv) > 1 else "lifeadventure.db"
+    migrate(GSpreadBackend(lambda: sh), SQLiteBackend(target))
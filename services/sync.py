@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from services.storage import values_to_frame
+
+# --- 增量同步 (Delta sync) ---
+# 每個分頁記住上次的列數與尾端幾列 (錨點) 的內容。
+# 下次更新只讀「上次最後幾列 + 之後新增的列」：
+#   - 尾端錨點列內容一致 -> 只是新增，把新列接上去
+#   - 錨點列對不上或變少 -> 上方有刪除/修改，改抓整張
+# 原地修改錨點以上的列不讀整張是看不出來的，所以本程式自己的修改會標記
+# dirty；在試算表上直接做的編輯則靠每隔 full_every 秒整張重抓一次接住
+# (以時間為準的備援，不做整張內容比對)。
+
+
+def _row_key(row):
+    # Values API 會省略列尾的空白儲存格，比對前先統一
+    cells = ["" if v is None else str(v) for v in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return "\x1f".join(cells)
+
+
+class SheetSync:
+    def __init__(self, backend, full_every=600, anchor_rows=3):
+        self.backend = backend
+        self.full_every = full_every
+        self.anchor_rows = anchor_rows
+        self.stats = {"full": 0, "delta": 0, "rows_fetched": 0}
+        self._state = {}
+        self._lock = threading.Lock()
+        self._sheet_locks = defaultdict(threading.Lock)
+
+    def invalidate(self, name):
+        """本程式改動了上方的列，下次改抓整張。"""
+        with self._lock:
+            self._state.pop(name, None)
+
+    def fetch(self, name):
+        return self.fetch_many([name])[name]
+
+    def fetch_many(self, names):
+        """所有分頁的尾端/整張範圍合併成一次 read_many (一個 batchGet)。"""
+        # 同一分頁一次只讓一個 session 更新，避免新列被接兩次
+        locks = [self._sheet_locks[n] for n in sorted(set(names))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            plan = {}
+            now = time.time()
+            for name in names:
+                state = self._state.get(name)
+                if state and now - state["full_at"] < self.full_every:
+                    # 資料第 1 筆在第 2 列；從錨點第一列開始讀到底
+                    plan[name] = state["rows"] + 2 - len(state["tail"])
+                else:
+                    plan[name] = 1
+            fetched = self.backend.read_many(list(plan.items()))
+
+            frames = {}
+            retry = []
+            for name, start_row in plan.items():
+                values = fetched.get(name, [])
+                if start_row == 1:
+                    frames[name] = self._store_full(name, values)
+                    continue
+                frame = self._apply_tail(name, values)
+                if frame is None:
+                    retry.append(name)
+                else:
+                    frames[name] = frame
+
+            if retry:
+                fetched = self.backend.read_many([(n, 1) for n in retry])
+                for name in retry:
+                    frames[name] = self._store_full(
+                        name, fetched.get(name, [])
+                    )
+            return frames
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def _store_full(self, name, values):
+        self.stats["full"] += 1
+        self.stats["rows_fetched"] += max(0, len(values) - 1)
+        if not values:
+            self.invalidate(name)
+            return pd.DataFrame()
+        header, rows = values[0], values[1:]
+        state = {
+            "header": header,
+            "rows": len(rows),
+            "tail": [_row_key(r) for r in rows[-self.anchor_rows :]],
+            "frame": values_to_frame(values),
+            "full_at": time.time(),
+        }
+        with self._lock:
+            self._state[name] = state
+        return state["frame"].copy(deep=False)
+
+    def _apply_tail(self, name, fetched):
+        state = self._state[name]
+        n = state["rows"]
+        anchors = state["tail"]
+        got = [_row_key(r) for r in fetched[: len(anchors)]]
+        if got != anchors:
+            return None
+        new_rows = fetched[len(anchors) :]
+        self.stats["delta"] += 1
+        self.stats["rows_fetched"] += len(fetched)
+        if new_rows:
+            new_frame = values_to_frame([state["header"]] + new_rows)
+            state["frame"] = pd.concat(
+                [state["frame"], new_frame], ignore_index=True
+            )
+            state["rows"] = n + len(new_rows)
+            state["tail"] = (anchors + [_row_key(r) for r in new_rows])[
+                -self.anchor_rows :
+            ]
+        return state["frame"].copy(deep=False)
+
+
+class TrackedWorksheet:
+    """
+    包住 Worksheet：views 直接 update_cell / delete_rows 後，
+    通知同步層該分頁要整張重抓 (新增列不影響，尾端比對就接得到)。
+    """
+
+    MUTATORS = {
+        "update",
+        "update_cell",
+        "update_cells",
+        "batch_update",
+        "delete_rows",
+        "insert_row",
+        "insert_rows",
+        "clear",
+    }
+
+    def __init__(self, ws, on_write):
+        self._ws = ws
+        self._on_write = on_write
+
+    def __getattr__(self, attr):
+        value = getattr(self._ws, attr)
+        if attr not in self.MUTATORS:
+            return value
+
+        def tracked(*args, **kwargs):
+            try:
+                return value(*args, **kwargs)
+            finally:
+                self._on_write(self._ws.title)
+
+        return tracked
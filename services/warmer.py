@@ -0,0 +1,66 @@
+import threading
+import time
+
+from services.scheduler import BACKGROUND, lane
+
+# --- 快取預熱 ---
+# 程式啟動時在背景先完成認證、開啟試算表並載入常用分頁，
+# 之後定期把被丟棄 (例如直接寫入後) 的分頁補回來，
+# 使用者開啟頁面時資料已在快取裡，不必看著「正在核對」等待。
+# 已載入分頁的內容更新由 DataStore 的背景核對負責。
+
+
+class CacheWarmer:
+    def __init__(self, store, sheets, prime=None, extras=(), interval=15.0):
+        """
+        store : DataStore
+        sheets: 要保持在快取中的分頁
+        prime : 啟動時先執行一次 (認證、開啟試算表)
+        extras: 每輪額外執行的預熱函式 (例如天氣)
+        """
+        self.store = store
+        self.sheets = list(sheets)
+        self.prime = prime
+        self.extras = list(extras)
+        self.interval = interval
+        self.stats = {
+            "runs": 0,
+            "warmed": 0,
+            "errors": 0,
+            "last_run_ms": 0.0,
+        }
+        self.last_error = None
+        self.ready = threading.Event()
+        self._primed = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="cache-warmer", daemon=True
+            )
+            self._thread.start()
+
+    def warm_once(self):
+        start = time.perf_counter()
+        try:
+            if not self._primed and self.prime:
+                self.prime()
+            self._primed = True
+            self.stats["warmed"] += len(self.store.warm(self.sheets))
+            for extra in self.extras:
+                extra()
+            self.last_error = None
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.last_error = repr(e)
+        finally:
+            self.stats["runs"] += 1
+            self.stats["last_run_ms"] = (time.perf_counter() - start) * 1000
+            self.ready.set()
+
+    def _run(self):
+        with lane(BACKGROUND):
+            while True:
+                self.warm_once()
+                time.sleep(self.interval)
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+# --- 天氣 (stale-while-revalidate) ---
+# 有快取就立即回傳 (即使已過期)，過期時另開背景執行緒更新，
+# 使用者的請求永遠不必等 OpenWeatherMap。所有請求共用同一個連線池
+# 並設定連線/讀取逾時；結果寫到磁碟，重新啟動後仍有上次的天氣可顯示。
+
+DEFAULT_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+
+def format_weather(city, payload):
+    return f"📍 {city} | 🌡️ {payload['main']['temp']:.1f}°C"
+
+
+class WeatherProvider:
+    def __init__(
+        self,
+        api_key,
+        base_url=DEFAULT_URL,
+        ttl=1800.0,
+        timeout=(3.05, 5.0),
+        cache_path="weather_cache.json",
+        first_wait=0.5,
+        retry_every=60.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache_path = cache_path
+        # 完全沒有快取時，最多等這麼久看背景請求能不能先回來
+        self.first_wait = first_wait
+        # 請求失敗後隔多久才再試 (避免 API 掛掉時每次 rerun 都打一次)
+        self.retry_every = retry_every
+        self.stats = {
+            "fresh": 0,
+            "stale": 0,
+            "miss": 0,
+            "fetch": 0,
+            "error": 0,
+        }
+        self.last_error = None
+        self._session = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._retry_at = {}
+        self._cache = self._load_disk()
+
+    # --- 磁碟快取 ---
+    def _load_disk(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_disk(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = json.dumps(self._cache, ensure_ascii=False)
+        tmp = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            self.last_error = repr(e)
+
+    @property
+    def session(self):
+        # [優化] requests 在第一次 (背景) 請求時才匯入，不拖慢啟動
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    # --- 讀取 ---
+    def get(self, city):
+        """回傳顯示用的字串；不會因為網路慢而卡住。"""
+        if not self.api_key:
+            return "📍 API未設定"
+        entry = self._cache.get(city)
+        if entry is None:
+            self.stats["miss"] += 1
+            worker = self.refresh_async(city)
+            if worker is not None and self.first_wait:
+                worker.join(self.first_wait)
+            entry = self._cache.get(city)
+            return entry["text"] if entry else f"📍 {city}"
+        if time.time() - entry["fetched_at"] < self.ttl:
+            self.stats["fresh"] += 1
+        else:
+            self.stats["stale"] += 1
+            self.refresh_async(city)
+        return entry["text"]
+
+    def refresh_async(self, city):
+        """同一城市同時只會有一個背景請求，回傳該執行緒。"""
+        with self._lock:
+            worker = self._inflight.get(city)
+            if worker is not None and worker.is_alive():
+                return worker
+            if time.time() < self._retry_at.get(city, 0):
+                return None
+            worker = threading.Thread(
+                target=self.refresh, args=(city,), daemon=True
+            )
+            self._inflight[city] = worker
+        worker.start()
+        return worker
+
+    def refresh(self, city):
+        self.stats["fetch"] += 1
+        try:
+            res = self.session.get(
+                self.base_url,
+                params={
+                    "q": city,
+                    "appid": self.api_key,
+                    "units": "metric",
+                    "lang": "zh_tw",
+                },
+                timeout=self.timeout,
+            )
+            res.raise_for_status()
+            text = format_weather(city, res.json())
+        except Exception as e:
+            # 失敗就保留舊值 (沒有舊值時畫面只顯示城市)，下次過期再試
+            self.stats["error"] += 1
+            self.last_error = repr(e)
+            self._retry_at[city] = time.time() + self.retry_every
+            return None
+        with self._lock:
+            self._cache[city] = {"text": text, "fetched_at": time.time()}
+        self._save_disk()
+        return text
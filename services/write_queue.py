@@ -0,0 +1,263 @@
+import json
+import sqlite3
+import threading
+import time
+
+from services.row_ids import ID_COLUMN
+from services.scheduler import BACKGROUND, lane
+from services.storage import to_cell_value
+
+# --- 延遲寫入佇列 (Write-behind) ---
+# 表單送出時只寫進本機日誌 (journal) 就立即回應，背景執行緒再把同一分頁
+# 累積的資料合併成一次 append_rows。日誌存在 SQLite，程式重啟後會繼續送出。
+# 429 的退避重試由 RequestScheduler 負責 (背景優先順序)。
+# 帶有 key (冪等鍵，就是該列的 _id) 的列在日誌裡不會重複；送出失敗後重送前，
+# 先確認試算表裡有沒有這些 _id (上次其實已寫入、只是沒收到回應)，有就略過。
+# 送出失敗的分頁以指數退避延後重送；連續失敗 max_attempts 次的列移到
+# failed 表 (不再擋住後面的列)，在同步狀態與診斷頁顯示，可手動重新排入。
+
+RETRY_CAP = 300  # 退避最長間隔 (秒)
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        backend,
+        path,
+        interval=10.0,
+        threshold=20,
+        max_attempts=5,
+    ):
+        self.backend = backend
+        self.interval = interval
+        self.threshold = threshold
+        self.max_attempts = max_attempts
+        self.flushed_rows = 0
+        self.flush_calls = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._retry_at = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, sheet TEXT, row TEXT, "
+            "created REAL, attempts INTEGER DEFAULT 0)"
+        )
+        columns = [
+            r[1] for r in self._conn.execute("PRAGMA table_info(pending)")
+        ]
+        if "key" not in columns:
+            # 舊版的日誌沒有 key 欄
+            self._conn.execute("ALTER TABLE pending ADD COLUMN key TEXT")
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS pending_key ON pending (key)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS failed ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, sheet TEXT, row TEXT, "
+            "key TEXT, created REAL, attempts INTEGER, error TEXT, "
+            "failed_at REAL)"
+        )
+        self._conn.commit()
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+
+    # --- 前景：寫入日誌 ---
+    def enqueue(self, sheet, row, key=None):
+        """寫進日誌；同一個 key 已在日誌裡時不再加入，回傳是否有加入。"""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO pending (sheet, row, created, key) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    sheet,
+                    json.dumps(
+                        [to_cell_value(v) for v in row], ensure_ascii=False
+                    ),
+                    time.time(),
+                    key,
+                ),
+            )
+            self._conn.commit()
+        if self.pending_count() >= self.threshold:
+            self._wake.set()
+        return cur.rowcount == 1
+
+    def pending(self, sheet):
+        """尚未送出的列 (讀取資料時疊加在雲端資料後面)。"""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row FROM pending WHERE sheet = ? ORDER BY id",
+                (sheet,),
+            )
+            return [json.loads(r[0]) for r in cur]
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending"
+            ).fetchone()[0]
+
+    # --- 送不出去的列 (dead letter) ---
+    def failed(self):
+        """[(id, 分頁, 列, 嘗試次數, 錯誤), ...]"""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, sheet, row, attempts, error FROM failed "
+                "ORDER BY id"
+            )
+            return [
+                (i, sheet, json.loads(row), attempts, error)
+                for i, sheet, row, attempts, error in cur
+            ]
+
+    def failed_count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM failed"
+            ).fetchone()[0]
+
+    def retry_failed(self, ids):
+        """移回日誌重新送出 (attempts 記為 1：送出前會先確認是否已寫入)。"""
+        with self._lock:
+            for i in ids:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO pending "
+                    "(sheet, row, created, key, attempts) "
+                    "SELECT sheet, row, created, key, 1 FROM failed "
+                    "WHERE id = ?",
+                    (i,),
+                )
+                self._conn.execute("DELETE FROM failed WHERE id = ?", (i,))
+            self._conn.commit()
+        self._retry_at.clear()
+        self._wake.set()
+
+    def discard_failed(self, ids):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM failed WHERE id = ?", [(i,) for i in ids]
+            )
+            self._conn.commit()
+
+    # --- 背景：批次送出 ---
+    def _run(self):
+        with lane(BACKGROUND):
+            while True:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                try:
+                    self.flush(backoff=True)
+                except Exception as e:
+                    # 錯誤留在 last_error，由同步狀態與診斷頁顯示
+                    self.last_error = str(e)
+
+    def flush(self, backoff=False):
+        """
+        每個分頁一次 append_rows；失敗的列留在日誌下次再送。
+        backoff=True (背景執行緒) 時略過還在退避中的分頁。
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries = self._conn.execute(
+                    "SELECT id, sheet, row, key, attempts FROM pending "
+                    "ORDER BY id"
+                ).fetchall()
+            grouped = {}
+            retried = {}
+            for row_id, sheet, row, key, attempts in entries:
+                ids, rows = grouped.setdefault(sheet, ([], []))
+                ids.append(row_id)
+                rows.append(json.loads(row))
+                if key and attempts:
+                    retried.setdefault(sheet, {})[row_id] = key
+
+            failures = 0
+            for sheet, (ids, rows) in grouped.items():
+                if backoff and self._retry_at.get(sheet, 0) > time.time():
+                    continue
+                try:
+                    if sheet in retried:
+                        ids, rows = self._skip_written(
+                            sheet, ids, rows, retried[sheet]
+                        )
+                    if rows:
+                        self.backend.append_rows(sheet, rows)
+                except Exception as e:
+                    failures += 1
+                    self.last_error = f"{sheet}: {e}"
+                    self._failed(sheet, ids, str(e))
+                    continue
+                self._retry_at.pop(sheet, None)
+                with self._lock:
+                    self._conn.executemany(
+                        "DELETE FROM pending WHERE id = ?",
+                        [(i,) for i in ids],
+                    )
+                    self._conn.commit()
+                if rows:
+                    self.flushed_rows += len(rows)
+                    self.flush_calls += 1
+            if entries and not failures and not self._retry_at:
+                self.last_error = None
+            return len(entries)
+
+    def _failed(self, sheet, ids, error):
+        """記一次失敗：排定下次重送時間，次數用完的列移到 failed 表。"""
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pending SET attempts = attempts + 1 "
+                f"WHERE id IN ({marks})",
+                ids,
+            )
+            attempts = self._conn.execute(
+                f"SELECT MAX(attempts) FROM pending WHERE id IN ({marks})",
+                ids,
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO failed "
+                "(sheet, row, key, created, attempts, error, failed_at) "
+                "SELECT sheet, row, key, created, attempts, ?, ? "
+                f"FROM pending WHERE id IN ({marks}) AND attempts >= ?",
+                [error, time.time(), *ids, self.max_attempts],
+            )
+            self._conn.execute(
+                f"DELETE FROM pending WHERE id IN ({marks}) AND attempts >= ?",
+                [*ids, self.max_attempts],
+            )
+            self._conn.commit()
+        delay = min(self.interval * 2 ** ((attempts or 1) - 1), RETRY_CAP)
+        self._retry_at[sheet] = time.time() + delay
+
+    def _skip_written(self, sheet, ids, rows, keys):
+        """
+        重送前排除已經在試算表裡的列 (上次其實已寫入)。
+        只讀 _id 那一欄，不下載整張分頁。
+        """
+        # _id 在列裡的位置就是要讀的那一欄
+        col = next(
+            (r.index(keys[i]) for i, r in zip(ids, rows) if keys.get(i) in r),
+            None,
+        )
+        if col is None:
+            return ids, rows
+        column = self.backend.read_column(sheet, col + 1)
+        if not column or column[0] != ID_COLUMN:
+            return ids, rows
+        written = set(column[1:])
+        done = [i for i in ids if keys.get(i) in written]
+        if done:
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM pending WHERE id = ?", [(i,) for i in done]
+                )
+                self._conn.commit()
+        keep = [(i, r) for i, r in zip(ids, rows) if i not in done]
+        return [i for i, _ in keep], [r for _, r in keep]
@@ -0,0 +1,139 @@
+"""
+還沒補上 _id 的試算表 (舊版部署) 也要能正常瀏覽與新增：
+所有頁面不得拋出例外，修改/刪除的控制項要停用並提示到設定頁補上。
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from bench.datagen import workbook
+from services.row_ids import ID_COLUMN, ID_SHEETS
+from services.storage import SQLiteBackend
+
+APP = os.path.join(ROOT, "app.py")
+PAGES = ["我的小屋", "冒險日誌", "任務看板", "接取任務追蹤"]
+FINANCE_TABS = [
+    "📊 總覽",
+    "📝 支出",
+    "💰 收入",
+    "🏛️ 固定",
+    "📅 預算",
+    "🏦 預備金",
+]
+
+
+def _without_ids(values):
+    pos = values[0].index(ID_COLUMN)
+    return [row[:pos] + row[pos + 1 :] for row in values]
+
+
+def _blank_ids(values, count=2):
+    # 遷移後才在試算表上直接新增的列：有 _id 欄但內容空白
+    # (每種狀態各挑幾列，任務看板/追蹤/冒險日誌的卡片才都會出現)
+    header = values[0]
+    pos = header.index(ID_COLUMN)
+    rows = [list(r) for r in values]
+    status = header.index("Status") if "Status" in header else None
+    seen = {}
+    for row in rows[1:]:
+        group = row[status] if status is not None else None
+        if seen.get(group, 0) < count:
+            seen[group] = seen.get(group, 0) + 1
+            row[pos] = ""
+            if "NotionLink" in header:
+                row[header.index("NotionLink")] = ""
+    return rows
+
+
+def _open(tmp_path, prepare):
+    db = str(tmp_path / "sheets.db")
+    backend = SQLiteBackend(db)
+    for name, values in workbook(200).items():
+        if name in ID_SHEETS:
+            values = prepare(values)
+        backend.replace_all(name, values)
+    # 後端、佇列等 cache_resource 是整個行程共用的，每個測試換一份資料
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["storage"] = {
+        "backend": "sqlite",
+        "path": db,
+        "journal": str(tmp_path / "writebehind.db"),
+        "verify_every": 0,
+        "flush_interval": 3600,
+        "flush_threshold": 100000,
+    }
+    at.run()
+    return at, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    return _open(tmp_path, _without_ids)
+
+
+@pytest.fixture
+def blank_app(tmp_path):
+    return _open(tmp_path, _blank_ids)
+
+
+def _assert_clean(at):
+    assert not at.exception, [e.value for e in at.exception]
+    # 任務看板/冒險日誌會把例外接住改用 st.error 顯示
+    assert not at.error, [e.value for e in at.error]
+
+
+def test_pages_render_without_ids(app):
+    at, _ = app
+    _assert_clean(at)
+    for page in PAGES:
+        at.sidebar.radio[0].set_value(page).run()
+        _assert_clean(at)
+    at.sidebar.radio[0].set_value("商會").run()
+    for tab in FINANCE_TABS:
+        at.radio(key="fin_nav").set_value(tab).run()
+        _assert_clean(at)
+
+
+def test_pages_render_with_blank_ids(blank_app):
+    at, _ = blank_app
+    _assert_clean(at)
+    for page in PAGES:
+        at.sidebar.radio[0].set_value(page).run()
+        _assert_clean(at)
+    at.sidebar.radio[0].set_value("商會").run()
+    at.radio(key="fin_nav").set_value("🏛️ 固定").run()
+    _assert_clean(at)
+
+
+def test_edit_controls_point_to_migration(app):
+    at, _ = app
+    at.sidebar.radio[0].set_value("商會").run()
+    at.radio(key="fin_nav").set_value("📝 支出").run()
+    assert any("補上列 ID" in i.value for i in at.info)
+    assert not [b for b in at.button if b.key == "expense_save"]
+
+
+def test_append_adds_id_column(app):
+    at, db = app
+    at.sidebar.radio[0].set_value("商會").run()
+    at.radio(key="fin_nav").set_value("📝 支出").run()
+    at.text_input(key="exp_item").set_value("測試").run()
+    at.button(key="exp_submit").click().run()
+    _assert_clean(at)
+    # 新增的列先進延遲寫入佇列，送出後再檢查分頁
+    import utils
+
+    utils.get_write_queue().flush()
+    values = SQLiteBackend(db).read_all("Finance")
+    assert values[0][-1] == ID_COLUMN
+    assert values[-1][-1].startswith("r")
+    assert values[-1][2] == "測試"
@@ -1,12 +1,44 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import os
-import requests
-import google.generativeai as genai
-import pandas as pd
 import concurrent.futures
-import random
+import threading
+import pandas as pd
+from datetime import date
+
+from services import archive, ledger_index, ledger_view, memory, metrics
+from services.archive import (
+    ARCHIVE_SHEETS,
+    SUMMARY_SHEET,
+    ArchiveReader,
+    ParquetArchive,
+    SheetArchive,
+)
+from services.datastore import DataStore
+from services.instrument import recorder
+from services.reserve import ReserveLedger
+from services.row_ids import (
+    ID_COLUMN,
+    ID_SHEETS,
+    MIGRATE_HINT,
+    RowIdIndex,
+    new_id,
+)
+from services.storage import (
+    DEFAULT_HEADERS,
+    GSpreadBackend,
+    SheetNotFound,
+    SQLiteBackend,
+    col_letter,
+    merge_row_blocks,
+    to_cell_value,
+)
+from services.scheduler import RequestScheduler
+from services.schema import apply_schema
+from services.settings import SettingsStore
+from services.sync import SheetSync, TrackedWorksheet
+from services.weather import DEFAULT_URL, WeatherProvider
+from services.warmer import CacheWarmer
+from services.write_queue import WriteBehindQueue
 
 # --- 常數 ---
 SHEET_NAME = "LifeAdventure"
@@ -22,6 +54,7 @@ CITY_OPTIONS = [
 
 
 # --- API 初始化 ---
+# [優化] 不在 import 時讀取 secrets，用到時才讀
 def init_api():
     w_key = ""
     g_key = ""
@@ -31,12 +64,38 @@ def init_api():
     return w_key, g_key
 
 
-WEATHER_API_KEY, GEMINI_API_KEY = init_api()
-
-
 # --- Google Sheet 連線 ---
+# gspread / oauth2client 匯入很慢 (連帶 google-auth、requests)，
+# 只有真的要連線時才匯入
 @st.cache_resource
 def get_client():
+    import gspread
+
+    conf = get_storage_config()
+    cassette = conf.get("cassette")
+    if cassette and conf.get("cassette_mode", "record") == "replay":
+        from services.cassette import ReplaySession
+
+        # 重播錄好的請求：不需要憑證，也不連網路
+        client = gspread.Client(None, session=ReplaySession(cassette))
+    else:
+        client = gspread.authorize(_load_credentials())
+        if cassette:
+            from services.cassette import RecordingSession
+
+            client.http_client.session = RecordingSession(
+                client.http_client.session, cassette
+            )
+    # 每個真正送出的請求都記下延遲與位元組 (排隊時間不算在內)
+    recorder.trace_http(client.http_client)
+    # [優化] 所有 Sheets 請求都經過配額排程 (令牌桶 + 優先順序)
+    get_scheduler().wrap(client.http_client)
+    return client
+
+
+def _load_credentials():
+    from oauth2client.service_account import ServiceAccountCredentials
+
     scope = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
@@ -53,7 +112,7 @@ def get_client():
     else:
         st.error("找不到憑證！")
         st.stop()
-    return gspread.authorize(creds)
+    return creds
 
 
 @st.cache_resource
@@ -66,73 +125,866 @@ def get_spreadsheet():
         return None
 
 
+# --- 儲存後端 ---
+# 在 .streamlit/secrets.toml 設定：
+# [storage]
+# backend = "sqlite"          # 預設 "gspread"
+# path = "lifeadventure.db"
+# journal = "writebehind.db"   # 延遲寫入日誌
+# sync = "delta"               # "full" 則每次整張重抓
+# full_sync_every = 600        # 增量模式下，整張重抓的間隔秒數
+# quota_per_minute = 60        # Sheets API 每分鐘配額 (讀、寫各自計算)
+# write_wait = 8               # 畫面最多等寫入幾秒，之後改在背景繼續重試
+# cassette = "actions.jsonl"   # 把所有 Sheets 請求錄進這個檔 (見 services/cassette.py)
+# cassette_mode = "record"     # "replay" 則改用錄好的回應，不連線也不需要憑證
+def get_storage_config():
+    if "storage" in st.secrets:
+        return dict(st.secrets["storage"])
+    return {}
+
+
+# 這些後端呼叫都會記錄次數與延遲 (見 services/instrument.py)
+STORAGE_CALLS = {
+    "append_rows",
+    "batch_update",
+    "delete_rows",
+    "read_all",
+    "read_range",
+    "read_frame",
+    "read_column",
+    "read_many",
+    "read_frames",
+    "read_cells",
+    "apply_edits",
+}
+WORKSHEET_CALLS = {
+    "append_row",
+    "append_rows",
+    "update",
+    "update_cell",
+    "update_cells",
+    "batch_update",
+    "delete_rows",
+    "insert_row",
+    "insert_rows",
+    "find",
+    "get",
+    "get_all_values",
+    "get_all_records",
+}
+
+
+@st.cache_resource
+def get_storage():
+    conf = get_storage_config()
+    if conf.get("backend", "gspread") == "sqlite":
+        backend = SQLiteBackend(conf.get("path", "lifeadventure.db"))
+    else:
+        backend = GSpreadBackend(get_spreadsheet, get_spreadsheet.clear)
+    return recorder.traced(backend, "storage", STORAGE_CALLS)
+
+
+# --- 請求排程 ---
+@st.cache_resource
+def get_scheduler():
+    conf = get_storage_config()
+    return RequestScheduler(per_minute=float(conf.get("quota_per_minute", 60)))
+
+
+class WriteResult:
+    """寫入結果：done 已完成、pending 仍在背景重試、failed 失敗 (error)。"""
+
+    DONE = "done"
+    PENDING = "pending"
+    FAILED = "failed"
+
+    def __init__(self, status, value=None, error=None):
+        self.status = status
+        self.value = value
+        self.error = error
+
+    @property
+    def done(self):
+        return self.status == self.DONE
+
+    @property
+    def failed(self):
+        return self.status == self.FAILED
+
+
+def run_sheet_write(fn, *args):
+    """
+    [優化] 寫入交給排程器的工作執行緒執行 (429 時在那裡退避重試)，
+    畫面最多等 write_wait 秒；還沒完成就回傳 pending，寫入在背景繼續
+    (之後失敗會顯示在側邊欄的同步狀態)。
+    """
+    wait = float(get_storage_config().get("write_wait", 8))
+    # 工作執行緒裡的請求仍算在目前的頁面 (效能量測用)
+    future = get_scheduler().submit(recorder.bind(fn), *args)
+    try:
+        return WriteResult(WriteResult.DONE, future.result(timeout=wait))
+    except concurrent.futures.TimeoutError:
+        return WriteResult(WriteResult.PENDING)
+    except Exception as e:
+        # 例如 locate_rows 的 KeyError (資料列已被刪除或位置變動)
+        return WriteResult(
+            WriteResult.FAILED, error=e.args[0] if e.args else repr(e)
+        )
+
+
+def write_feedback(result, message):
+    """
+    依寫入結果顯示訊息，回傳是否可以 rerun
+    (失敗時不 rerun，錯誤訊息才會留在畫面上)。
+    """
+    if result.status == WriteResult.DONE:
+        st.success(message)
+    elif result.status == WriteResult.PENDING:
+        # toast 在 rerun 之後仍會顯示
+        st.toast("⏳ 雲端寫入頻繁，已排入背景重試", icon="⚠️")
+    else:
+        st.error(f"寫入失敗：{result.error}")
+        return False
+    return True
+
+
 # [重要修正] 加上快取機制，解決頻繁操作導致的 API 額度超標問題
-@st.cache_resource(ttl=3600)
+# (Worksheet 物件由後端自行快取，重試邏輯也移到 GSpreadBackend)
+@recorder.wrap
 def get_worksheet(worksheet_name):
-    sh = get_spreadsheet()
-    if sh:
+    ws = get_storage().worksheet(worksheet_name)
+    if ws is None:
+        return None
+    ws = recorder.traced(ws, "worksheet", WORKSHEET_CALLS, worksheet_name)
+    return TrackedWorksheet(ws, _on_direct_write)
+
+
+# --- 增量同步 ---
+@st.cache_resource
+def get_sheet_sync():
+    conf = get_storage_config()
+    return SheetSync(
+        get_storage(), full_every=float(conf.get("full_sync_every", 600))
+    )
+
+
+def use_delta_sync():
+    # 本機 SQLite 讀取本來就快，增量同步只用在 Google Sheets
+    conf = get_storage_config()
+    return (
+        conf.get("sync", "delta") == "delta"
+        and get_storage().name == "gspread"
+    )
+
+
+def mark_sheet_dirty(worksheet_name):
+    get_sheet_sync().invalidate(worksheet_name)
+
+
+def _on_direct_write(worksheet_name):
+    # 直接透過 Worksheet 寫入的改動無法修補快取，只能丟棄重讀
+    mark_sheet_dirty(worksheet_name)
+    get_data_store().invalidate(worksheet_name)
+
+
+def read_sheet_frames(worksheet_names):
+    if use_delta_sync():
+        return get_sheet_sync().fetch_many(worksheet_names)
+    return get_storage().read_frames(worksheet_names)
+
+
+def read_sheet_frame(worksheet_name):
+    return read_sheet_frames([worksheet_name])[worksheet_name]
+
+
+# --- 穩定列 ID ---
+# 寫入一律以 _id 指定資料列，列號由整個程式共用的索引換算，
+# 不再用畫面上 DataFrame 的 index + 2 (別的 session 增刪列後就會錯位)。
+@st.cache_resource
+def get_row_index():
+    return RowIdIndex()
+
+
+def sheet_header(worksheet_name):
+    """
+    目前的標題列：索引已載入就用索引的，否則向分頁讀第一列
+    (不拿 DEFAULT_HEADERS 猜，欄位順序被改過時會寫錯欄)。
+    """
+    header = get_row_index().header(worksheet_name)
+    if header:
+        return header
+    if get_storage().worksheet(worksheet_name) is None:
+        raise SheetNotFound(f"找不到分頁 {worksheet_name}")
+    rows = get_storage().read_range(worksheet_name, 1, 1)
+    return [str(v) for v in rows[0]] if rows else []
+
+
+def id_column_position(worksheet_name):
+    """_id 在第幾欄 (1 起算)；分頁還沒有 _id 欄時拒絕寫入。"""
+    header = sheet_header(worksheet_name)
+    if ID_COLUMN not in header:
+        raise KeyError(
+            f"{worksheet_name} 還沒有 {ID_COLUMN} 欄，{MIGRATE_HINT}"
+        )
+    return header.index(ID_COLUMN) + 1
+
+
+_id_column_lock = threading.Lock()
+
+
+def ensure_id_column(worksheet_name):
+    """
+    新增資料用：分頁還沒有 _id 欄時只補上標題這一格，新的列就能帶 ID
+    (舊資料列的 _id 仍由設定頁補上)，回傳 _id 在第幾欄。
+    """
+    with _id_column_lock:
+        header = sheet_header(worksheet_name)
+        if ID_COLUMN in header:
+            return header.index(ID_COLUMN) + 1
+        if not header:
+            raise KeyError(f"{worksheet_name} 沒有標題列，無法新增資料")
+        col = len(header) + 1
+        storage = get_storage()
+        storage.ensure_width(worksheet_name, col)
+        storage.batch_update(
+            worksheet_name,
+            [{"range": f"{col_letter(col)}1", "values": [[ID_COLUMN]]}],
+        )
+        # 索引與共用快取都要換成有 _id 欄的版本
+        refresh_row_index(worksheet_name)
+        reload_sheet_data([worksheet_name])
+        return col
+
+
+# 載入時發現缺少 _id 的列數 {分頁: 筆數}；讀取不寫回，由設定頁手動補上
+_missing_row_ids = {}
+
+
+def missing_row_ids():
+    return {name: n for name, n in _missing_row_ids.items() if n}
+
+
+def _missing_id_positions(df):
+    if ID_COLUMN not in df.columns:
+        return list(range(len(df)))
+    ids = df[ID_COLUMN].fillna("").astype(str).str.strip()
+    return ids.eq("").to_numpy().nonzero()[0].tolist()
+
+
+def _write_row_ids(worksheet_name, df):
+    """
+    補上缺少的 _id (第一次使用時整欄補齊，之後只有手動在試算表新增的列)，
+    全部合併成一次 batch_update 寫回，回傳補上的筆數。
+    """
+    missing = _missing_id_positions(df)
+    has_column = ID_COLUMN in df.columns
+    if has_column and not missing:
+        return 0
+    columns = list(df.columns)
+    col = columns.index(ID_COLUMN) + 1 if has_column else len(columns) + 1
+    letter = col_letter(col)
+    if has_column:
+        ids = df[ID_COLUMN].fillna("").astype(str).str.strip().tolist()
+    else:
+        ids = [""] * len(df)
+    for pos in missing:
+        ids[pos] = new_id()
+    data = []
+    if not has_column:
+        data.append({"range": f"{letter}1", "values": [[ID_COLUMN]]})
+    for start, end in merge_row_blocks([pos + 2 for pos in missing]):
+        data.append(
+            {
+                "range": f"{letter}{start}:{letter}{end}",
+                "values": [[rid] for rid in ids[start - 2 : end - 1]],
+            }
+        )
+    storage = get_storage()
+    storage.ensure_width(worksheet_name, col)
+    storage.batch_update(worksheet_name, data)
+    return len(missing)
+
+
+def migrate_row_ids(worksheet_names=None):
+    """
+    [遷移] 為還沒有 _id 的分頁/資料列補上 ID，回傳 {分頁: 補上的筆數}。
+    只在設定頁按下按鈕 (或封存前) 執行，一般讀取與背景核對都不會寫入。
+    """
+    names = [
+        name
+        for name in (worksheet_names or sorted(ID_SHEETS))
+        if name in ID_SHEETS and get_storage().worksheet(name) is not None
+    ]
+    # 佇列裡的列已帶有 _id，先送出才不會被當成缺少
+    get_write_queue().flush()
+    report = {}
+    for name in names:
+        get_storage().discard_cache(name)
+        df = read_sheet_frame(name)
+        if len(df.columns) == 0:
+            continue
         try:
-            return sh.worksheet(worksheet_name)
-        except gspread.WorksheetNotFound:
-            return None
-        except Exception as e:
-            # 如果發生錯誤 (例如連線逾時)，清除 spreadsheet 快取再試一次
-            get_spreadsheet.clear()
-            try:
-                sh = get_spreadsheet()
-                return sh.worksheet(worksheet_name)
-            except:
-                print(f"Error fetching {worksheet_name}: {e}")
-                return None
-    return None
+            report[name] = _write_row_ids(name, df)
+        finally:
+            mark_sheet_dirty(name)
+        refresh_row_index(name)
+    reload_sheet_data(names)
+    return {name: n for name, n in report.items() if n}
+
+
+def index_row_ids(worksheet_name, df):
+    """用剛載入的資料 (含尚未送出的列) 重建該分頁的 ID -> 列號索引。"""
+    if worksheet_name not in ID_SHEETS:
+        return
+    if ID_COLUMN in df.columns:
+        ids = df[ID_COLUMN].tolist()
+    else:
+        # 還沒有 _id 欄：佔住位置，之後新增的列號才算得對
+        ids = [""] * len(df)
+    get_row_index().load(worksheet_name, list(df.columns), ids)
+
+
+def _prepare_frame(worksheet_name, df):
+    if worksheet_name in ID_SHEETS and len(df.columns):
+        _missing_row_ids[worksheet_name] = len(_missing_id_positions(df))
+    df = with_pending_rows(worksheet_name, df)
+    index_row_ids(worksheet_name, df)
+    return df
+
+
+def refresh_row_index(worksheet_name):
+    # 索引對不上 (試算表被其他地方改過)：整張重抓一次重建
+    mark_sheet_dirty(worksheet_name)
+    get_storage().discard_cache(worksheet_name)
+    _prepare_frame(worksheet_name, read_sheet_frame(worksheet_name))
+
+
+def _flush_if_pending(worksheet_name, row_ids):
+    # 要修改的列還在延遲寫入佇列裡，先送出才有列號
+    queue = get_write_queue()
+    pending = queue.pending(worksheet_name)
+    if not pending:
+        return
+    pos = id_column_position(worksheet_name) - 1
+    pending_ids = {str(r[pos]) for r in pending if len(r) > pos}
+    if pending_ids.intersection(row_ids):
+        queue.flush()
+
+
+def _rows_match(worksheet_name, rows):
+    # 寫入前讀一次目標列的 _id (一次 API 呼叫) 確認沒有錯位
+    col = id_column_position(worksheet_name)
+    cells = [(row, col) for row in rows.values()]
+    found = get_storage().read_cells(worksheet_name, cells)
+    return [str(v) for v in found] == list(rows)
+
+
+def locate_rows(worksheet_name, row_ids):
+    """_id -> 目前的列號；找不到或對不上時重新整理索引，仍找不到則 KeyError。"""
+    row_ids = [str(rid) for rid in row_ids]
+    if "" in [rid.strip() for rid in row_ids]:
+        raise KeyError(
+            f"{worksheet_name} 有資料列還沒有 {ID_COLUMN}，{MIGRATE_HINT}"
+        )
+    _flush_if_pending(worksheet_name, row_ids)
+    index = get_row_index()
+    rows = {rid: index.row_of(worksheet_name, rid) for rid in row_ids}
+    if None in rows.values() or not _rows_match(worksheet_name, rows):
+        refresh_row_index(worksheet_name)
+        rows = {rid: index.row_of(worksheet_name, rid) for rid in row_ids}
+        missing = [rid for rid, row in rows.items() if row is None]
+        if missing:
+            raise KeyError(
+                f"{worksheet_name} 找不到資料列：{', '.join(missing)}"
+            )
+        # 重抓後仍對不上 (寫入途中又被改動)：寧可失敗也不寫錯列
+        if not _rows_match(worksheet_name, rows):
+            raise KeyError(f"{worksheet_name} 的資料列位置已變動，請重試")
+    return rows
+
+
+def update_row_by_id(worksheet_name, row_id, changes):
+    """changes: {欄名: 新值}，同一列的數個欄位一次寫入。"""
+    return run_sheet_write(_update_row_by_id, worksheet_name, row_id, changes)
+
+
+def _update_row_by_id(worksheet_name, row_id, changes):
+    row = locate_rows(worksheet_name, [row_id])[str(row_id)]
+    header = get_row_index().header(worksheet_name) or []
+    unknown = set(changes) - set(header)
+    if unknown:
+        raise KeyError(f"{worksheet_name} 沒有欄位：{', '.join(unknown)}")
+    data = [
+        {
+            "range": f"{col_letter(header.index(col) + 1)}{row}",
+            "values": [[to_cell_value(value)]],
+        }
+        for col, value in changes.items()
+    ]
+    try:
+        get_storage().batch_update(worksheet_name, data)
+    finally:
+        mark_sheet_dirty(worksheet_name)
+    get_data_store().update(worksheet_name, {str(row_id): changes})
+
+
+def delete_rows_by_id(worksheet_name, row_ids):
+    return apply_sheet_edits(worksheet_name, {}, row_ids)
+
+
+def apply_sheet_edits(worksheet_name, updates, deletes):
+    """
+    多筆修改/刪除一次送出，回傳 WriteResult。
+    updates: {_id: {欄名: 新值}} (只有改動的欄位)，deletes: [_id, ...]
+    """
+    return run_sheet_write(
+        _apply_sheet_edits, worksheet_name, updates, deletes
+    )
+
+
+def _apply_sheet_edits(worksheet_name, updates, deletes):
+    row_ids = list(updates) + list(deletes)
+    if not row_ids:
+        return
+    rows = locate_rows(worksheet_name, row_ids)
+    header = get_row_index().header(worksheet_name) or []
+    unknown = {c for changes in updates.values() for c in changes} - set(
+        header
+    )
+    if unknown:
+        raise KeyError(f"{worksheet_name} 沒有欄位：{', '.join(unknown)}")
+    try:
+        get_storage().apply_edits(
+            worksheet_name,
+            {
+                rows[str(rid)]: {
+                    header.index(col) + 1: to_cell_value(value)
+                    for col, value in changes.items()
+                }
+                for rid, changes in updates.items()
+            },
+            [rows[str(rid)] for rid in deletes],
+        )
+    finally:
+        mark_sheet_dirty(worksheet_name)
+    get_row_index().deleted(worksheet_name, deletes)
+
+    # 遠端成功後，同樣的修改/刪除套用到共用快取
+    store = get_data_store()
+    if updates:
+        store.update(
+            worksheet_name,
+            {str(rid): changes for rid, changes in updates.items()},
+        )
+    store.delete(worksheet_name, deletes)
+
+
+# --- 延遲寫入 (表單送出立即回應，背景批次 append_rows) ---
+# [storage] 可設定 max_attempts = 5：連續失敗幾次後移到「送出失敗」清單
+@st.cache_resource
+def get_write_queue():
+    conf = get_storage_config()
+    return WriteBehindQueue(
+        get_storage(),
+        conf.get("journal", "writebehind.db"),
+        interval=float(conf.get("flush_interval", 10)),
+        threshold=int(conf.get("flush_threshold", 20)),
+        max_attempts=int(conf.get("max_attempts", 5)),
+    )
+
+
+def with_row_id(worksheet_name, row, rid=None):
+    """在 _id 欄位置補上 ID (預設產生新的)，回傳 (row, _id)。"""
+    pos = ensure_id_column(worksheet_name)
+    row = list(row)[: pos - 1]
+    rid = rid or new_id()
+    return row + [""] * (pos - 1 - len(row)) + [rid], rid
+
+
+_append_once_lock = threading.Lock()
+
+
+def append_rows_deferred(worksheet_name, rows):
+    """新增的列先進佇列 (背景合併成一次 append_rows)，回傳各列的 _id。"""
+    ids = []
+    queued = []
+    queue = get_write_queue()
+    for row in rows:
+        rid = None
+        if worksheet_name in ID_SHEETS:
+            row, rid = with_row_id(worksheet_name, row)
+            ids.append(rid)
+        # _id 同時當作冪等鍵：送出失敗重送時不會重複寫入
+        queue.enqueue(worksheet_name, row, key=rid)
+        queued.append(row)
+    get_row_index().appended(worksheet_name, ids)
+    # 寫進日誌就算成功：直接接到共用快取，畫面不必重新載入
+    _append_to_store(worksheet_name, queued)
+    return ids
+
+
+def append_rows_once(worksheet_name, rows, ids):
+    """
+    與 append_rows_deferred 相同，但 _id 由呼叫端指定 (冪等鍵)：
+    已經在分頁或佇列裡的 _id 直接略過，回傳這次實際加入的 _id。
+    """
+    index = get_row_index()
+    queue = get_write_queue()
+    added = []
+    queued = []
+    # 兩個 session 同時送出同一批時，檢查與寫入日誌不能交錯
+    with _append_once_lock:
+        for row, rid in zip(rows, ids):
+            if index.row_of(worksheet_name, rid) is not None:
+                continue
+            row, rid = with_row_id(worksheet_name, row, rid)
+            if queue.enqueue(worksheet_name, row, key=rid):
+                added.append(rid)
+                queued.append(row)
+        index.appended(worksheet_name, added)
+        _append_to_store(worksheet_name, queued)
+    return added
+
+
+def _append_to_store(worksheet_name, rows):
+    store = get_data_store()
+    before = store.version(worksheet_name)
+    store.append(worksheet_name, rows)
+    if worksheet_name == "ReserveFund":
+        # [優化] 新的存入/取出直接加進月結餘，不必整段重算
+        get_reserve_ledger().extend(
+            rows,
+            get_row_index().header(worksheet_name)
+            or DEFAULT_HEADERS[worksheet_name],
+            before,
+            store.version(worksheet_name),
+        )
+
+
+def append_row_deferred(worksheet_name, row):
+    ids = append_rows_deferred(worksheet_name, [row])
+    return ids[0] if ids else None
+
+
+def pending_write_count():
+    # 延遲寫入佇列 + 排程器裡還在重試的寫入
+    inflight = get_scheduler().snapshot()["inflight_writes"]
+    return get_write_queue().pending_count() + inflight
+
+
+def write_queue_status():
+    """同步狀態列用：送出失敗的筆數、最近一次錯誤與缺少 _id 的筆數。"""
+    queue = get_write_queue()
+    return {
+        "failed": queue.failed_count(),
+        "last_error": queue.last_error,
+        # 等不及完成、改在背景繼續的修改/刪除，最後失敗的原因
+        "write_error": get_scheduler().write_error,
+        # 試算表上手動新增、還沒有 _id 的列 (補上之前無法編輯)
+        "missing_ids": sum(missing_row_ids().values()),
+    }
+
+
+def failed_writes():
+    """送不出去的列 (診斷頁顯示，可重新排入或捨棄)。"""
+    rows = get_write_queue().failed()
+    return pd.DataFrame(
+        [
+            {
+                "id": i,
+                "分頁": sheet,
+                "資料": ", ".join(str(v) for v in row),
+                "嘗試次數": attempts,
+                "錯誤": error,
+            }
+            for i, sheet, row, attempts, error in rows
+        ],
+        columns=["id", "分頁", "資料", "嘗試次數", "錯誤"],
+    )
+
+
+def retry_failed_writes(ids):
+    get_write_queue().retry_failed(ids)
+
+
+def discard_failed_writes(ids):
+    get_write_queue().discard_failed(ids)
+
+
+def with_pending_rows(worksheet_name, df):
+    """把尚未送出的列接在雲端資料後面，讓剛送出的資料馬上看得到。"""
+    rows = get_write_queue().pending(worksheet_name)
+    if not rows:
+        return df
+    columns = list(df.columns) or DEFAULT_HEADERS.get(worksheet_name, [])
+    if not columns:
+        return df
+    width = len(columns)
+    pending_df = pd.DataFrame(
+        [(r + [""] * width)[:width] for r in rows], columns=columns
+    )
+    return pd.concat([df, pending_df], ignore_index=True)
 
 
 # --- 資料讀取 ---
-@st.cache_data(ttl=60)
+# 在 .streamlit/secrets.toml 的 [storage] 可設定：
+# verify_every = 60            # 背景與來源核對的間隔秒數 (0 = 不核對)
+FINANCE_SHEETS = [
+    "Finance",
+    "FixedExpenses",
+    "Income",
+    "Budget",
+    "ReserveFund",
+    "QuestBoard",
+]
+
+
+def _load_frames(worksheet_names, fresh=False):
+    if fresh:
+        for name in worksheet_names:
+            get_storage().discard_cache(name)
+    # [優化] 所有分頁合併成一次 values_batch_get，不再每頁各打一次 API
+    frames = read_sheet_frames(worksheet_names)
+    return {
+        # 日期/金額/分類只在這裡轉型一次
+        name: apply_schema(name, _prepare_frame(name, frames[name]))
+        for name in worksheet_names
+    }
+
+
+@st.cache_resource
+def get_data_store():
+    conf = get_storage_config()
+    store = DataStore(
+        _load_frames, verify_every=float(conf.get("verify_every", 60))
+    )
+    store.start()
+    return store
+
+
+def _get_frames(worksheet_names, label):
+    store = get_data_store()
+    with recorder.timed("cache", label) as info:
+        missing = store.missing(worksheet_names)
+        info["hits"] = len(worksheet_names) - len(missing)
+        info["misses"] = len(missing)
+        return store.get_many(worksheet_names)
+
+
 def load_sheet_data(worksheet_name):
-    sheet = get_worksheet(worksheet_name)
-    if sheet:
-        return pd.DataFrame(sheet.get_all_records())
-    return pd.DataFrame()
+    return _get_frames([worksheet_name], "load_sheet_data")[worksheet_name]
+
+
+def finance_data_cached():
+    """財務分頁都已在共用快取 (不需要顯示載入中)。"""
+    return not get_data_store().missing(FINANCE_SHEETS)
 
 
-@st.cache_data(ttl=60)
 def load_all_finance_data():
-    sheet_names = [
-        "Finance",
-        "FixedExpenses",
-        "Income",
-        "Budget",
-        "ReserveFund",
-        "QuestBoard",
-    ]
-    data = {}
+    return _get_frames(FINANCE_SHEETS, "load_all_finance_data")
 
-    def fetch_one(name):
-        sheet = get_worksheet(name)
-        if sheet:
-            return name, pd.DataFrame(sheet.get_all_records())
-        return name, pd.DataFrame()
 
-    # 這裡因為 get_worksheet 已經有快取了，多執行緒會變得非常快且安全
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-        results = executor.map(fetch_one, sheet_names)
+# --- 預備金帳本 ---
+@st.cache_resource
+def get_reserve_ledger():
+    return ReserveLedger()
 
-    for name, df in results:
-        data[name] = df
 
-    return data
+def reserve_ledger():
+    """預備金月結餘；共用快取的 ReserveFund 換了版本 (修改/刪除/重載) 才重建。"""
+    ledger = get_reserve_ledger()
+    store = get_data_store()
+    if store.missing(["ReserveFund"]):
+        load_sheet_data("ReserveFund")
+    # 先取版本再讀資料：中間若又有寫入，下次讀取時會再重建一次
+    version = store.version("ReserveFund")
+    if ledger.version != version:
+        ledger.rebuild(load_sheet_data("ReserveFund"), version)
+    return ledger
+
+
+# --- 舊年度封存 ---
+# 在 .streamlit/secrets.toml 的 [storage] 可設定：
+# archive = "parquet"          # 預設 "sheet" (同一份試算表的 Finance_2023 分頁)
+# archive_dir = "archive"      # Parquet 檔的目錄 (需要 pyarrow)
+# hot_years = 2                # 原分頁保留幾個年度 (今年 + 去年)
+@st.cache_resource
+def get_archive():
+    conf = get_storage_config()
+    if conf.get("archive", "sheet") == "parquet":
+        target = ParquetArchive(conf.get("archive_dir", "archive"))
+    else:
+        target = SheetArchive(get_storage())
+    return ArchiveReader(target)
+
+
+def archived_years(worksheet_name):
+    """有封存的年度 (由新到舊)；摘要分頁只在這裡才載入。"""
+    return archive.archived_years(
+        load_sheet_data(SUMMARY_SHEET), worksheet_name
+    )
+
+
+def archive_summary(worksheet_name, year=None):
+    """封存年度的每月、每分類筆數與金額 (不必讀封存本身)。"""
+    df = load_sheet_data(SUMMARY_SHEET)
+    if df.empty or "Sheet" not in df.columns:
+        return df
+    df = df[df["Sheet"].astype(str) == worksheet_name]
+    if year is not None:
+        df = df[df["Month"].astype(str).str.startswith(f"{year}-")]
+    return df
+
+
+def query_ledger(worksheet_name, start=None, end=None):
+    """
+    start <= Date < end 的資料：原分頁加上範圍涵蓋到的封存年度，
+    範圍只落在近期時不會讀任何封存。
+    """
+    return get_archive().query(
+        worksheet_name,
+        load_sheet_data(worksheet_name),
+        archived_years(worksheet_name),
+        start,
+        end,
+    )
+
+
+def archive_closed_years(worksheet_names=None):
+    """把 hot_years 以前的年度搬到封存，回傳 {分頁: {年: 筆數}}。"""
+    conf = get_storage_config()
+    before_year = date.today().year - int(conf.get("hot_years", 2)) + 1
+    names = list(worksheet_names or ARCHIVE_SHEETS)
+    # 佇列裡還沒送出的列先寫進去，搬移時才看得到
+    get_write_queue().flush()
+    storage = get_storage()
+    report = {}
+    # 先補齊缺少的 _id (搬移與刪除都以 _id 比對)
+    migrate_row_ids(names)
+    for name in names:
+        storage.discard_cache(name)
+        report[name] = archive.archive_sheet(
+            storage, get_archive().archive, name, before_year
+        )
+    get_archive().clear()
+    # 原分頁的列號全變了：重新對應 _id 並整張重載
+    for name in names:
+        refresh_row_index(name)
+    reload_sheet_data(names + [SUMMARY_SHEET])
+    return report
+
+
+# --- 快取預熱 ---
+# 預熱間隔同樣在 [storage] 設定：warm_every = 15
+WARM_SHEETS = FINANCE_SHEETS + ["Adventures", "Setting"]
+
+
+@st.cache_resource
+def start_cache_warmer():
+    """第一個 session 進來時啟動 (整個程式只有一個)，之後都在背景執行。"""
+    conf = get_storage_config()
+    provider = get_weather_provider()
+
+    def warm_weather():
+        # 目前設定的城市先抓好天氣 (未過期時不會真的發出請求)
+        # (背景讀取不計入命中率，設定頁的數字只反映使用者的請求)
+        settings = get_data_store().get("Setting", count=False)
+        if "Item" in settings.columns:
+            city = dict(zip(settings["Item"], settings["Value"]))
+            provider.get(city.get("Location", "Taipei,TW"))
+
+    warmer = CacheWarmer(
+        get_data_store(),
+        WARM_SHEETS,
+        prime=get_storage().prime,
+        extras=[warm_weather],
+        interval=float(conf.get("warm_every", 15)),
+    )
+    warmer.start()
+    return warmer
+
+
+def cache_stats():
+    """快取命中/未命中與預熱狀態 (設定頁顯示用)。"""
+    warmer = start_cache_warmer()
+    return {
+        "data": dict(get_data_store().stats),
+        "warmer": dict(warmer.stats),
+        "weather": dict(get_weather_provider().stats),
+        "scheduler": get_scheduler().snapshot(),
+        "last_error": warmer.last_error or get_data_store().last_error,
+    }
+
+
+def memory_report():
+    """診斷頁用：每個分頁與每個共用快取的記憶體用量。"""
+    frames = get_data_store().cached()
+    sheets = memory.sheet_report(frames)
+    settings = get_settings_store().values
+    caches = pd.DataFrame(
+        [
+            {
+                "快取": "共用分頁 (DataStore)",
+                "entries": len(frames),
+                "bytes": int(sheets["bytes"].sum()) if len(sheets) else 0,
+            },
+            {"快取": "明細查詢 (ledger_view)", **ledger_view.cache_info()},
+            {"快取": "月份索引 (ledger_index)", **ledger_index.cache_info()},
+            {"快取": "財務指標 (metrics)", **metrics.cache_info()},
+            {
+                "快取": "設定 (SettingsStore)",
+                "entries": len(settings),
+                "bytes": memory.deep_bytes(dict(settings)),
+            },
+        ]
+    )
+    return sheets, caches
+
+
+# --- 效能量測 ---
+# 除錯面板預設不顯示；在 .streamlit/secrets.toml 開啟，或網址加上 ?debug=1：
+# [debug]
+# panel = true
+# export_path = "instrument.jsonl"   # 面板上「寫入檔案」的目的地
+def get_debug_config():
+    return dict(st.secrets["debug"]) if "debug" in st.secrets else {}
+
+
+def debug_panel_enabled():
+    if st.query_params.get("debug") == "1":
+        return True
+    return bool(get_debug_config().get("panel", False))
+
+
+def begin_rerun():
+    """每次重新執行開始時呼叫，回傳這次 rerun 的編號。"""
+    return recorder.begin_rerun()
+
+
+def page_timer(page):
+    """量測頁面函式的執行時間，期間的呼叫都算在這個頁面。"""
+    recorder.set_page(page)
+    return recorder.timed("page", page)
+
+
+def reload_sheet_data(worksheet_names=None):
+    """強制同步：丟棄快取，下次讀取時整張重抓。"""
+    store = get_data_store()
+    for name in worksheet_names or FINANCE_SHEETS:
+        mark_sheet_dirty(name)
+        store.invalidate(name)
 
 
 # --- 設定相關 ---
-@st.cache_data(ttl=300)
+@st.cache_resource
+def get_settings_store():
+    return SettingsStore(get_data_store(), get_storage())
+
+
 def get_settings():
+    # [優化] Setting 分頁也放在共用快取 (由預熱執行緒保持最新)
     try:
-        sheet = get_worksheet("Setting")
-        if not sheet:
-            return {}
-        records = sheet.get_all_records()
-        settings = {row["Item"]: row["Value"] for row in records}
+        settings = dict(get_settings_store().get())
 
         defaults = {
             "LifeGoal": "未設定",
@@ -152,29 +1004,47 @@ def get_settings():
         return {}
 
 
+def update_settings(changes):
+    """
+    [優化] 數個設定一次寫入 (依 Item 列號索引，不再逐一 find)，
+    回傳 WriteResult。
+    """
+    return run_sheet_write(_update_settings, changes)
+
+
+def _update_settings(changes):
+    written = get_settings_store().update(changes)
+    if written is None:
+        raise SheetNotFound("找不到 Setting 分頁")
+    if written:
+        mark_sheet_dirty("Setting")
+    return written
+
+
 def update_setting_value(key, val):
-    sheet = get_worksheet("Setting")
-    if sheet:
-        try:
-            cell = sheet.find(key)
-            sheet.update_cell(cell.row, 2, val)
-        except:
-            sheet.append_row([key, val])
-        get_settings.clear()
-        return True
-    return False
+    return update_settings({key: val})
 
 
 # --- 功能函式 ---
-@st.cache_data(ttl=1800)
+# 天氣可在 .streamlit/secrets.toml 調整 (測試時可指向 bench/weather_stub.py)：
+# [weather]
+# base_url = "http://127.0.0.1:8765/data/2.5/weather"
+# ttl = 1800                   # 超過就在背景更新，期間照樣顯示舊值
+# timeout = 5                  # 讀取逾時秒數
+# cache_path = "weather_cache.json"
+@st.cache_resource
+def get_weather_provider():
+    conf = dict(st.secrets["weather"]) if "weather" in st.secrets else {}
+    weather_api_key, _ = init_api()
+    return WeatherProvider(
+        weather_api_key,
+        base_url=conf.get("base_url", DEFAULT_URL),
+        ttl=float(conf.get("ttl", 1800)),
+        timeout=(3.05, float(conf.get("timeout", 5))),
+        cache_path=conf.get("cache_path", "weather_cache.json"),
+    )
+
+
 def get_weather(city):
-    if not WEATHER_API_KEY:
-        return "📍 API未設定"
-    try:
-        base_url = "https://api.openweathermap.org/data/2.5/weather"
-        query = f"?q={city}&appid={WEATHER_API_KEY}&units=metric&lang=zh_tw"
-        url = base_url + query
-        res = requests.get(url).json()
-        return f"📍 {city} | 🌡️ {res['main']['temp']:.1f}°C"
-    except:
-        return f"📍 {city}"
+    # [優化] 有舊值就立即回傳，過期時背景更新，不再讓首頁等 API
+    return get_weather_provider().get(city)
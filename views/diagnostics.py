@@ -0,0 +1,114 @@
+import streamlit as st
+import pandas as pd
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from utils import memory_report, cache_stats, get_debug_config, failed_writes, retry_failed_writes, discard_failed_writes
+from services.instrument import recorder
+from services.memory import deep_bytes, format_bytes
+
+
+def session_report():
+    """目前 session 的 st.session_state 各項目大小 (由大到小)。"""
+    rows = [
+        {"key": str(key), "型別": type(value).__name__, "bytes": deep_bytes(value)}
+        for key, value in st.session_state.items()
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["key", "型別", "bytes"])
+    return pd.DataFrame(rows).sort_values("bytes", ascending=False)
+
+
+def show_diagnostics_page():
+    st.title("🩺 系統診斷")
+    if st.button("⬅️ 返回設定"):
+        st.session_state["current_page"] = "Setting"
+        st.rerun()
+
+    sheets, caches = memory_report()
+    session = session_report()
+
+    # --- 概況 ---
+    c1, c2, c3 = st.columns(3)
+    c1.metric("共用分頁", format_bytes(int(sheets["bytes"].sum()) if len(sheets) else 0))
+    c2.metric("所有共用快取", format_bytes(int(caches["bytes"].sum())))
+    c3.metric("本 session", format_bytes(int(session["bytes"].sum())))
+    st.caption("共用快取整個程式只有一份，多開一個 session 只會增加「本 session」這一塊。")
+
+    # --- 各分頁 ---
+    st.subheader("📄 各分頁 (共用快取)")
+    st.dataframe(sheets, use_container_width=True, hide_index=True)
+
+    # --- 各快取 ---
+    st.subheader("🗄️ 各快取")
+    st.dataframe(caches, use_container_width=True, hide_index=True)
+
+    # --- 本 session ---
+    st.subheader("👤 本 session (st.session_state)")
+    st.dataframe(session.head(20), use_container_width=True, hide_index=True)
+
+    # --- 熱路徑 ---
+    st.subheader("⏱️ 熱路徑統計 (依總延遲)")
+    summary = pd.DataFrame(recorder.summary())
+    if summary.empty:
+        st.caption("尚無紀錄")
+    else:
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    with st.expander("📈 快取命中與請求排程"):
+        st.json(cache_stats())
+
+    # --- 送出失敗的列 (重試次數用完，不再擋住後面的寫入) ---
+    failed = failed_writes()
+    st.subheader(f"❌ 送出失敗 ({len(failed)} 筆)")
+    if failed.empty:
+        st.caption("沒有送出失敗的資料")
+    else:
+        st.dataframe(failed, use_container_width=True, hide_index=True)
+        c1, c2 = st.columns(2)
+        if c1.button("🔁 全部重新排入"):
+            retry_failed_writes(failed["id"].tolist())
+            st.rerun()
+        if c2.button("🗑️ 全部捨棄"):
+            discard_failed_writes(failed["id"].tolist())
+            st.rerun()
+
+
+def show_debug_panel(rerun):
+    """側邊欄的除錯面板：這次 rerun 的頁面時間、Sheets 請求與快取命中。"""
+    events = recorder.rerun_events(rerun)
+    pages = [e for e in events if e["kind"] == "page"]
+    api = [e for e in events if e["kind"] == "sheets_api"]
+    hits = sum(e["hits"] for e in events)
+    lookups = hits + sum(e["misses"] for e in events)
+
+    st.markdown("---")
+    st.markdown("**🐞 除錯面板**")
+    c1, c2 = st.columns(2)
+    c1.metric("頁面", f"{pages[-1]['ms']:.0f} ms" if pages else "-")
+    c2.metric("Sheets 請求", len(api))
+    c1.metric("快取命中", f"{hits}/{lookups}" if lookups else "-")
+    c2.metric("傳輸", format_bytes(sum(e["bytes_in"] + e["bytes_out"] for e in api)))
+
+    with st.expander("本次呼叫", expanded=False):
+        if events:
+            st.dataframe(pd.DataFrame(events)[["kind", "name", "ms", "ok", "bytes_in", "hits", "misses"]], hide_index=True)
+        else:
+            st.caption("尚無紀錄")
+    with st.expander("累計 (依總延遲)", expanded=False):
+        summary = pd.DataFrame(recorder.summary())
+        if not summary.empty:
+            st.dataframe(summary[["page", "kind", "name", "calls", "mean_ms", "p95_ms", "hit_ratio"]].head(30), hide_index=True)
+
+    # --- 匯出 (JSON lines) ---
+    st.download_button("⬇️ 匯出 JSONL", recorder.to_jsonl(), file_name="instrument.jsonl", mime="application/x-ndjson")
+    path = get_debug_config().get("export_path")
+    if path and st.button(f"💾 寫入 {path}"):
+        st.toast(f"已寫入 {recorder.export(path)} 筆")
+    if st.button("🧹 清除紀錄"):
+        recorder.reset()
+        st.rerun()
@@ -9,7 +9,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from utils import get_worksheet, load_sheet_data
+from utils import get_worksheet, load_sheet_data, append_row_deferred, update_row_by_id, delete_rows_by_id, write_feedback
+from services.row_ids import ID_COLUMN, NO_ID_INFO
 
 def show_diary_page():
     st.title("📖 冒險日誌 (Adventure Log)")
@@ -59,16 +60,11 @@ def show_diary_page():
             # 欄位順序: Name, Description, Status, StartDate, NotionLink, Type
             row_data = [a_name, a_desc, "進行中", str(a_date), "", final_type]
             
-            # 1. 寫入雲端
-            sheet_adv.append_row(row_data)
+            # 1. 寫入延遲佇列 (背景批次寫入雲端)
+            append_row_deferred(sheet_adv.title, row_data)
             
-            # 2. [優化] 因為 load_sheet_data 是使用 st.cache_data，我們需要清除它才能看到新的
-            # 但為了避免頻繁讀取，我們可以選擇這裡才清除 (因為新增冒險頻率較低)，
-            # 或是您可以接受新增後，必須手動按重新整理才看得到。
-            # 為了使用者體驗，這裡我們維持清除，但因為冒險日誌操作頻率比記帳低很多，所以尚可接受。
-            # 如果您希望極致優化，這裡也可以不清除，但處理 dataframe 比較麻煩。
+            # 2. [優化] 新的一列已直接接到共用快取，不必清除快取重新下載
             st.success(f"篇章「{a_name}」已建立！")
-            load_sheet_data.clear() 
             st.rerun()
 
     st.divider()
@@ -79,12 +75,17 @@ def show_diary_page():
         if df_adv.empty: df_adv = load_sheet_data("Sheet1")
 
         if not df_adv.empty:
-            if "Type" not in df_adv.columns: df_adv["Type"] = "Instance"
-            df_adv["Type"] = df_adv["Type"].astype(str).fillna("Instance")
+            # 共用快取的資料不可就地修改，改用 assign 產生新表
+            if "Type" not in df_adv.columns: df_adv = df_adv.assign(Type="Instance")
+            df_adv = df_adv.assign(Type=df_adv["Type"].astype(str).fillna("Instance"))
 
             df_cont = df_adv[df_adv["Type"].str.contains("Continuous", case=False, na=False)]
             df_inst = df_adv[~df_adv["Type"].str.contains("Continuous", case=False, na=False)]
 
+            # 還沒補上 _id 的舊資料：只顯示卡片，不提供修改/刪除
+            has_ids = ID_COLUMN in df_adv.columns
+            if not has_ids: st.info(NO_ID_INFO)
+
             def render_adventure_grid(dataframe, section_title, section_icon):
                 if dataframe.empty: return
                 st.subheader(f"{section_icon} {section_title}")
@@ -92,7 +93,8 @@ def show_diary_page():
                 
                 for i, (idx, row) in enumerate(dataframe.sort_index(ascending=False).iterrows()):
                     col = cols[i % 4]
-                    original_index = idx 
+                    # [修改] 以 _id 指定資料列 (排序/其他裝置增刪列都不會錯位)
+                    row_id = str(row[ID_COLUMN]).strip() if has_ids else ""
                     notion_link = str(row.get('NotionLink', '')).strip()
                     has_link = len(notion_link) > 5
                     
@@ -105,34 +107,27 @@ def show_diary_page():
                             
                             if has_link:
                                 st.link_button("🔮 進入世界", notion_link, use_container_width=True)
-                            else:
-                                new_key = st.text_input("輸入 Notion 網址", key=f"k_{original_index}", label_visibility="collapsed", placeholder="貼上連結...")
-                                if st.button("✨ 啟動", key=f"b_{original_index}", use_container_width=True):
-                                    sheet_adv.update_cell(original_index + 2, 5, new_key)
-                                    load_sheet_data.clear()
-                                    st.rerun()
+                            # 還沒有 _id 的列 (試算表上直接新增)：找不到列號，也沒有唯一的 key
+                            if not row_id: continue
+                            if not has_link:
+                                new_key = st.text_input("輸入 Notion 網址", key=f"k_{row_id}", label_visibility="collapsed", placeholder="貼上連結...")
+                                if st.button("✨ 啟動", key=f"b_{row_id}", use_container_width=True):
+                                    if write_feedback(update_row_by_id(sheet_adv.title, row_id, {"NotionLink": new_key}), "已啟動"): st.rerun()
 
                             with st.expander("⚙️ 設定"):
-                                edit_link = st.text_input("修正連結", value=notion_link, key=f"e_{original_index}")
+                                edit_link = st.text_input("修正連結", value=notion_link, key=f"e_{row_id}")
                                 if edit_link != notion_link:
-                                    if st.button("更新連結", key=f"up_{original_index}"):
-                                        sheet_adv.update_cell(original_index + 2, 5, edit_link)
-                                        load_sheet_data.clear()
-                                        st.rerun()
+                                    if st.button("更新連結", key=f"up_{row_id}"):
+                                        if write_feedback(update_row_by_id(sheet_adv.title, row_id, {"NotionLink": edit_link}), "已更新連結"): st.rerun()
                                
                                 current_status = row.get('Status', '進行中')
-                                new_status = st.selectbox("狀態", ["進行中", "已完成", "暫停"], index=["進行中", "已完成", "暫停"].index(current_status), key=f"s_{original_index}")
+                                new_status = st.selectbox("狀態", ["進行中", "已完成", "暫停"], index=["進行中", "已完成", "暫停"].index(current_status), key=f"s_{row_id}")
                                 if new_status != current_status:
-                                    if st.button("更新狀態", key=f"ups_{original_index}"):
-                                        sheet_adv.update_cell(original_index + 2, 3, new_status)
-                                        load_sheet_data.clear()
-                                        st.rerun()
+                                    if st.button("更新狀態", key=f"ups_{row_id}"):
+                                        if write_feedback(update_row_by_id(sheet_adv.title, row_id, {"Status": new_status}), "已更新狀態"): st.rerun()
 
-                                if st.button("🗑️ 刪除", key=f"d_{original_index}"):
-                                    sheet_adv.delete_rows(original_index + 2)
-                                    st.success("已刪除")
-                                    load_sheet_data.clear()
-                                    st.rerun()
+                                if st.button("🗑️ 刪除", key=f"d_{row_id}"):
+                                    if write_feedback(delete_rows_by_id(sheet_adv.title, [row_id]), "已刪除"): st.rerun()
 
             render_adventure_grid(df_cont, "持續修練 (Continuous)", "♾️")
             if not df_cont.empty and not df_inst.empty: st.divider()
@@ -8,7 +8,14 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(parent_dir)
 
-from utils import get_worksheet, load_all_finance_data
+from utils import (
+    get_worksheet,
+    finance_data_cached,
+    load_all_finance_data,
+    reload_sheet_data,
+    reserve_ledger,
+)
+from services.metrics import month_metrics
 
 from . import dashboard, ledger, assets, budget
 
@@ -25,33 +32,19 @@ def show_finance_page(
     st.title("💰 商會 (Merchant Guild)")
 
     # --- Loading ---
-    # [修正] 這裡原本有一行 import get_loading_message 導致錯誤，已移除。
-    # 改用純文字顯示 Loading
-    if "fin_data_loaded" not in st.session_state:
+    # [優化] 每次 rerun 直接取共用快取的快照 (所有 session 共用同一份，
+    # 不再複製到 st.session_state)；別的 session 寫入後這裡立刻看得到
+    if finance_data_cached():
+        all_data = load_all_finance_data()
+    else:
         with st.spinner("⏳ 正在核對商會帳本..."):
             all_data = load_all_finance_data()
-            st.session_state["df_fin"] = all_data.get(
-                "Finance", pd.DataFrame()
-            )
-            st.session_state["df_fixed"] = all_data.get(
-                "FixedExpenses", pd.DataFrame()
-            )
-            st.session_state["df_income"] = all_data.get(
-                "Income", pd.DataFrame()
-            )
-            st.session_state["df_budget"] = all_data.get(
-                "Budget", pd.DataFrame()
-            )
-            st.session_state["df_reserve"] = all_data.get(
-                "ReserveFund", pd.DataFrame()
-            )
-            st.session_state["fin_data_loaded"] = True
-
-    df_fin = st.session_state["df_fin"]
-    df_fixed = st.session_state["df_fixed"]
-    df_income = st.session_state["df_income"]
-    df_budget = st.session_state["df_budget"]
-    df_reserve = st.session_state["df_reserve"]
+
+    df_fin = all_data.get("Finance", pd.DataFrame())
+    df_fixed = all_data.get("FixedExpenses", pd.DataFrame())
+    df_income = all_data.get("Income", pd.DataFrame())
+    df_budget = all_data.get("Budget", pd.DataFrame())
+    df_reserve = all_data.get("ReserveFund", pd.DataFrame())
 
     sheet_fin = get_worksheet("Finance")
     sheet_fixed = get_worksheet("FixedExpenses")
@@ -59,93 +52,30 @@ def show_finance_page(
     sheet_budget = get_worksheet("Budget")
     sheet_reserve = get_worksheet("ReserveFund")
 
-    # --- 數據計算 ---
+    # --- 數據計算 (向量化 + 依資料指紋記憶，資料沒變就不重算) ---
     current_month_str = datetime.now().strftime("%Y-%m")
-
-    # A. 收入
-    total_income = 0
-    if not df_income.empty and "Date" in df_income.columns:
-        calc_df = df_income.copy()
-        calc_df["Date"] = calc_df["Date"].astype(str)
-        inc_month = calc_df[calc_df["Date"].str.contains(current_month_str)]
-        inc_month["Amount"] = pd.to_numeric(
-            inc_month["Amount"], errors="coerce"
-        ).fillna(0)
-        total_income = int(inc_month["Amount"].sum())
-
-    # B. 固定開銷 (計畫總額)
-    total_fixed_plan = 0
-    if not df_fixed.empty and "Amount" in df_fixed.columns:
-        for _, row in df_fixed.iterrows():
-            try:
-                amt = float(row["Amount"])
-                cycle = str(row.get("Cycle", "每月"))
-                if cycle == "每年":
-                    total_fixed_plan += amt / 12
-                elif cycle == "每半年":
-                    total_fixed_plan += amt / 6
-                else:
-                    total_fixed_plan += amt
-            except:
-                pass
-        total_fixed_plan = int(total_fixed_plan)
-
-    # C. 實際變動支出 (含已入帳的固定開銷)
-    total_actual_spent = 0
-    actual_fixed_spent = 0  # 已經入帳的固定開銷金額
-    spent_by_category = {}
-
-    if not df_fin.empty and "Date" in df_fin.columns:
-        calc_df = df_fin.copy()
-        calc_df["Date"] = calc_df["Date"].astype(str)
-        fin_month = calc_df[calc_df["Date"].str.contains(current_month_str)]
-        fin_month["Price"] = pd.to_numeric(
-            fin_month["Price"], errors="coerce"
-        ).fillna(0)
-        total_actual_spent = int(fin_month["Price"].sum())
-
-        if "Type1" in fin_month.columns:
-            spent_by_category = (
-                fin_month.groupby("Type1")["Price"].sum().to_dict()
-            )
-            actual_fixed_spent = spent_by_category.get("固定開銷", 0)
-
-    # D. 預算資料
-    reserve_goal = 0
-    budget_dict = {}
-    existing_items = []
-    if not df_budget.empty and "Item" in df_budget.columns:
-        calc_df = df_budget.copy()
-        calc_df["Budget"] = pd.to_numeric(
-            calc_df["Budget"], errors="coerce"
-        ).fillna(0)
-        for _, row in calc_df.iterrows():
-            item = row["Item"]
-            amt = int(row["Budget"])
-            budget_dict[item] = amt
-            existing_items.append(item)
-            if "預備金" in item:
-                reserve_goal = amt
-
-    # E. 預備金金庫
-    curr_res_bal = 0
-    if not df_reserve.empty and "Amount" in df_reserve.columns:
-        calc_df = df_reserve.copy()
-        calc_df["Amount"] = pd.to_numeric(
-            calc_df["Amount"], errors="coerce"
-        ).fillna(0)
-        dep = calc_df[calc_df["Type"] == "存入"]["Amount"].sum()
-        wit = calc_df[calc_df["Type"] == "取出"]["Amount"].sum()
-        curr_res_bal = int(dep - wit)
-
-    # F. 自由現金流計算
-    remaining_unpaid_fixed = max(0, total_fixed_plan - actual_fixed_spent)
-    free_cash = (
-        total_income
-        - total_actual_spent
-        - remaining_unpaid_fixed
-        - reserve_goal
+    m = month_metrics(
+        {
+            "Finance": df_fin,
+            "FixedExpenses": df_fixed,
+            "Income": df_income,
+            "Budget": df_budget,
+            "ReserveFund": df_reserve,
+        },
+        current_month_str,
     )
+    total_income = m["total_income"]
+    total_fixed_plan = m["total_fixed_plan"]
+    total_actual_spent = m["total_actual_spent"]
+    spent_by_category = m["spent_by_category"]
+    reserve_goal = m["reserve_goal"]
+    budget_dict = m["budget_dict"]
+    existing_items = m["existing_items"]
+    # [優化] 預備金餘額與本月存入直接查月結餘檢查點，不再加總整段歷史
+    reserve = reserve_ledger()
+    curr_res_bal = reserve.balance()
+    remaining_unpaid_fixed = m["remaining_unpaid_fixed"]
+    free_cash = m["free_cash"]
 
     # --- 3. 介面導航 ---
     nav_options = [
@@ -179,22 +109,12 @@ def show_finance_page(
             reserve_goal,
             budget_dict,
             spent_by_category,
-            df_reserve,
+            reserve.month(current_month_str),
             remaining_unpaid_fixed,
         )
 
         if st.button("🔄 強制同步雲端資料"):
-            for key in [
-                "df_fin",
-                "df_fixed",
-                "df_income",
-                "df_budget",
-                "df_reserve",
-                "fin_data_loaded",
-            ]:
-                if key in st.session_state:
-                    del st.session_state[key]
-            load_all_finance_data.clear()
+            reload_sheet_data()
             st.rerun()
 
     elif selected_tab == "💰 收入":
@@ -220,4 +140,6 @@ def show_finance_page(
         )
 
     elif selected_tab == "🏦 預備金":
-        assets.show_reserve_tab(sheet_reserve, df_reserve, curr_res_bal)
+        assets.show_reserve_tab(
+            sheet_reserve, df_reserve, curr_res_bal, reserve.series()
+        )
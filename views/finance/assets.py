@@ -8,7 +8,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 sys.path.append(root_dir)
 
-from utils import get_worksheet, update_setting_value, load_all_finance_data
+from utils import get_worksheet, update_settings, append_row_deferred, append_rows_once, delete_rows_by_id, write_feedback
+from services.row_ids import ID_COLUMN, NO_ID_INFO
+from services.recurring import unpaid_fixed, posting_rows
 
 def show_fixed_tab(sheet_fixed, df_fixed, total_fixed, fixed_types, pay_methods, sheet_fin, df_fin):
     st.subheader("🏛️ 固定開銷管理")
@@ -16,57 +18,31 @@ def show_fixed_tab(sheet_fixed, df_fixed, total_fixed, fixed_types, pay_methods,
     # --- [New] 一鍵入帳功能 ---
     with st.expander("⚡ 本月固定開銷結算 (一鍵入帳)", expanded=True):
         if not df_fixed.empty:
-            # 1. 找出本月已經記帳的項目 (比對 Item 名稱)
-            current_month_str = datetime.now().strftime("%Y-%m")
-            recorded_items = []
-            if not df_fin.empty and 'Date' in df_fin.columns:
-                df_fin['Date'] = df_fin['Date'].astype(str)
-                fin_month = df_fin[df_fin['Date'].str.contains(current_month_str)]
-                if 'Item' in fin_month.columns:
-                    recorded_items = fin_month['Item'].tolist()
+            # [修改] 依 Cycle 與扣款日算出本期該入帳的項目 (以 _id 雜湊比對，不再逐筆掃描清單)
+            pending = unpaid_fixed(df_fixed, df_fin)
+            due_items = [p for p in pending if p["due"]]
+            upcoming = [p for p in pending if not p["due"]]
             
-            # 2. 篩選出還沒記的
-            unpaid_items = []
-            for _, row in df_fixed.iterrows():
-                # 簡單比對：項目名稱是否存在於本月記帳中
-                if row['Item'] not in recorded_items:
-                    unpaid_items.append(row)
-            
-            if unpaid_items:
-                st.warning(f"本月尚有 {len(unpaid_items)} 筆固定開銷未入帳")
+            if due_items:
+                st.warning(f"本期尚有 {len(due_items)} 筆固定開銷已到期未入帳")
                 
                 # 顯示列表
-                for item in unpaid_items:
-                    st.write(f"- **{item['Item']}**: ${item['Amount']} ({item['PaidBy']})")
+                for item in due_items:
+                    st.write(f"- **{item['Item']}**: ${item['Amount']:,} ({item['PaidBy']}，{item['Cycle']} {item['date']:%m/%d})")
                 
                 if st.button("⚡ 全部寫入支出記帳"):
                     if sheet_fin:
-                        new_rows_df = []
-                        today_str = datetime.now().strftime("%Y-%m-%d")
-                        wk = datetime.now().isocalendar()[1]
-                        
-                        for item in unpaid_items:
-                            # 欄位: Date, Week, Item, Price, Type1, Type2
-                            # Type1 強制設為 "固定開銷"，方便總覽計算
-                            # Type2 設為原本的 Type (如訂閱/房租)
-                            row_data = [today_str, wk, item['Item'], item['Amount'], "固定開銷", item['Type']]
-                            sheet_fin.append_row(row_data)
-                            
-                            # 更新本地 session state
-                            new_row = pd.DataFrame([row_data], columns=['Date', 'Week', 'Item', 'Price', 'Type1', 'Type2'])
-                            new_rows_df.append(new_row)
+                        # Date 為扣款日，Type1 強制設為 "固定開銷"，Type2 為原本的 Type (如訂閱/房租)
+                        # [優化] _id 由 (固定開銷那一列的 _id, 期間) 雜湊而來 (該列還沒有 _id 時才用項目名稱)：連點或重送都不會重複入帳，全部合併成一次 append_rows
+                        added = append_rows_once("Finance", posting_rows(due_items), [p[ID_COLUMN] for p in due_items])
                         
-                        # 更新 Session
-                        if new_rows_df and 'df_fin' in st.session_state:
-                            combined_new = pd.concat(new_rows_df, ignore_index=True)
-                            st.session_state['df_fin'] = pd.concat([st.session_state['df_fin'], combined_new], ignore_index=True)
-                        
-                        st.success(f"已成功寫入 {len(unpaid_items)} 筆支出！")
-                        load_all_finance_data.clear() # 清除快取
+                        st.success(f"已成功寫入 {len(added)} 筆支出！")
                         st.rerun()
                     else: st.error("找不到 Finance 分頁")
             else:
-                st.success("✅ 本月所有固定開銷皆已入帳！")
+                st.success("✅ 本期已到期的固定開銷皆已入帳！")
+            if upcoming:
+                st.caption("📅 本月稍後扣款：" + "、".join(f"{p['Item']} ({p['date']:%m/%d})" for p in upcoming))
         else:
             st.info("尚未設定固定開銷。")
 
@@ -112,40 +88,41 @@ def show_fixed_tab(sheet_fixed, df_fixed, total_fixed, fixed_types, pay_methods,
                     final_pay = new_pay if sel_pay == ADD_NEW_PAY and new_pay else sel_pay
                     if final_pay == ADD_NEW_PAY: final_pay = "未指定"
 
-                    sheet_fixed.append_row([fx_item, final_type, fx_amt, final_pay, fx_cycle, fx_detail])
+                    append_row_deferred("FixedExpenses", [fx_item, final_type, fx_amt, final_pay, fx_cycle, fx_detail])
                     
                     # 更新 Setting
-                    updated = False
+                    new_options = {}
                     if sel_type == ADD_NEW_TYPE and new_type and new_type not in fixed_types:
-                        update_setting_value("Fixed_Types", ",".join(fixed_types + [new_type]))
-                        updated = True
+                        new_options["Fixed_Types"] = ",".join(fixed_types + [new_type])
                     if sel_pay == ADD_NEW_PAY and new_pay and new_pay not in pay_methods:
-                        update_setting_value("Payment_Methods", ",".join(pay_methods + [new_pay]))
-                        updated = True
+                        new_options["Payment_Methods"] = ",".join(pay_methods + [new_pay])
                     
-                    if updated: st.toast("已更新分類設定！")
+                    if new_options:
+                        remembered = update_settings(new_options)  # [優化] 一次寫入
+                        if remembered.done: st.toast("已更新分類設定！")
+                        elif remembered.failed: st.toast(f"分類設定未能更新：{remembered.error}")
                     st.success("已新增")
-                    load_all_finance_data.clear()
-                    if "fin_data_loaded" in st.session_state: del st.session_state["fin_data_loaded"]
                     st.rerun()
                 else: st.error("找不到 FixedExpenses 分頁")
 
     with col_view:
         if not df_fixed.empty:
             st.write(f"📊 攤提後月固定支出: **${total_fixed:,}**")
+            # 還沒補上 _id 的舊資料：不提供刪除
+            has_ids = ID_COLUMN in df_fixed.columns
+            if not has_ids: st.info(NO_ID_INFO)
             for i, row in df_fixed.iterrows():
-                with st.expander(f"{row['Item']} - ${row['Amount']:,} ({row.get('Cycle','每月')})"):
+                amount = f"${row['Amount']:,}" if pd.notna(row['Amount']) else "未填金額"
+                with st.expander(f"{row['Item']} - {amount} ({row.get('Cycle','每月')})"):
                     st.write(f"類型: {row['Type']} | 支付: {row['PaidBy']}")
-                    if st.button("🗑️ 刪除", key=f"del_fx_{i}"):
-                        sheet_fixed.delete_rows(i+2)
-                        st.success("已刪除")
-                        load_all_finance_data.clear()
-                        if "fin_data_loaded" in st.session_state: del st.session_state["fin_data_loaded"]
-                        st.rerun()
+                    # 還沒有 _id 的列 (試算表上直接新增) 找不到列號，也沒有唯一的 key
+                    row_id = str(row[ID_COLUMN]).strip() if has_ids else ""
+                    if row_id and st.button("🗑️ 刪除", key=f"del_fx_{row_id}"):
+                        if write_feedback(delete_rows_by_id("FixedExpenses", [row_id]), "已刪除"): st.rerun()
         else:
             st.info("目前沒有固定開銷。")
 
-def show_reserve_tab(sheet_reserve, df_reserve, current_balance):
+def show_reserve_tab(sheet_reserve, df_reserve, current_balance, balance_history=None):
     # (保持原樣，僅需貼上原有的程式碼)
     st.subheader("🏦 預備金金庫 (Reserve Fund)")
     st.markdown(f"""<div style="padding:15px; border:1px solid #FFD700; border-radius:10px; background-color:rgba(255, 215, 0, 0.1); text-align:center;"><h2 style="color:#FFD700; margin:0;">💰 金庫餘額: ${current_balance:,}</h2></div>""", unsafe_allow_html=True)
@@ -160,14 +137,16 @@ def show_reserve_tab(sheet_reserve, df_reserve, current_balance):
             r_note = st.text_input("備註")
             if st.form_submit_button("確認"):
                 if sheet_reserve:
-                    sheet_reserve.append_row([str(r_date), r_type, r_amount, r_note])
+                    append_row_deferred("ReserveFund", [str(r_date), r_type, r_amount, r_note])
                     if r_type == "存入": st.balloons()
                     st.success(f"已{r_type}")
-                    load_all_finance_data.clear()
-                    if "fin_data_loaded" in st.session_state: del st.session_state["fin_data_loaded"]
                     st.rerun()
                 else: st.error("找不到 ReserveFund 分頁")
     with c_hist:
+        # [新增] 餘額走勢 (直接用每月的月結餘檢查點)
+        if balance_history is not None and not balance_history.empty:
+            st.caption("📈 月底餘額走勢")
+            st.area_chart(balance_history["餘額"], height=200)
         if not df_reserve.empty:
             st.caption("📜 金庫進出紀錄")
-            st.dataframe(df_reserve[::-1], use_container_width=True, hide_index=True)
\ No newline at end of file
+            st.dataframe(df_reserve[::-1], use_container_width=True, hide_index=True, column_config={"Date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"), ID_COLUMN: None})
\ No newline at end of file
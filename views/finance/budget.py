@@ -7,13 +7,20 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 sys.path.append(root_dir)
 
-from utils import get_worksheet
+from utils import get_worksheet, append_row_deferred, update_row_by_id, delete_rows_by_id, write_feedback
+from services.row_ids import ID_COLUMN, NO_ID_INFO
+
+def budget_row_id(df_budget, item):
+    # 以 _id 指定資料列 (剛新增、還在佇列中的項目也找得到)
+    return df_budget.loc[df_budget["Item"].astype(str) == item, ID_COLUMN].iloc[-1]
 
 def show_budget_tab(sheet_budget, df_budget, type1_list, existing_items, budget_dict):
     st.subheader("📅 預算額度設定")
     all_possible = type1_list + ["預備金"]
     items_to_add = [i for i in all_possible if i not in existing_items]
     items_to_edit = [i for i in all_possible if i in existing_items]
+    # 還沒補上 _id 的舊資料：只能新增，修改/刪除等遷移後再開放
+    has_ids = ID_COLUMN in df_budget.columns
     
     col_new, col_edit = st.columns(2)
     with col_new:
@@ -24,40 +31,35 @@ def show_budget_tab(sheet_budget, df_budget, type1_list, existing_items, budget_
                 new_a = st.number_input("金額", min_value=0, step=1000)
                 if st.form_submit_button("➕ 新增"):
                     if sheet_budget:
-                        sheet_budget.append_row([new_i, new_a])
+                        append_row_deferred("Budget", [new_i, new_a])
                         st.success("已新增")
-                        st.cache_data.clear()
                         st.rerun()
         else: st.success("已全部設定！")
 
     with col_edit:
         st.markdown("#### ✏️ 修改")
-        if items_to_edit:
+        if items_to_edit and not has_ids:
+            st.info(NO_ID_INFO)
+        elif items_to_edit:
             target = st.selectbox("選擇項目", items_to_edit)
             curr_val = budget_dict.get(target, 0)
             with st.form("edit_budget"):
                 edit_a = st.number_input(f"調整 {target}", value=curr_val, min_value=0, step=1000)
                 if st.form_submit_button("💾 更新"):
                     if sheet_budget:
-                        cell = sheet_budget.find(target)
-                        sheet_budget.update_cell(cell.row, 2, edit_a)
-                        st.success("已更新")
-                        st.cache_data.clear()
-                        st.rerun()
+                        if write_feedback(update_row_by_id("Budget", budget_row_id(df_budget, target), {"Budget": edit_a}), "已更新"): st.rerun()
 
     st.divider()
     with st.expander("🗑️ 刪除預算"):
-        if items_to_edit:
+        if items_to_edit and not has_ids:
+            st.info(NO_ID_INFO)
+        elif items_to_edit:
             del_t = st.selectbox("刪除項目", ["請選擇..."] + items_to_edit)
             if del_t != "請選擇..." and st.button("確認刪除"):
                 if sheet_budget:
-                    cell = sheet_budget.find(del_t)
-                    sheet_budget.delete_rows(cell.row)
-                    st.success("已刪除")
-                    st.cache_data.clear()
-                    st.rerun()
+                    if write_feedback(delete_rows_by_id("Budget", [budget_row_id(df_budget, del_t)]), "已刪除"): st.rerun()
     
     st.divider()
     if not df_budget.empty:
         st.subheader("📋 預算清單")
-        st.dataframe(df_budget, use_container_width=True, hide_index=True)
\ No newline at end of file
+        st.dataframe(df_budget, use_container_width=True, hide_index=True, column_config={ID_COLUMN: None})
\ No newline at end of file
@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
+import sys
+import os
 
-def show_dashboard(current_month_str, total_income, total_fixed_plan, total_actual_spent, free_cash, current_reserve_balance, reserve_goal, budget_dict, spent_by_category, df_reserve, remaining_unpaid_fixed):
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+sys.path.append(root_dir)
+
+def show_dashboard(current_month_str, total_income, total_fixed_plan, total_actual_spent, free_cash, current_reserve_balance, reserve_goal, budget_dict, spent_by_category, reserve_month, remaining_unpaid_fixed):
     st.subheader(f"📊 {current_month_str} 商會戰略看板")
     
     # 核心指標
@@ -23,18 +29,14 @@ def show_dashboard(current_month_str, total_income, total_fixed_plan, total_actu
 
     st.divider()
     col_res, col_space = st.columns([1, 2])
-    col_res.metric("🏦 預備金金庫總額", f"${current_reserve_balance:,}", delta="累計資產")
+    col_res.metric("🏦 預備金金庫總額", f"${current_reserve_balance:,}", delta=f"本月 {reserve_month['net']:+,}")
     
     st.divider()
     st.subheader("🎯 預算執行率")
     
     # 預備金進度
     if reserve_goal > 0:
-        this_month_saved = 0
-        if not df_reserve.empty:
-            df_reserve['Date'] = df_reserve['Date'].astype(str)
-            res_month = df_reserve[df_reserve['Date'].str.contains(current_month_str)]
-            this_month_saved = res_month[res_month['Type'] == '存入']['Amount'].sum()
+        this_month_saved = reserve_month["deposit"]  # [優化] 月結餘檢查點，不再篩選整張表
         p_saved = min(this_month_saved / reserve_goal, 1.0)
         st.write(f"🏦 **本月預備金存款目標**: ${int(this_month_saved):,} / ${reserve_goal:,}")
         st.progress(p_saved)
@@ -1,65 +1,71 @@
 import streamlit as st
 import pandas as pd
+import hashlib
 from datetime import datetime
 import sys
 import os
-import time
-import gspread  # [新增] 用於捕捉錯誤
 
 # 路徑修正
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 sys.path.append(root_dir)
 
-from utils import update_setting_value, load_all_finance_data
+from utils import (
+    update_setting_value,
+    update_settings,
+    append_row_deferred,
+    apply_sheet_edits,
+    archived_years,
+    archive_summary,
+    query_ledger,
+    write_feedback,
+)
+from services import ledger_view
+from services.row_ids import ID_COLUMN, NO_ID_INFO
 
 
-# --- [新增] API 重試機制 ---
-def api_retry(func, *args, **kwargs):
+# --- 通用編輯器邏輯 (編輯/刪除) ---
+def editor_key(key_prefix, ids, nonce):
     """
-    執行 Google Sheet 操作，若遇到 API 限制 (429) 則自動等待並重試。
+    編輯器的 key 跟著這一頁的 _id 走：換頁、排序、篩選或資料變動後
+    就是新的編輯器，舊的 edited_rows/deleted_rows (以位置記錄) 不會套到別列。
     """
-    max_retries = 3
-    for i in range(max_retries):
-        try:
-            return func(*args, **kwargs)
-        except gspread.exceptions.APIError as e:
-            # 如果是最後一次嘗試，或者不是流量限制錯誤，就拋出異常
-            if i == max_retries - 1:
-                raise e
-
-            # 顯示等待訊息 (僅在第一次重試時顯示，避免太干擾)
-            if i == 0:
-                st.toast(f"⏳ 雲端寫入頻繁，正在排隊重試中...", icon="⚠️")
-
-            # 指數退避: 等待 2s, 4s, 8s...
-            time.sleep(2 * (i + 1))
-        except Exception as e:
-            raise e
+    digest = hashlib.sha1("\x1f".join(ids).encode("utf-8")).hexdigest()
+    return f"{key_prefix}_editor_{nonce}_{digest[:12]}"
 
 
-# --- 通用編輯器邏輯 (編輯/刪除) ---
-def handle_data_editor(df, sheet, key_prefix, df_session_key):
+def handle_data_editor(df, sheet, key_prefix):
+    # df 只是目前這一頁 (最多一百多筆)，整本帳不會送到瀏覽器
     if df.empty:
         st.info("目前沒有資料。")
         return
 
-    df_display = df.copy()
-    week_data = {}
-    if "Week" in df_display.columns:
-        week_data = df_display["Week"].to_dict()
-        df_display = df_display.drop(columns=["Week"])
-
-    if "Date" in df_display.columns:
-        df_display["Date"] = pd.to_datetime(
-            df_display["Date"], errors="coerce"
+    # 還沒補上 _id 的舊資料：只能瀏覽，修改/刪除等遷移後再開放
+    if ID_COLUMN not in df.columns:
+        st.info(NO_ID_INFO)
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Date": st.column_config.DateColumn(
+                    "日期", format="YYYY-MM-DD"
+                ),
+            },
         )
+        return
 
+    # [修改] 以 _id 當索引：編輯器回報的位置直接換成 _id
+    df_display = df.set_index(ID_COLUMN)
     df_display.insert(0, "刪除", False)
+    ids = [str(rid) for rid in df_display.index]
 
-    edited_df = st.data_editor(
+    # 存檔後換一個 nonce，讓編輯器丟掉已送出的修改
+    nonce = st.session_state.get(f"{key_prefix}_editor_nonce", 0)
+    key = editor_key(key_prefix, ids, nonce)
+    st.data_editor(
         df_display,
-        key=f"{key_prefix}_editor",
+        key=key,
         use_container_width=True,
         hide_index=True,
         column_config={
@@ -71,78 +77,181 @@ def handle_data_editor(df, sheet, key_prefix, df_session_key):
             ),
             "Amount": st.column_config.NumberColumn("金額", min_value=0),
             "Price": st.column_config.NumberColumn("金額", min_value=0),
+            "Week": None,  # 週數跟著日期，不開放直接編輯
         },
     )
 
-    if not edited_df.equals(df_display):
-        col_btn, col_msg = st.columns([1, 2])
-        with col_btn:
-            if st.button("💾 確認修改", key=f"{key_prefix}_save"):
-                try:
-                    # 1. 處理刪除
-                    deleted_rows = edited_df[edited_df["刪除"] == True]
-                    rows_to_delete = []
-                    if not deleted_rows.empty:
-                        for idx in deleted_rows.index:
-                            rows_to_delete.append(idx + 2)
-
-                        # [修改] 使用 api_retry 包覆刪除操作
-                        def batch_delete():
-                            for row_num in sorted(
-                                rows_to_delete, reverse=True
-                            ):
-                                sheet.delete_rows(row_num)
-
-                        api_retry(batch_delete)
-                        st.toast(f"已刪除 {len(rows_to_delete)} 筆資料")
-
-                    # 2. 處理修改
-                    changes_count = 0
-                    for idx, row in edited_df.iterrows():
-                        if row["刪除"]:
-                            continue
-                        original_row = df_display.loc[idx]
-                        cols = [c for c in edited_df.columns if c != "刪除"]
-                        changes_found = False
-                        row_values = []
-
-                        for col in cols:
-                            new_val = row[col]
-                            old_val = original_row[col]
-                            if isinstance(new_val, (datetime, pd.Timestamp)):
-                                new_val = new_val.strftime("%Y-%m-%d")
-                            if isinstance(old_val, (datetime, pd.Timestamp)):
-                                old_val = old_val.strftime("%Y-%m-%d")
-
-                            if str(new_val) != str(old_val):
-                                changes_found = True
-                            row_values.append(new_val)
-
-                        if week_data:
-                            row_values.insert(1, week_data.get(idx, ""))
-
-                        if changes_found:
-                            # [修改] 使用 api_retry 包覆更新操作
-                            api_retry(
-                                sheet.update,
-                                range_name=f"A{idx+2}",
-                                values=[row_values],
-                            )
-                            changes_count += 1
-
-                    if changes_count > 0:
-                        st.toast(f"已更新 {changes_count} 筆資料")
-
-                    # 3. 重新整理
-                    load_all_finance_data.clear()
-                    if "fin_data_loaded" in st.session_state:
-                        del st.session_state["fin_data_loaded"]
-
-                    st.success("同步完成！")
+    # [優化] 直接讀編輯器回報的差異 (edited_rows / deleted_rows)，
+    # 不再整張 equals() 與 iterrows() 逐格比對
+    delta = st.session_state.get(key) or {}
+    deleted = {ids[int(pos)] for pos in delta.get("deleted_rows", [])}
+    edited = {}
+    for pos, changes in delta.get("edited_rows", {}).items():
+        rid = ids[int(pos)]
+        if changes.get("刪除"):
+            deleted.add(rid)
+            continue
+        changes = {c: v for c, v in changes.items() if c != "刪除"}
+        if changes:
+            edited[rid] = changes
+    edited = {rid: c for rid, c in edited.items() if rid not in deleted}
+    if not deleted and not edited:
+        return
+
+    col_btn, col_msg = st.columns([1, 2])
+    with col_btn:
+        if st.button("💾 確認修改", key=f"{key_prefix}_save"):
+            try:
+                # 1. 收集刪除 ([修改] 以 _id 指定資料列，不再用 index + 2)
+                rows_to_delete = sorted(deleted)
+
+                # 2. 收集修改：只寫使用者改過的欄位，其他儲存格保持原樣
+                rows_to_update = {}
+                for rid, changes in edited.items():
+                    changes = dict(changes)
+                    if changes.get("Date"):
+                        date = pd.Timestamp(changes["Date"])
+                        changes["Date"] = date.strftime("%Y-%m-%d")
+                        if "Week" in df_display.columns:
+                            changes["Week"] = date.isocalendar()[1]
+                    rows_to_update[rid] = changes
+
+                # [修改] 刪除與修改合併成一次 batch_update 送出
+                # (429 的退避重試由請求排程器在背景處理，不再卡住畫面)
+                result = apply_sheet_edits(
+                    sheet.title, rows_to_update, rows_to_delete
+                )
+                # (實際的請求數含寫入前核對列位置的讀取，見 bench/replay.py)
+                if result.done:
+                    st.toast(
+                        f"已刪除 {len(rows_to_delete)} 筆、"
+                        f"更新 {len(rows_to_update)} 筆資料"
+                    )
+
+                # 3. 重新整理
+                # (共用快取已修補，這裡只重置本 session 的編輯器；
+                #  寫入失敗時保留編輯內容，讓使用者修正後再存)
+                if write_feedback(result, "同步完成！"):
+                    st.session_state[f"{key_prefix}_editor_nonce"] = nonce + 1
                     st.rerun()
 
-                except Exception as e:
-                    st.error(f"更新失敗: {e}")
+            except Exception as e:
+                st.error(f"更新失敗: {e}")
+    with col_msg:
+        st.caption(
+            f"✏️ 修改 {len(edited)} 筆、🗑️ 刪除 {len(deleted)} 筆待儲存"
+        )
+
+
+# --- 明細瀏覽 (伺服器端搜尋/篩選/排序/分頁) ---
+PAGE_SIZES = [25, 50, 100]
+
+
+def ledger_page(df, key_prefix, amount_col, category_col, show_all):
+    """回傳要放進編輯器的那一頁；未勾選「檢視全部」時只取最近 5 筆。"""
+    if not show_all:
+        st.caption("僅顯示最近 5 筆")
+        return ledger_view.page_of(df, ledger_view.query(df), 1, 5)
+
+    sorts = {
+        "日期 (新→舊)": ("Date", False),
+        "日期 (舊→新)": ("Date", True),
+        "金額 (高→低)": (amount_col, False),
+        "金額 (低→高)": (amount_col, True),
+    }
+    c1, c2, c3, c4 = st.columns([2, 2, 1.5, 1])
+    search = c1.text_input(
+        "搜尋項目", key=f"{key_prefix}_search", placeholder="關鍵字..."
+    )
+    cats = c2.multiselect(
+        "分類",
+        (
+            ledger_view.categories(df[category_col])
+            if category_col in df.columns
+            else []
+        ),
+        key=f"{key_prefix}_cats",
+    )
+    sort_by, ascending = sorts[
+        c3.selectbox("排序", list(sorts), key=f"{key_prefix}_sort")
+    ]
+    page_size = c4.selectbox(
+        "每頁", PAGE_SIZES, index=1, key=f"{key_prefix}_page_size"
+    )
+
+    positions = ledger_view.query(
+        df,
+        sort_by=sort_by,
+        ascending=ascending,
+        search=search,
+        search_cols=("Item", "Note"),
+        filters={category_col: cats},
+    )
+    n_pages = ledger_view.page_count(len(positions), page_size)
+    page_key = f"{key_prefix}_page"
+    # 篩選後頁數變少時，先把頁碼夾回範圍內再建立元件
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    page = st.number_input(
+        f"頁數 (共 {n_pages} 頁、{len(positions)} 筆)",
+        min_value=1,
+        max_value=n_pages,
+        step=1,
+        key=page_key,
+    )
+    return ledger_view.page_of(df, positions, page, page_size)
+
+
+# --- 封存年度 (唯讀) ---
+RECENT = "近期 (可編輯)"
+
+
+def choose_year(worksheet_name, key_prefix):
+    """有封存年度時讓使用者選擇；回傳選到的封存年度 (近期為 None)。"""
+    years = archived_years(worksheet_name)
+    if not years:
+        return None
+    options = [RECENT] + [f"{y} (封存)" for y in years]
+    choice = st.selectbox("年度", options, key=f"{key_prefix}_year")
+    return None if choice == RECENT else years[options.index(choice) - 1]
+
+
+def show_archived_year(
+    worksheet_name, year, key_prefix, amount_col, category_col
+):
+    # 預設只看摘要 (每月 × 分類)，勾選後才讀該年度的封存明細
+    summary = archive_summary(worksheet_name, year)
+    st.caption(
+        f"🗄️ {year} 年已封存：{int(summary['Rows'].sum())} 筆、"
+        f"${int(summary['Total'].sum()):,} (唯讀)"
+    )
+    if not summary.empty:
+        st.dataframe(
+            summary.pivot_table(
+                index="Month",
+                columns="Category",
+                values="Total",
+                aggfunc="sum",
+                fill_value=0,
+                observed=True,
+            ),
+            use_container_width=True,
+        )
+    if not st.checkbox("載入明細", key=f"{key_prefix}_{year}_detail"):
+        return
+    df = query_ledger(worksheet_name, f"{year}-01-01", f"{year + 1}-01-01")
+    page_df = ledger_page(
+        df, f"{key_prefix}_{year}", amount_col, category_col, True
+    )
+    st.dataframe(
+        page_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Date": st.column_config.DateColumn("日期", format="YYYY-MM-DD"),
+            ID_COLUMN: None,
+        },
+    )
 
 
 # --- 收入頁面 ---
@@ -183,29 +292,22 @@ def show_income_tab(sheet_income, df_income, income_types):
 
                 row_data = [str(i_date), i_item, i_amount, final_type, i_note]
 
-                # [修改] 使用 api_retry 包覆寫入操作
-                api_retry(sheet_income.append_row, row_data)
-
-                # 手動更新本地 Session (樂觀更新)
-                new_row = pd.DataFrame(
-                    [row_data],
-                    columns=["Date", "Item", "Amount", "Type", "Note"],
-                )
-                if "df_income" in st.session_state:
-                    st.session_state["df_income"] = pd.concat(
-                        [st.session_state["df_income"], new_row],
-                        ignore_index=True,
-                    )
+                # [修改] 寫入延遲佇列，背景批次送出 (不必等待雲端回應)
+                # 共用快取同時接上這一列，所有 session 下次 rerun 都看得到
+                append_row_deferred("Income", row_data)
 
                 if (
                     sel_type == ADD_NEW_INC
                     and new_type
                     and new_type not in income_types
                 ):
-                    update_setting_value(
+                    remembered = update_setting_value(
                         "Income_Types", ",".join(income_types + [new_type])
                     )
-                    st.toast(f"已記憶新類別：{new_type}")
+                    if remembered.done:
+                        st.toast(f"已記憶新類別：{new_type}")
+                    elif remembered.failed:
+                        st.toast(f"新類別未能記憶：{remembered.error}")
 
                 st.success("已存入！")
                 st.rerun()
@@ -214,20 +316,20 @@ def show_income_tab(sheet_income, df_income, income_types):
 
     st.markdown("### 📝 管理收入明細")
     if not df_income.empty:
-        df_income["Date"] = pd.to_datetime(df_income["Date"], errors="coerce")
-        df_sorted = df_income.sort_values(by="Date", ascending=False)
-
         col_txt, col_check = st.columns([4, 1])
         with col_check:
             show_all = st.checkbox("檢視全部", key="show_all_inc")
 
-        if show_all:
-            handle_data_editor(df_sorted, sheet_income, "income", "df_income")
+        # [新增] 已封存的年度只在選到時才讀取
+        year = choose_year("Income", "income") if show_all else None
+        if year:
+            show_archived_year("Income", year, "income", "Amount", "Type")
         else:
-            st.caption("僅顯示最近 5 筆")
-            handle_data_editor(
-                df_sorted.head(5), sheet_income, "income", "df_income"
+            # [優化] 排序/分頁在伺服器端完成，編輯器只拿到一頁
+            page_df = ledger_page(
+                df_income, "income", "Amount", "Type", show_all
             )
+            handle_data_editor(page_df, sheet_income, "income")
     else:
         st.info("目前沒有收入紀錄。")
 
@@ -281,35 +383,24 @@ def show_expense_tab(sheet_fin, df_fin, type1_list, type2_list):
                     final_t2,
                 ]
 
-                # [修改] 使用 api_retry 包覆寫入操作
-                api_retry(sheet_fin.append_row, row_data)
-
-                # 手動更新本地 Session
-                new_row = pd.DataFrame(
-                    [row_data],
-                    columns=[
-                        "Date",
-                        "Week",
-                        "Item",
-                        "Price",
-                        "Type1",
-                        "Type2",
-                    ],
-                )
-                if "df_fin" in st.session_state:
-                    st.session_state["df_fin"] = pd.concat(
-                        [st.session_state["df_fin"], new_row],
-                        ignore_index=True,
-                    )
+                # [修改] 寫入延遲佇列，背景批次送出 (不必等待雲端回應)
+                # 共用快取同時接上這一列，所有 session 下次 rerun 都看得到
+                append_row_deferred("Finance", row_data)
 
+                # [優化] 兩個新類別合併成一次寫入
+                new_options = {}
                 if sel_t1 == ADD_NEW and new_t1 and new_t1 not in type1_list:
-                    update_setting_value(
-                        "Type1_Options", ",".join(type1_list + [new_t1])
+                    new_options["Type1_Options"] = ",".join(
+                        type1_list + [new_t1]
                     )
                 if sel_t2 == ADD_NEW and new_t2 and new_t2 not in type2_list:
-                    update_setting_value(
-                        "Type2_Options", ",".join(type2_list + [new_t2])
+                    new_options["Type2_Options"] = ",".join(
+                        type2_list + [new_t2]
                     )
+                if new_options:
+                    remembered = update_settings(new_options)
+                    if remembered.failed:
+                        st.toast(f"新類別未能記憶：{remembered.error}")
 
                 st.success("已記錄！")
                 st.rerun()
@@ -318,18 +409,17 @@ def show_expense_tab(sheet_fin, df_fin, type1_list, type2_list):
 
     st.markdown("### 📝 管理支出明細")
     if not df_fin.empty:
-        df_fin["Date"] = pd.to_datetime(df_fin["Date"], errors="coerce")
-        df_sorted = df_fin.sort_values(by="Date", ascending=False)
         col_txt, col_check = st.columns([4, 1])
         with col_check:
             show_all_exp = st.checkbox("檢視全部", key="show_all_exp")
 
-        if show_all_exp:
-            handle_data_editor(df_sorted, sheet_fin, "expense", "df_fin")
+        year = choose_year("Finance", "expense") if show_all_exp else None
+        if year:
+            show_archived_year("Finance", year, "expense", "Price", "Type1")
         else:
-            st.caption("僅顯示最近 5 筆")
-            handle_data_editor(
-                df_sorted.head(5), sheet_fin, "expense", "df_fin"
+            page_df = ledger_page(
+                df_fin, "expense", "Price", "Type1", show_all_exp
             )
+            handle_data_editor(page_df, sheet_fin, "expense")
     else:
         st.info("目前沒有支出紀錄。")
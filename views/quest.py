@@ -3,6 +3,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 import sys
 import os
+import functools
+import html
+import zlib
 
 # 路徑修正
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,23 +13,78 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 # [修改 1] 移除 generate_reward 的引用
-from utils import get_worksheet, update_setting_value, load_sheet_data
+from utils import get_worksheet, update_setting_value, load_sheet_data, append_row_deferred, update_row_by_id, delete_rows_by_id, write_feedback
+
+from services import ledger_view
+from services.row_ids import ID_COLUMN, NO_ID_INFO
+
+QUEST_PAGE_SIZE = 12
+
+# 任務類型 -> 卡片配色 class (未列出的用預設的深牛皮)
+QUEST_TYPE_CLASSES = {"工作": "qt-work", "禪行": "qt-zen", "採購": "qt-shop"}
+
+QUEST_CSS = """
+<style>
+/* 定義楷體優先，若無則使用明體 */
+.kaiti-font, .quest-title, .quest-content, .quest-stamp {
+    font-family: 'KaiTi', 'DFKai-SB', 'BiauKai', '楷體', '標楷體', serif;
+}
+
+/* 牛皮紙紋理 */
+.kraft-texture, .quest-card {
+    background-image: url("https://www.transparenttextures.com/patterns/cardboard.png");
+}
+
+.quest-card {
+    --qc-bg: #E6D2B5; --qc-fg: #3E2723; /* 深牛皮 */
+    background-color: var(--qc-bg); color: var(--qc-fg);
+    padding: 20px; margin: 10px 0; border-radius: 2px; box-shadow: 4px 4px 10px rgba(0,0,0,0.2);
+    position: relative; border-top: 1px solid rgba(255,255,255,0.4); min-height: 260px;
+    display: flex; flex-direction: column;
+}
+.quest-card.qt-work { --qc-bg: #FFF9C4; --qc-fg: #333333; } /* 淡黃 */
+.quest-card.qt-zen { --qc-bg: #E1BEE7; --qc-fg: #4A148C; }  /* 淡紫 */
+.quest-card.qt-shop { --qc-bg: #C8E6C9; --qc-fg: #1B5E20; } /* 淡綠 */
+.quest-card.rot-0 { transform: rotate(-3deg); }
+.quest-card.rot-1 { transform: rotate(-1.5deg); }
+.quest-card.rot-3 { transform: rotate(1.5deg); }
+.quest-card.rot-4 { transform: rotate(3deg); }
+.quest-pin { position: absolute; top: -15px; left: 50%; transform: translateX(-50%); font-size: 30px; text-shadow: 2px 2px 2px rgba(0,0,0,0.3); }
+.quest-title { font-size: 28px; font-weight: bold; border-bottom: 2px dashed var(--qc-fg); padding-bottom: 8px; margin-bottom: 12px; text-align: center; }
+.quest-content { font-size: 22px; line-height: 1.5; margin-bottom: 20px; }
+.quest-meta { font-size: 13px; opacity: 0.8; margin-top: auto; font-family: sans-serif; line-height: 1.6; }
+.quest-stamp {
+    position: absolute; bottom: 15px; right: 15px; width: 60px; height: 60px;
+    border: 3px double var(--qc-fg); border-radius: 50%; display: flex; align-items: center; justify-content: center;
+    font-size: 20px; font-weight: bold; transform: rotate(-15deg); opacity: 0.7;
+    mask-image: url('https://www.transparenttextures.com/patterns/grunge-wall.png');
+}
+</style>
+"""
+
+
+# [優化] 每張卡片的 HTML 依 (ID, 內容) 快取：內容改了就是新版本，
+# 旋轉角度由 ID 決定，卡片換位置也不必重組
+@functools.lru_cache(maxsize=2048)
+def quest_card_html(row_id, name, content, deadline, q_type):
+    type_class = QUEST_TYPE_CLASSES.get(q_type, "")
+    rot = zlib.crc32(row_id.encode("utf-8")) % 5
+    # [修改 6] 移除獎勵顯示行
+    return (
+        f'<div class="quest-card kraft-texture {type_class} rot-{rot}">'
+        '<div class="quest-pin">📌</div>'
+        f'<div class="quest-title">{html.escape(name)}</div>'
+        f'<div class="quest-content">{html.escape(content)}</div>'
+        f'<div class="quest-meta">📅 期限: {html.escape(deadline)}<br></div>'
+        f'<div class="quest-stamp">{html.escape(q_type)}</div>'
+        '</div>'
+    )
+
 
 def show_quest_board(quest_types):
     # [修改 2] 移除 Google Fonts 的 Long Cang，改用 CSS 定義系統楷體
-    st.markdown("""
-    <style>
-    /* 定義楷體優先，若無則使用明體 */
-    .kaiti-font {
-        font-family: 'KaiTi', 'DFKai-SB', 'BiauKai', '楷體', '標楷體', serif;
-    }
-    
-    /* 牛皮紙紋理 */
-    .kraft-texture {
-        background-image: url("https://www.transparenttextures.com/patterns/cardboard.png");
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # [優化] 卡片樣式改成共用 class，整頁只送一次
+    st.markdown(QUEST_CSS, unsafe_allow_html=True)
 
     st.markdown('<div class="corkboard-title">🛡️ 任務看板 (Quest Board)</div>', unsafe_allow_html=True)
     sheet_qb = get_worksheet("QuestBoard")
@@ -63,15 +121,13 @@ def show_quest_board(quest_types):
                     # [修改 4] 不再生成獎勵，寫入固定值 "無" 以維持資料庫格式
                     rew = "無"
                     
-                    sheet_qb.append_row([q_name, q_content, final_type, "待接取", deadline, rew])
+                    append_row_deferred("QuestBoard", [q_name, q_content, final_type, "待接取", deadline, rew])
                     
                     if sel_type == ADD_NEW and new_type and new_type not in quest_types:
                         new_list_str = ",".join(quest_types + [new_type])
-                        update_setting_value("Quest_Types", new_list_str)
-                        st.toast(f"已新增類型：{new_type}")
+                        if update_setting_value("Quest_Types", new_list_str).done: st.toast(f"已新增類型：{new_type}")
 
                     st.success(f"已發布任務：{q_name}")
-                    load_sheet_data.clear()
                     st.rerun()
             else: st.error("QuestBoard 讀取失敗")
 
@@ -80,80 +136,42 @@ def show_quest_board(quest_types):
         df_qb = load_sheet_data("QuestBoard")
         if not df_qb.empty:
             if "Status" in df_qb.columns and "Type" in df_qb.columns:
-                todo_tasks = df_qb[df_qb['Status'] == '待接取']
-                
-                if not todo_tasks.empty:
+                # [優化] 待接取的列位置依資料指紋快取，換頁不必重新篩選
+                todo_pos = ledger_view.query(df_qb, sort_by=None, filters={"Status": ["待接取"]})
+
+                if len(todo_pos):
+                    n_pages = ledger_view.page_count(len(todo_pos), QUEST_PAGE_SIZE)
+                    if st.session_state.get("qb_page", 1) > n_pages:
+                        st.session_state["qb_page"] = n_pages
+                    if n_pages > 1:
+                        st.number_input(f"頁數 (共 {n_pages} 頁、{len(todo_pos)} 張委託)", min_value=1, max_value=n_pages, step=1, key="qb_page")
+                    page_df = ledger_view.page_of(df_qb, todo_pos, st.session_state.get("qb_page", 1), QUEST_PAGE_SIZE)
+
+                    # 每張卡片各自的接取/撤下按鈕；一頁最多 QUEST_PAGE_SIZE 張，元件數量固定
+                    # 還沒補上 _id 的舊資料：只顯示卡片，不提供接取/撤下
+                    has_ids = ID_COLUMN in page_df.columns
+                    if not has_ids: st.info(NO_ID_INFO)
                     cols = st.columns(4)
-                    for i, (index, row) in enumerate(todo_tasks.iterrows()):
-                        col = cols[i % 4]
-                        with col:
-                            # --- 視覺邏輯 ---
-                            q_type = row.get('Type', '其他')
-                            
-                            # 配色
-                            bg_color = "#E6D2B5" # 深牛皮
-                            text_color = "#3E2723"
-                            
-                            if q_type == "工作":
-                                bg_color = "#FFF9C4" # 淡黃
-                                text_color = "#333333"
-                            elif q_type == "禪行":
-                                bg_color = "#E1BEE7" # 淡紫
-                                text_color = "#4A148C"
-                            elif q_type == "採購":
-                                bg_color = "#C8E6C9" # 淡綠
-                                text_color = "#1B5E20"
-                            
-                            # 旋轉
-                            rot = (i % 5 - 2) * 1.5
-                            
-                            # CSS 變數
-                            card_css = f"background-color: {bg_color}; color: {text_color}; padding: 20px; margin: 10px 0; border-radius: 2px; box-shadow: 4px 4px 10px rgba(0,0,0,0.2); position: relative; border-top: 1px solid rgba(255,255,255,0.4); min-height: 260px; transform: rotate({rot}deg); background-image: url('https://www.transparenttextures.com/patterns/cardboard.png');"
-                            
-                            pin_css = "position: absolute; top: -15px; left: 50%; transform: translateX(-50%); font-size: 30px; text-shadow: 2px 2px 2px rgba(0,0,0,0.3);"
-                            
-                            # [修改 5] 字體改為楷體 (kaiti-font)
-                            title_css = f"font-family: 'KaiTi', 'DFKai-SB', '楷體', serif; font-size: 28px; font-weight: bold; border-bottom: 2px dashed {text_color}; padding-bottom: 8px; margin-bottom: 12px; text-align: center;"
-                            
-                            content_css = "font-family: 'KaiTi', 'DFKai-SB', '楷體', serif; font-size: 22px; line-height: 1.5; margin-bottom: 20px;"
-                            
-                            meta_css = "font-size: 13px; opacity: 0.8; margin-top: auto; font-family: sans-serif; line-height: 1.6;"
-                            
-                            stamp_css = f"position: absolute; bottom: 15px; right: 15px; width: 60px; height: 60px; border: 3px double {text_color}; border-radius: 50%; display: flex; align-items: center; justify-content: center; font-family: 'KaiTi', 'DFKai-SB', '楷體', serif; font-size: 20px; font-weight: bold; transform: rotate(-15deg); opacity: 0.7; mask-image: url('https://www.transparenttextures.com/patterns/grunge-wall.png');"
-
-                            # 組合 HTML
-                            # [修改 6] 移除獎勵顯示行
-                            html_code = f"""
-                            <div style="{card_css}">
-                                <div style="{pin_css}">📌</div>
-                                <div style="{title_css}">{row['Name']}</div>
-                                <div style="{content_css}">{row['Content']}</div>
-                                <div style="{meta_css}">
-                                    📅 期限: {row['Deadline']}<br>
-                                </div>
-                                <div style="{stamp_css}">
-                                    {q_type}
-                                </div>
-                            </div>
-                            """
-                            
-                            st.markdown(html_code, unsafe_allow_html=True)
-                            
+                    for i, row in enumerate(page_df.to_dict("records")):
+                        row_id = str(row.get(ID_COLUMN, "")).strip()
+                        with cols[i % 4]:
+                            st.markdown(quest_card_html(row_id or str(row['Name']), str(row['Name']), str(row['Content']), str(row['Deadline']), str(row.get('Type', '其他'))), unsafe_allow_html=True)
+                            # 試算表上直接新增、還沒有 _id 的列：找不到列號也沒有唯一的 key，不放按鈕
+                            if not row_id: continue
+
                             # 按鈕區
                             c_take, c_cancel = st.columns(2)
                             with c_take:
-                                if st.button(f"🖐️ 接取", key=f"take_{index}"):
-                                    sheet_qb.update_cell(index + 2, 4, "進行中")
-                                    st.balloons()
-                                    st.success(f"已接取：{row['Name']}")
-                                    load_sheet_data.clear()
-                                    st.rerun()
+                                # [修改] 以 _id 指定資料列，不再用 index + 2
+                                if st.button(f"🖐️ 接取", key=f"take_{row_id}"):
+                                    result = update_row_by_id("QuestBoard", row_id, {"Status": "進行中"})
+                                    if result.done: st.balloons()
+                                    if write_feedback(result, f"已接取：{row['Name']}"): st.rerun()
                             with c_cancel:
-                                if st.button(f"❌ 撤下", key=f"del_{index}"):
-                                    sheet_qb.delete_rows(index + 2)
-                                    st.toast("委託已撕毀。")
-                                    load_sheet_data.clear()
-                                    st.rerun()
+                                if st.button(f"❌ 撤下", key=f"del_{row_id}"):
+                                    result = delete_rows_by_id("QuestBoard", [row_id])
+                                    if result.done: st.toast("委託已撕毀。")
+                                    if write_feedback(result, "已撤下"): st.rerun()
                 else:
                     st.info("佈告欄目前空空如也。")
             else:
@@ -168,9 +186,12 @@ def show_tracking():
         if not df_qb.empty:
             if "Status" in df_qb.columns:
                 doing = df_qb[df_qb['Status'] == '進行中']
+                has_ids = ID_COLUMN in df_qb.columns
                 if not doing.empty:
+                    if not has_ids: st.info(NO_ID_INFO)
                     for idx, row in doing.iterrows():
                         q_type = row.get('Type', '其他')
+                        row_id = str(row[ID_COLUMN]).strip() if has_ids else ""
                         with st.container():
                             c1, c2 = st.columns([3, 1])
                             with c1:
@@ -189,16 +210,11 @@ def show_tracking():
                                 # [修改 7] 追蹤區塊也移除獎勵顯示
                                 st.write(f"**期限**: {row['Deadline']}")
                             with c2:
-                                if st.button("✅ 完成", key=f"done_{idx}"):
-                                    sheet_qb.update_cell(idx+2, 4, "已完成")
-                                    st.success("完成！")
-                                    load_sheet_data.clear()
-                                    st.rerun()
-                                if st.button("🏳️ 放棄", key=f"drop_{idx}"):
-                                    sheet_qb.update_cell(idx+2, 4, "待接取")
-                                    st.warning("已放棄")
-                                    load_sheet_data.clear()
-                                    st.rerun()
+                                if row_id:
+                                    if st.button("✅ 完成", key=f"done_{row_id}"):
+                                        if write_feedback(update_row_by_id("QuestBoard", row_id, {"Status": "已完成"}), "完成！"): st.rerun()
+                                    if st.button("🏳️ 放棄", key=f"drop_{row_id}"):
+                                        if write_feedback(update_row_by_id("QuestBoard", row_id, {"Status": "待接取"}), "已放棄"): st.rerun()
                             st.divider()
                 else: st.info("沒有進行中的任務。")
     except: pass
\ No newline at end of file
@@ -6,7 +6,15 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-from utils import update_setting_value, get_settings
+from utils import (
+    update_settings,
+    get_settings,
+    cache_stats,
+    archive_closed_years,
+    migrate_row_ids,
+    missing_row_ids,
+    write_feedback,
+)
 
 
 def show_setting_page(
@@ -26,12 +34,66 @@ def show_setting_page(
         # [修改] 移除女僕外觀設定區塊
 
         if st.form_submit_button("💾 儲存所有設定"):
-            update_setting_value("LifeGoal", n_goal)
-            update_setting_value("Location", n_city)
-
-            st.success("設定已更新！")
-            st.cache_data.clear()
-            st.rerun()
+            # [優化] 兩個設定合併成一次寫入
+            result = update_settings({"LifeGoal": n_goal, "Location": n_city})
+            if write_feedback(result, "設定已更新！"):
+                st.rerun()
 
     st.divider()
     st.info("💡 財務預算 (Budget) 請直接至 Google Sheet 修改金額。")
+
+    with st.expander("🗄️ 快取狀態"):
+        stats = cache_stats()
+        data = stats["data"]
+        lookups = data["hits"] + data["misses"]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("快取命中", data["hits"])
+        c2.metric("未命中", data["misses"])
+        c3.metric("命中率", f"{data['hits'] / lookups:.0%}" if lookups else "-")
+        st.json(stats)
+
+    # [新增] 已結束的年度搬到封存，原分頁只留近期資料
+    with st.expander("🗄️ 封存舊年度"):
+        st.caption(
+            "把較早年度的支出/收入搬到年度封存，並留下每月摘要；"
+            "封存後的資料在明細頁可查詢但不可編輯。"
+        )
+        if st.button("開始封存", key="archive_run"):
+            with st.spinner("封存中..."):
+                report = archive_closed_years()
+            moved = {
+                f"{sheet} {year}": n
+                for sheet, years in report.items()
+                for year, n in years.items()
+            }
+            if moved:
+                st.success(f"已封存 {sum(moved.values())} 筆")
+                st.json(moved)
+            else:
+                st.info("沒有需要封存的年度。")
+
+    # [新增] 舊資料補上列 ID (讀取時不再自動寫回，改由這裡手動執行)
+    missing = missing_row_ids()
+    with st.expander("🆔 補上列 ID", expanded=bool(missing)):
+        st.caption(
+            "修改與刪除都以隱藏的 _id 欄指定資料列；"
+            "直接在試算表新增的列沒有 _id，補上之前無法在這裡編輯。"
+        )
+        if missing:
+            st.warning(
+                "缺少 _id："
+                + "、".join(f"{name} {n} 筆" for name, n in missing.items())
+            )
+        if st.button("補上列 ID", key="migrate_row_ids"):
+            with st.spinner("補上中..."):
+                report = migrate_row_ids()
+            if report:
+                st.success(f"已補上 {sum(report.values())} 筆")
+                st.json(report)
+            else:
+                st.info("所有資料列都已有 _id。")
+
+    # [新增] 記憶體與快取的詳細報告
+    if st.button("🩺 系統診斷"):
+        st.session_state["current_page"] = "Diagnostics"
+        st.rerun()